@@ -0,0 +1,84 @@
+# Compares reading bars from per-ticker CSV files with pd.read_csv against the memory-mapped
+# BarStore, on a synthetic dataset written to a temporary directory: loading one series,
+# a History-style window of the last bars before a date, and an aligned multi-ticker query.
+# Every store result is checked against the CSV one.
+#
+#   python benchmarks/bench_bar_store.py [--symbols 200] [--repeat 5]
+
+import argparse
+import os
+import tempfile
+import time
+
+import synthetic  # noqa: F401  (puts offline/ on sys.path)
+from barstore import BarStore
+from make_sample_data import generate
+from AlgorithmImports import np, pd
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def read_csv(directory, ticker):
+    return pd.read_csv(os.path.join(directory, 'prices', f"{ticker}.csv"), parse_dates=['date'], index_col='date')
+
+
+def csv_window(directory, tickers, end, periods):
+    closes = {ticker: read_csv(directory, ticker).close.loc[:end - pd.Timedelta(days=1)].iloc[-periods:]
+              for ticker in tickers}
+    return pd.DataFrame(closes, columns=tickers)
+
+
+def csv_query(directory, tickers, start, end):
+    closes = {ticker: read_csv(directory, ticker).close.loc[start:end - pd.Timedelta(days=1)] for ticker in tickers}
+    return pd.DataFrame(closes, columns=tickers)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generate(directory, args.symbols, '2014-06-01', '2021-02-01')
+        tickers = sorted(os.path.splitext(name)[0] for name in os.listdir(os.path.join(directory, 'prices')))
+        store = BarStore(os.path.join(directory, 'bars'))
+        start = time.perf_counter()
+        for ticker in tickers:
+            store.ingest_csv(os.path.join(directory, 'prices', f"{ticker}.csv"))
+        print(f"ingested {len(tickers)} tickers in {time.perf_counter() - start:.2f} s")
+
+        end = pd.Timestamp('2019-06-03')
+        half = tickers[:len(tickers) // 2]
+        cases = (
+            ('one series, all fields',
+             lambda: read_csv(directory, tickers[0]),
+             lambda: BarStore(store.root).read(tickers[0]),
+             lambda expected, actual: np.allclose(expected.to_numpy(), actual.to_numpy(), equal_nan=True)),
+            (f'last 200 closes x {len(half)}',
+             lambda: csv_window(directory, half, end, 200),
+             lambda: BarStore(store.root).window(half, end, 200),
+             lambda expected, actual: np.array_equal(expected.to_numpy(), actual[1], equal_nan=True)),
+            (f'2018 closes x {len(tickers)}',
+             lambda: csv_query(directory, tickers, pd.Timestamp('2018-01-01'), pd.Timestamp('2019-01-01')),
+             lambda: BarStore(store.root).query(tickers, pd.Timestamp('2018-01-01'), pd.Timestamp('2019-01-01')),
+             lambda expected, actual: np.array_equal(expected.to_numpy(), actual[1], equal_nan=True)),
+        )
+
+        # A fresh BarStore per call so partitions are opened (memory-mapped) every time
+        print(f"{'case':>28} {'read_csv ms':>12} {'bar store ms':>13} {'speedup':>8}")
+        for name, csv, stored, same in cases:
+            before, expected = timed(csv, args.repeat)
+            after, actual = timed(stored, args.repeat)
+            if not same(expected, actual):
+                raise SystemExit(f"{name}: bar store result differs from read_csv")
+            print(f"{name:>28} {before * 1e3:>12.2f} {after * 1e3:>13.2f} {before / after:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# Compares the shared TopDollarVolumeSelection against the sort-then-slice coarse
+# selection it replaced, on a synthetic ~8,000 row coarse feed: end to end on the feed
+# (the top-k column), and on a CoarseSnapshot shared between selections (whose one-off
+# build time is printed separately).
+#
+#   python benchmarks/bench_coarse_selection.py [--rows 8000] [--repeat 50]
+
+import argparse
+import time
+
+from synthetic import make_coarse
+from CoarseSelection import CoarseSnapshot, TopDollarVolumeSelection
+
+
+def sort_then_slice(coarse, count, minPrice):
+    selected = sorted([x for x in coarse if x.HasFundamentalData and (minPrice is None or x.Price > minPrice)],
+                      key=lambda x: x.DollarVolume, reverse=True)
+    return [x.Symbol for x in selected[:count]]
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=8000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    coarse = make_coarse(args.rows)
+    snapshot_time, snapshot = timed(lambda: CoarseSnapshot(coarse), args.repeat)
+    print(f"coarse rows: {args.rows}, snapshot build: {snapshot_time * 1e3:.3f} ms")
+    print(f"{'count':>6} {'minPrice':>9} {'sort+slice ms':>14} {'top-k ms':>9} {'speedup':>8}"
+          f" {'top-k on snapshot ms':>21} {'speedup':>8}")
+    for count, minPrice in ((3, None), (100, None), (500, 5)):
+        selection = TopDollarVolumeSelection(count, minPrice=minPrice)
+        baseline, expected = timed(lambda: sort_then_slice(coarse, count, minPrice), args.repeat)
+        current, actual = timed(lambda: selection.SelectSymbols(coarse), args.repeat)
+        shared, sharedActual = timed(lambda: selection.SelectSymbols(snapshot), args.repeat)
+        if actual != expected or sharedActual != expected:
+            raise SystemExit(f"top-k selection differs from sort-then-slice for count={count}")
+        print(f"{count:>6} {str(minPrice):>9} {baseline * 1e3:>14.3f} {current * 1e3:>9.3f} {baseline / current:>7.1f}x"
+              f" {shared * 1e3:>21.3f} {baseline / shared:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# Feeds a synthetic minute feed (with an early-close day, a holiday and randomly missing
+# minutes) through SessionConsolidator, and compares updating a 25 day EMA on every minute
+# bar, per symbol and as an EmaBank, with updating an EmaBank once per consolidated session.
+# The consolidated bars must match a pandas groupby of the minute bars by symbol and session,
+# and the consolidated EMA must match an Ema fed those daily closes.
+#
+#   python benchmarks/bench_consolidation.py [--symbols 100 500] [--missing 0.05]
+
+import argparse
+import time
+
+from synthetic import make_symbols
+from BarConsolidation import SessionConsolidator
+from Indicators import Ema, EmaBank
+from UniverseScheduler import TradingCalendar
+from AlgorithmImports import datetime, np, pd, timedelta
+
+# 2019-07-03 closes at 13:00 and 2019-07-04 is a holiday
+FIRST_DAY = datetime(2019, 6, 24)
+LAST_DAY = datetime(2019, 7, 12)
+
+
+def session_minutes(calendar):
+    minutes = []
+    day = FIRST_DAY
+    while day <= LAST_DAY:
+        session = calendar.Session(day)
+        if session is not None:
+            count = int((session[1] - session[0]) / timedelta(minutes=1))
+            minutes.extend(session[0] + timedelta(minutes=i) for i in range(count))
+        day += timedelta(days=1)
+    return minutes
+
+
+def make_feed(count, minutes, missing, seed=3):
+    rng = np.random.default_rng(seed)
+    shape = (len(minutes), count)
+    close = 50.0 * np.exp(np.cumsum(rng.normal(0.0, 0.001, shape), axis=0))
+    open = np.vstack([close[:1], close[:-1]])
+    high = np.maximum(open, close) * (1 + rng.random(shape) * 0.001)
+    low = np.minimum(open, close) * (1 - rng.random(shape) * 0.001)
+    volume = rng.integers(100, 10000, shape).astype(np.float64)
+    present = rng.random(shape) >= missing
+    return present, open, high, low, close, volume
+
+
+def expected_bars(symbols, minutes, feed):
+    present, open, high, low, close, volume = feed
+    t, s = np.nonzero(present)
+    frame = pd.DataFrame({'symbol': s, 'day': pd.DatetimeIndex(minutes).normalize()[t], 'open': open[t, s],
+                          'high': high[t, s], 'low': low[t, s], 'close': close[t, s], 'volume': volume[t, s]})
+    return frame.groupby(['symbol', 'day'], sort=True).agg(
+        open=('open', 'first'), high=('high', 'max'), low=('low', 'min'), close=('close', 'last'), volume=('volume', 'sum'))
+
+
+def per_minute_scalar(symbols, minutes, feed):
+    present, _, _, _, close, _ = feed
+    emas = [Ema(25) for _ in symbols]
+    start = time.perf_counter()
+    for now, mask, row in zip(minutes, present, close.tolist()):
+        for i in np.flatnonzero(mask).tolist():
+            emas[i].Update(now, row[i])
+    return time.perf_counter() - start, int(present.sum())
+
+
+def per_minute_bank(symbols, minutes, feed):
+    present, _, _, _, close, _ = feed
+    bank = EmaBank(25)
+    rows = bank.Add(symbols)
+    start = time.perf_counter()
+    for mask, row in zip(present, close):
+        bank.Update(rows[mask], row[mask])
+    return time.perf_counter() - start, bank
+
+
+def consolidated(symbols, minutes, feed):
+    present, open, high, low, close, volume = feed
+    consolidator = SessionConsolidator()
+    bank = EmaBank(25)
+    consolidator.RegisterBank(bank)
+    rows = consolidator.Rows(symbols)
+    emitted = []
+    start = time.perf_counter()
+    for t, now in enumerate(minutes):
+        mask = present[t]
+        emitted.extend(consolidator.Update(now, rows[mask], open[t, mask], high[t, mask], low[t, mask],
+                                           close[t, mask], volume[t, mask]))
+    return time.perf_counter() - start, bank, emitted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--missing', type=float, default=0.05, help='share of minute bars dropped at random')
+    args = parser.parse_args()
+
+    calendar = TradingCalendar()
+    minutes = session_minutes(calendar)
+    print(f"{len(minutes)} minutes over {len({m.date() for m in minutes})} sessions")
+    print(f"{'symbols':>8} {'scalar/minute ms':>17} {'bank/minute ms':>15} {'consolidated ms':>16} "
+          f"{'minute EMA updates':>19} {'session EMA updates':>20}")
+    for count in args.symbols:
+        symbols = make_symbols(count)
+        feed = make_feed(count, minutes, args.missing)
+        scalar, updates = per_minute_scalar(symbols, minutes, feed)
+        minuteBank, _ = per_minute_bank(symbols, minutes, feed)
+        elapsed, bank, emitted = consolidated(symbols, minutes, feed)
+
+        expected = expected_bars(symbols, minutes, feed)
+        actual = pd.DataFrame([(int(bar.Symbol.Value[3:]), pd.Timestamp(bar.Time).normalize(), bar.Open, bar.High,
+                                bar.Low, bar.Close, bar.Volume) for bar in emitted],
+                              columns=['symbol', 'day', 'open', 'high', 'low', 'close', 'volume'])
+        actual = actual.set_index(['symbol', 'day']).sort_index()
+        if not actual.index.equals(expected.index) or not np.array_equal(actual.to_numpy(), expected.to_numpy()):
+            raise SystemExit(f"consolidated bars differ from the pandas groupby at {count} symbols")
+        if any(bar.EndTime.time() != (calendar.Session(bar.Time)[1]).time() for bar in emitted):
+            raise SystemExit("a consolidated bar does not end at its session close")
+
+        for i, symbol in enumerate(symbols):
+            ema = Ema(25)
+            for close in expected.loc[i, 'close'].tolist():
+                ema.Update(None, close)
+            if ema.Current.Value != bank.Values[bank.rowBySymbol[symbol]]:
+                raise SystemExit(f"consolidated EMA of {symbol} differs from an Ema of the daily closes")
+
+        print(f"{count:>8} {scalar * 1e3:>17.1f} {minuteBank * 1e3:>15.1f} {elapsed * 1e3:>16.1f} "
+              f"{updates:>19} {len(emitted):>20}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# Compares EmaCrossAlphaModel.Update in its per-symbol and vectorized modes on a
+# synthetic random-walk universe, checking both emit identical insights, then repeats
+# the comparison with emitOnCross and counts the insights it suppresses.
+#
+#   python benchmarks/bench_ema_cross.py [--symbols 500 5000] [--bars 50]
+
+import argparse
+import time
+
+from synthetic import make_slices, make_symbols
+from loader import load_module
+from AlgorithmImports import QCAlgorithm, Security, SecurityChanges
+
+ALPHA_MODEL = 'library/EmaCrossAlpha.py'
+
+
+def run(module, symbols, slices, warmup, vectorized, emitOnCross=False):
+    algorithm = QCAlgorithm()
+    model = module.EmaCrossAlphaModel(vectorized=vectorized, emitOnCross=emitOnCross)
+    model.OnSecuritiesChanged(algorithm, SecurityChanges([Security(s) for s in symbols]))
+
+    emitted = []
+    elapsed = 0.0
+    for i, data in enumerate(slices):
+        algorithm.Time = data.Time
+        start = time.perf_counter()
+        algorithm.UpdateRegisteredIndicators(data)
+        insights = model.Update(algorithm, data)
+        if i >= warmup:
+            elapsed += time.perf_counter() - start
+        emitted.append([(x.Symbol, x.Direction) for x in insights])
+    return elapsed / max(len(slices) - warmup, 1), emitted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, nargs='+', default=[500, 5000])
+    parser.add_argument('--bars', type=int, default=50)
+    args = parser.parse_args()
+
+    module = load_module(ALPHA_MODEL)
+    warmup = 25
+
+    print(f"{'symbols':>8} {'mode':>14} {'per-symbol ms/bar':>18} {'vectorized ms/bar':>18} {'speedup':>8} {'insights':>9}")
+    for count in args.symbols:
+        symbols = make_symbols(count)
+        slices = make_slices(symbols, warmup + args.bars)
+        for mode, emitOnCross in (('every bar', False), ('on cross', True)):
+            scalar, scalarInsights = run(module, symbols, slices, warmup, False, emitOnCross)
+            vector, vectorInsights = run(module, symbols, slices, warmup, True, emitOnCross)
+            if scalarInsights != vectorInsights:
+                raise SystemExit(f"vectorized insights differ from the per-symbol path at {count} symbols ({mode})")
+            emitted = sum(len(x) for x in scalarInsights[warmup:])
+            print(f"{count:>8} {mode:>14} {scalar * 1e3:>18.3f} {vector * 1e3:>18.3f} {scalar / vector:>7.1f}x {emitted:>9}")
+
+
+if __name__ == '__main__':
+    main()
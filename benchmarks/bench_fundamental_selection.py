@@ -0,0 +1,87 @@
+# Compares the per-object fine filters of the qc-framework and EMA-cross projects against
+# FundamentalSnapshot columns filtered with compiled predicates, on a synthetic fine feed,
+# and the factor ranking inputs read from the securities against those of the snapshot.
+#
+#   python benchmarks/bench_fundamental_selection.py [--rows 500 5000] [--repeat 50]
+
+import argparse
+import time
+
+from synthetic import START, make_fine, make_securities, make_symbols
+from FundamentalSelection import Field, FundamentalSnapshot
+from AlgorithmImports import MorningstarSectorCode, np, timedelta
+
+SECTORS = [MorningstarSectorCode.FinancialServices, MorningstarSectorCode.RealEstate, MorningstarSectorCode.Healthcare,
+           MorningstarSectorCode.Utilities, MorningstarSectorCode.Technology]
+FACTOR_FILTER = (Field.Sector.IsIn(SECTORS) & (Field.IPOAge > timedelta(365*5))
+                 & (Field.ROE > 0) & (Field.NetMargin > 0) & (Field.PERatio > 0))
+SMALL_CAP_FILTER = Field.MarketCap.Between(300000000.0, 2000000000.0)
+
+
+def factor_filter(fine, now):
+    return [x.Symbol for x in fine if x.SecurityReference.IPODate + timedelta(365*5) < now
+            and x.AssetClassification.MorningstarSectorCode in SECTORS
+            and x.OperationRatios.ROE.Value > 0
+            and x.OperationRatios.NetMargin.Value > 0
+            and x.ValuationRatios.PERatio > 0]
+
+
+def small_cap_filter(fine):
+    return [x.Symbol for x in fine if x.MarketCap > 300000000.0 and x.MarketCap < 2000000000.0]
+
+
+def factor_columns(securities):
+    return (np.array([x.Fundamentals.OperationRatios.ROE.Value for x in securities], dtype=np.float64),
+            np.array([x.Fundamentals.OperationRatios.NetMargin.Value for x in securities], dtype=np.float64),
+            np.array([x.Fundamentals.ValuationRatios.PERatio for x in securities], dtype=np.float64))
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[500, 5000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'case':>22} {'per-object ms':>14} {'columnar ms':>12} {'speedup':>8}")
+    for rows in args.rows:
+        fine = make_fine(make_symbols(rows))
+        securities = make_securities(fine)
+
+        def snapshot_filter():
+            return FundamentalSnapshot(fine, START).Select(FACTOR_FILTER)
+
+        def snapshot_small_cap():
+            return FundamentalSnapshot(fine).Select(SMALL_CAP_FILTER)
+
+        def filter_then_rank():
+            # Selection and ranking share one snapshot
+            snapshot = FundamentalSnapshot(fine, START)
+            rows = snapshot.Rows(snapshot.Select(FACTOR_FILTER))
+            return snapshot.Values('ROE', rows), snapshot.Values('NetMargin', rows), snapshot.Values('PERatio', rows)
+
+        def filter_and_rank():
+            symbols = set(factor_filter(fine, START))
+            return factor_columns([x for x in securities if x.Symbol in symbols])
+
+        cases = (('factor filter', lambda: factor_filter(fine, START), snapshot_filter),
+                 ('small-cap filter', lambda: small_cap_filter(fine), snapshot_small_cap),
+                 ('filter + rank inputs', filter_and_rank, filter_then_rank))
+        for name, baseline, columnar in cases:
+            before, expected = timed(baseline, args.repeat)
+            after, actual = timed(columnar, args.repeat)
+            same = all(np.array_equal(a, b) for a, b in zip(expected, actual)) if name == 'filter + rank inputs' \
+                else actual == expected
+            if not same:
+                raise SystemExit(f"{name}: columnar result differs from the per-object filter at {rows} rows")
+            print(f"{rows:>6} {name:>22} {before * 1e3:>14.3f} {after * 1e3:>12.3f} {before / after:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
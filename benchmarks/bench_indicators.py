@@ -0,0 +1,107 @@
+# Compares per-symbol indicator objects with the Indicators library: the ExponentialMovingAverage
+# stand-in against the __slots__ Ema, and each scalar indicator (Ema, Sma, Rocp) against its bank,
+# which updates every symbol in one call per bar. The scalar and bank values must match exactly,
+# and the Sma and Rocp values must match pandas' rolling mean and percent change. A pair of Sma
+# warmed from the same prices must also track SelectionData of the EMA universe example.
+#
+#   python benchmarks/bench_indicators.py [--symbols 500 5000] [--bars 250]
+
+import argparse
+import time
+import tracemalloc
+
+from synthetic import START, make_closes, make_symbols
+from loader import load_module
+from Indicators import Ema, EmaBank, Rocp, RocpBank, Sma, SmaBank
+from AlgorithmImports import ExponentialMovingAverage, np, pd, timedelta
+
+PERIODS = {'ema': 25, 'sma': 50, 'rocp': 10}
+EMA_UNIVERSE = 'example-algos/moving-averages/EMA-with-universe-selection.py'
+
+
+def run_scalar(indicators, closes, times):
+    start = time.perf_counter()
+    values = np.empty_like(closes)
+    for t, (now, row) in enumerate(zip(times, closes.tolist())):
+        for i, (indicator, close) in enumerate(zip(indicators, row)):
+            indicator.Update(now, close)
+            values[t, i] = indicator.Current.Value
+    return time.perf_counter() - start, values
+
+
+def run_bank(bank, symbols, closes):
+    start = time.perf_counter()
+    rows = bank.Add(symbols)
+    values = np.empty_like(closes)
+    for t, row in enumerate(closes):
+        bank.Update(rows, row)
+        values[t] = bank.Values
+    return time.perf_counter() - start, values
+
+
+def allocated(build):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return size / len(objects)
+
+
+def check_selection_data(closes):
+    '''SelectionData and a 50/200 Sma pair fed the same warm-up prices and updates'''
+    module = load_module(EMA_UNIVERSE, "bench_indicators_ema_universe")
+    for column in closes.T[:20]:
+        selection = module.SelectionData(column[:150].tolist())
+        fast, slow = Sma(50, prices=column[:150]), Sma(200, prices=column[:150])
+        for t, close in enumerate(column[150:].tolist()):
+            selection.update(None, close)
+            fast.Update(None, close)
+            slow.Update(None, close)
+            if (selection.is_ready() != slow.IsReady or not np.isclose(selection.fast, fast.Current.Value, rtol=1e-12)
+                    or not np.isclose(selection.slow, slow.Current.Value, rtol=1e-12)):
+                raise SystemExit(f"Sma pair differs from SelectionData after {t} updates")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, nargs='+', default=[500, 5000])
+    parser.add_argument('--bars', type=int, default=250)
+    args = parser.parse_args()
+
+    print(f"bytes per EMA: ExponentialMovingAverage {allocated(lambda: [ExponentialMovingAverage(25) for _ in range(10000)]):.0f}, "
+          f"Ema {allocated(lambda: [Ema(25) for _ in range(10000)]):.0f}")
+    check_selection_data(make_closes(make_symbols(20), 400))
+    print(f"{'symbols':>8} {'indicator':>10} {'baseline ms/bar':>16} {'scalar ms/bar':>14} {'bank ms/bar':>12} {'speedup':>8}")
+    for count in args.symbols:
+        symbols = make_symbols(count)
+        closes = make_closes(symbols, args.bars)
+        times = [START + timedelta(days=t) for t in range(args.bars)]
+        frame = pd.DataFrame(closes)
+        cases = (
+            ('ema', lambda p: ExponentialMovingAverage(p), Ema, EmaBank, None),
+            ('sma', None, Sma, SmaBank, frame.rolling(PERIODS['sma'], min_periods=1).mean().to_numpy()),
+            ('rocp', None, Rocp, RocpBank, frame.pct_change(PERIODS['rocp']).to_numpy() * 100),
+        )
+        for name, baseline, scalar, bank, reference in cases:
+            period = PERIODS[name]
+            before = None
+            if baseline is not None:
+                before, expected = run_scalar([baseline(period) for _ in symbols], closes, times)
+            elapsed, values = run_scalar([scalar(period) for _ in symbols], closes, times)
+            vectorized, bankValues = run_bank(bank(period), symbols, closes)
+            if baseline is not None and not np.array_equal(values, expected):
+                raise SystemExit(f"{name}: values differ from ExponentialMovingAverage at {count} symbols")
+            if not np.array_equal(values, bankValues):
+                raise SystemExit(f"{name}: bank values differ from the scalar indicator at {count} symbols")
+            if reference is not None:
+                ready = slice(period if name == 'rocp' else 0, None)
+                if not np.allclose(values[ready], reference[ready], rtol=1e-9, atol=1e-9):
+                    raise SystemExit(f"{name}: values differ from the pandas reference at {count} symbols")
+            slowest = before if before is not None else elapsed
+            print(f"{count:>8} {name:>10} {(before or float('nan')) * 1e3 / args.bars:>16.3f} "
+                  f"{elapsed * 1e3 / args.bars:>14.3f} {vectorized * 1e3 / args.bars:>12.3f} {slowest / vectorized:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# Rebalance latency of MeanVariancePortfolioConstructionModel against a naive mean-variance
+# step that recomputes the covariance from the return window and inverts it every bar.
+# The model runs once refactoring every bar and once with its default Sherman-Morrison
+# updates of the cached inverse. Also checks the incremental covariance against np.cov
+# and the weights against the naive solution.
+#
+#   python benchmarks/bench_mean_variance.py [--assets 100 500] [--lookback 63] [--bars 40]
+
+import argparse
+import time
+
+from synthetic import START, make_closes, make_symbols
+from MeanVariancePortfolio import MeanVariancePortfolioConstructionModel
+from AlgorithmImports import (Insight, InsightDirection, QCAlgorithm, Security, SecurityChanges, np, pd,
+                              timedelta)
+
+
+def naive_weights(returns, directions, shrinkage, target=None):
+    covariance = np.cov(returns, rowvar=False)
+    if target is None:
+        target = np.trace(covariance) / len(covariance)
+    covariance = (1 - shrinkage) * covariance + shrinkage * target * np.eye(len(covariance))
+    raw = np.linalg.inv(covariance) @ directions
+    raw[np.sign(raw) != directions] = 0.0
+    return raw / np.abs(raw).sum()
+
+
+def make_algorithm(symbols, closes, lookback):
+    algorithm = QCAlgorithm()
+    times = pd.date_range(end=START - timedelta(days=1), periods=lookback + 1, freq='D')
+    history = pd.DataFrame({'close': closes[:lookback + 1].T.reshape(-1)},
+                           index=pd.MultiIndex.from_product([symbols, times], names=['symbol', 'time']))
+    algorithm.historyProvider = lambda symbols, periods, resolution: history
+    for symbol, price in zip(symbols, closes[lookback].tolist()):
+        algorithm.GetSecurity(symbol).Price = price
+    algorithm.Time = START
+    return algorithm
+
+
+def run(symbols, closes, directions, lookback, **kwargs):
+    '''Returns the mean CreateTargets latency and the last model'''
+    algorithm = make_algorithm(symbols, closes, lookback)
+    model = MeanVariancePortfolioConstructionModel(lookback, **kwargs)
+    model.OnSecuritiesChanged(algorithm, SecurityChanges([algorithm.Securities[s] for s in symbols]))
+    insights = [Insight.Price(s, timedelta(days=365), d) for s, d in zip(symbols, directions.tolist())]
+    for insight in insights:
+        insight.SetGeneratedTime(START)
+    model.CreateTargets(algorithm, insights)
+
+    elapsed = 0.0
+    for t in range(lookback + 1, len(closes)):
+        algorithm.Time = START + timedelta(days=t - lookback)
+        for symbol, price in zip(symbols, closes[t].tolist()):
+            algorithm.Securities[symbol].Price = price
+        start = time.perf_counter()
+        model.CreateTargets(algorithm, insights)
+        elapsed += time.perf_counter() - start
+    return elapsed / (len(closes) - lookback - 1), model
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--assets', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--lookback', type=int, default=63)
+    parser.add_argument('--bars', type=int, default=40)
+    args = parser.parse_args()
+
+    print(f"{'assets':>7} {'naive ms':>9} {'refactor ms':>12} {'speedup':>8} {'rank-1 ms':>10} {'speedup':>8}"
+          f" {'cov err':>9} {'weight err':>11}")
+    for count in args.assets:
+        symbols = make_symbols(count)
+        closes = make_closes(symbols, args.lookback + 1 + args.bars)
+        directions = np.where(np.random.default_rng(3).random(count) < 0.5, InsightDirection.Down, InsightDirection.Up).astype(float)
+        returns = closes[1:] / closes[:-1] - 1
+
+        start = time.perf_counter()
+        for t in range(args.lookback + 1, len(closes)):
+            window = returns[t - args.lookback:t]
+            expected = naive_weights(window, directions, 0.1)
+        naive = (time.perf_counter() - start) / args.bars
+
+        refactor, _ = run(symbols, closes, directions, args.lookback, refactorPeriod=1)
+        incremental, model = run(symbols, closes, directions, args.lookback, refactorPeriod=args.bars + 1)
+        expected = naive_weights(window, directions, 0.1, model.factorization.Target)
+
+        columns = [model.columnBySymbol[s] for s in symbols]
+        covariance = model.covariance.Covariance[np.ix_(columns, columns)]
+        covarianceError = np.abs(covariance - np.cov(returns[-args.lookback:], rowvar=False)).max()
+        weights = model.Weights(symbols, directions)
+        weightError = np.abs(weights - expected).max()
+        if weightError > 1e-6:
+            raise SystemExit(f"mean-variance weights differ from the naive solution at {count} assets: {weightError:.3g}")
+        print(f"{count:>7} {naive * 1e3:>9.3f} {refactor * 1e3:>12.3f} {naive / refactor:>7.1f}x"
+              f" {incremental * 1e3:>10.3f} {naive / incremental:>7.1f}x {covarianceError:>9.1e} {weightError:>11.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Rebalances an equal-weight portfolio of drifting random-walk prices every bar, once with the
+# liquidate-then-SetHoldings loop of OldSMAStrat and once with TargetWeightRebalancer, and
+# compares the orders, turnover, time per rebalance and how far the weights end from target.
+#
+#   python benchmarks/bench_rebalancer.py [--symbols 10 100] [--bars 250] [--tolerance 0.0 0.01]
+
+import argparse
+import time
+
+from synthetic import make_closes, make_symbols
+from Rebalancer import TargetWeightRebalancer
+from AlgorithmImports import QCAlgorithm, np
+
+
+class Counting(QCAlgorithm):
+    def __init__(self):
+        super().__init__()
+        self.orders = 0
+        self.turnover = 0.0
+
+    def OnOrderEvent(self, orderEvent):
+        self.orders += 1
+        self.turnover += abs(orderEvent.FillQuantity * orderEvent.FillPrice)
+
+
+def run(symbols, closes, rebalance):
+    algorithm = Counting()
+    algorithm.SetCash(1000000)
+    securities = [algorithm.GetSecurity(symbol) for symbol in symbols]
+    elapsed = 0.0
+    for row in closes.tolist():
+        for security, close in zip(securities, row):
+            security.Price = close
+        start = time.perf_counter()
+        rebalance(algorithm)
+        elapsed += time.perf_counter() - start
+    value = algorithm.Portfolio.TotalPortfolioValue
+    weights = np.array([x.Holdings.Quantity * x.Price / value for x in securities])
+    return algorithm, elapsed / len(closes), float(np.abs(weights - 1 / len(symbols)).max())
+
+
+def liquidate_and_rebuy(symbols):
+    def rebalance(algorithm):
+        for symbol in symbols:
+            algorithm.Liquidate(symbol)
+            algorithm.SetHoldings(symbol, 1 / len(symbols))
+    return rebalance
+
+
+def diff(symbols, tolerance):
+    rebalancer = None
+    def rebalance(algorithm):
+        nonlocal rebalancer
+        if rebalancer is None:
+            rebalancer = TargetWeightRebalancer(algorithm, tolerance=tolerance)
+        rebalancer.Rebalance({symbol: 1 / len(symbols) for symbol in symbols})
+    return rebalance
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--bars', type=int, default=250)
+    parser.add_argument('--tolerance', type=float, nargs='+', default=[0.0, 0.005, 0.01])
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'method':>22} {'orders':>8} {'turnover':>14} {'ms/rebalance':>13} {'max weight error':>17}")
+    for count in args.symbols:
+        symbols = make_symbols(count)
+        closes = make_closes(symbols, args.bars)
+        cases = [('liquidate + rebuy', liquidate_and_rebuy(symbols))]
+        cases += [(f"diff, tolerance {tolerance:g}", diff(symbols, tolerance)) for tolerance in args.tolerance]
+        for name, rebalance in cases:
+            algorithm, elapsed, error = run(symbols, closes, rebalance)
+            print(f"{count:>8} {name:>22} {algorithm.orders:>8} {algorithm.turnover:>14,.0f} {elapsed * 1e3:>13.3f} "
+                  f"{error:>17.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+# Checks the rolling moments of StdDevExecutionModel against pandas rolling mean/std on
+# synthetic minute bars with missing bars, after a single batched warm-up, and times one
+# bar of Execute against recomputing each symbol's deviation from its window every bar.
+#
+#   python benchmarks/bench_std_dev_execution.py [--symbols 100 500 2000] [--period 60] [--bars 300]
+
+import argparse
+import time
+from collections import deque
+
+from synthetic import START, make_symbols
+from StdDevExecution import StdDevExecutionModel
+from AlgorithmImports import (PortfolioTarget, QCAlgorithm, Resolution, SecurityChanges, Slice, TradeBar, np, pd,
+                              timedelta)
+
+
+def make_closes(count, bars, seed=23):
+    '''(bars x count) minute closes with ~20% of the bars missing (NaN)'''
+    rng = np.random.default_rng(seed)
+    closes = 50.0 * np.exp(np.cumsum(rng.normal(0, 0.001, (bars, count)), axis=0))
+    closes[rng.random(closes.shape) < 0.2] = np.nan
+    return closes
+
+
+def new_algorithm(symbols, closes, period, model):
+    '''Algorithm whose history holds the first `period` rows of closes; adds every symbol'''
+    algorithm = QCAlgorithm()
+    times = pd.date_range(START, periods=period, freq='min')
+    frame = pd.DataFrame(closes[:period], index=times, columns=symbols).stack()
+    history = pd.DataFrame({'close': frame.values},
+                           index=pd.MultiIndex.from_arrays([frame.index.get_level_values(1), frame.index.get_level_values(0)],
+                                                           names=['symbol', 'time']))
+    calls = []
+    algorithm.historyProvider = lambda symbols, periods, resolution: calls.append(len(symbols)) or history
+    model.OnSecuritiesChanged(algorithm, SecurityChanges([algorithm.GetSecurity(s) for s in symbols]))
+    return algorithm, calls
+
+
+def step(algorithm, model, symbols, now, closes, targets):
+    present = np.flatnonzero(~np.isnan(closes)).tolist()
+    bars = {symbols[i]: TradeBar(now, symbols[i], closes[i], closes[i], closes[i], closes[i], 1e4) for i in present}
+    algorithm.Time = now
+    algorithm.CurrentSlice = Slice(now, bars)
+    for symbol, bar in bars.items():
+        algorithm.Securities[symbol].SetMarketPrice(bar)
+    model.Execute(algorithm, targets)
+
+
+def check(count, period, bars):
+    symbols = make_symbols(count)
+    closes = make_closes(count, period + bars)
+    model = StdDevExecutionModel(period, resolution=Resolution.Minute)
+    algorithm, calls = new_algorithm(symbols, closes, period, model)
+
+    # Reference: each symbol's own bars, rolling over the last `period` of them
+    frame = pd.DataFrame(closes, columns=range(count))
+    mean = {c: frame[c].dropna().rolling(period, min_periods=1).mean() for c in frame}
+    std = {c: frame[c].dropna().rolling(period, min_periods=1).std(ddof=0) for c in frame}
+
+    rows = np.array([model.moments.rowBySymbol[s] for s in symbols])
+    error = 0.0
+    for t in range(period, period + bars):
+        step(algorithm, model, symbols, START + timedelta(minutes=t), closes[t], [])
+        expectedMean = np.array([mean[c].loc[:t].iloc[-1] if len(mean[c].loc[:t]) else np.nan for c in range(count)])
+        expectedStd = np.array([std[c].loc[:t].iloc[-1] if len(std[c].loc[:t]) else np.nan for c in range(count)])
+        error = max(error,
+                    np.nanmax(np.abs(model.moments.Mean(rows) - expectedMean) / expectedMean),
+                    np.nanmax(np.abs(model.moments.StandardDeviation(rows) - expectedStd)) / np.nanmean(expectedStd))
+    return error, calls
+
+
+def naive_step(windows, closes, deviations, targets):
+    '''Per symbol: append the close and recompute mean and std of the window'''
+    orders = 0
+    for i, close in enumerate(closes.tolist()):
+        if close != close:
+            continue
+        window = windows[i]
+        window.append(close)
+        values = np.array(window)
+        mean, std = values.mean(), values.std()
+        if targets[i] > 0 and close < mean - deviations * std:
+            orders += 1
+    return orders
+
+
+def timed(count, period, bars=50):
+    symbols = make_symbols(count)
+    closes = make_closes(count, period + bars)
+    model = StdDevExecutionModel(period, resolution=Resolution.Minute, maximumOrderValue=1e-6)
+    algorithm, _ = new_algorithm(symbols, closes, period, model)
+    targets = [PortfolioTarget(s, 10 ** 9) for s in symbols]  # never completes, every symbol stays pending
+    step(algorithm, model, symbols, START + timedelta(minutes=period), closes[period], targets)
+
+    start = time.perf_counter()
+    for t in range(period + 1, period + bars):
+        step(algorithm, model, symbols, START + timedelta(minutes=t), closes[t], [])
+    vectorized = (time.perf_counter() - start) / (bars - 1)
+
+    windows = [deque(column[~np.isnan(column)].tolist(), maxlen=period) for column in closes[:period].T]
+    quantities = [10 ** 9] * count
+    start = time.perf_counter()
+    for t in range(period + 1, period + bars):
+        naive_step(windows, closes[t], 2, quantities)
+    naive = (time.perf_counter() - start) / (bars - 1)
+    return naive, vectorized
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, nargs='+', default=[100, 500, 2000])
+    parser.add_argument('--period', type=int, default=60)
+    parser.add_argument('--bars', type=int, default=300)
+    args = parser.parse_args()
+
+    error, calls = check(40, args.period, args.bars)
+    if error > 1e-9:
+        raise SystemExit(f"rolling moments differ from pandas: {error:.3g}")
+    print(f"reference check: 40 symbols, period {args.period}, {args.bars} bars, max relative error {error:.1e}, "
+          f"warm-up history requests: {len(calls)} for {sum(calls)} symbols")
+
+    print(f"{'symbols':>8} {'window ms/bar':>14} {'welford ms/bar':>15} {'speedup':>8}")
+    for count in args.symbols:
+        naive, vectorized = timed(count, args.period)
+        print(f"{count:>8} {naive * 1e3:>14.3f} {vectorized * 1e3:>15.3f} {naive / vectorized:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
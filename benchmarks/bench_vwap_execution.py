@@ -0,0 +1,128 @@
+# Checks VwapExecutionModel against a reference VWAP computed with pandas on synthetic
+# minute bars (two sessions, randomly missing bars), checks every child order it places
+# is favourable and within the volume limit, and times one bar of Execute as the
+# universe grows.
+#
+#   python benchmarks/bench_vwap_execution.py [--symbols 100 500 2000] [--minutes 390]
+
+import argparse
+import time
+
+from synthetic import START, make_symbols
+from VwapExecution import VwapExecutionModel
+from AlgorithmImports import (PortfolioTarget, QCAlgorithm, SecurityChanges, Slice, TradeBar, np, pd,
+                              timedelta)
+
+
+def make_minute_bars(symbols, minutes, sessions=2, seed=17):
+    '''(time, {symbol: TradeBar}) for `minutes` bars per session; ~20% of bars are missing'''
+    rng = np.random.default_rng(seed)
+    count = len(symbols)
+    close = 50.0 * np.exp(np.cumsum(rng.normal(0, 0.001, (sessions * minutes, count)), axis=0))
+    spread = close * rng.uniform(0, 0.002, close.shape)
+    volume = np.round(np.exp(rng.normal(8, 1, close.shape)))
+    present = rng.random(close.shape) > 0.2
+    steps = []
+    for session in range(sessions):
+        open_ = START.replace(hour=9, minute=31) + timedelta(days=session)
+        for minute in range(minutes):
+            t = session * minutes + minute
+            now = open_ + timedelta(minutes=minute)
+            steps.append((now, {s: TradeBar(now, s, close[t, i], close[t, i] + spread[t, i], close[t, i] - spread[t, i],
+                                            close[t, i], volume[t, i])
+                                for i, s in enumerate(symbols) if present[t, i]}))
+    return steps
+
+
+def reference_vwap(steps):
+    '''Session VWAP of every symbol after every bar, from a plain pandas cumulative sum'''
+    frame = pd.DataFrame([(now, now.date(), s, (b.High + b.Low + b.Close) / 3, b.Volume)
+                          for now, bars in steps for s, b in bars.items()],
+                         columns=['time', 'session', 'symbol', 'price', 'volume'])
+    frame['pv'] = frame.price * frame.volume
+    grouped = frame.groupby(['session', 'symbol'])
+    frame['vwap'] = grouped.pv.cumsum() / grouped.volume.cumsum()
+    return frame.pivot(index='time', columns='symbol', values='vwap')
+
+
+def new_algorithm(symbols, model):
+    algorithm = QCAlgorithm()
+    model.OnSecuritiesChanged(algorithm, SecurityChanges([algorithm.GetSecurity(s) for s in symbols]))
+    return algorithm
+
+
+def step(algorithm, model, now, bars, targets):
+    algorithm.Time = now
+    algorithm.CurrentSlice = Slice(now, bars)
+    for symbol, bar in bars.items():
+        algorithm.Securities[symbol].SetMarketPrice(bar)
+    model.Execute(algorithm, targets)
+
+
+def check(symbols, minutes):
+    steps = make_minute_bars(symbols, minutes)
+    expected = reference_vwap(steps)
+    model = VwapExecutionModel()
+    algorithm = new_algorithm(symbols, model)
+
+    orders = []
+    algorithm.OnOrderEvent = orders.append
+    targets = [PortfolioTarget(s, 2000 if i % 2 == 0 else -2000) for i, s in enumerate(symbols)]
+    rows = np.array([model.vwap.rowBySymbol[s] for s in symbols])
+
+    error = 0.0
+    for t, (now, bars) in enumerate(steps):
+        before = len(orders)
+        step(algorithm, model, now, bars, targets if t == 0 else [])
+
+        actual = model.vwap.Vwap(rows)
+        # Symbols without a bar this minute keep their session VWAP so far
+        session = expected.loc[(expected.index.date == now.date()) & (expected.index <= pd.Timestamp(now))]
+        reference = session.ffill().iloc[-1].reindex(symbols).to_numpy()
+        if not np.array_equal(np.isnan(actual), np.isnan(reference)):
+            raise SystemExit(f"VWAP availability differs from the reference at {now}")
+        error = max(error, np.nanmax(np.abs(actual - reference) / reference, initial=0.0))
+
+        for event in orders[before:]:
+            security = algorithm.Securities[event.Symbol]
+            vwap = model.vwap.Vwap(np.array([model.vwap.rowBySymbol[event.Symbol]]))[0]
+            if (event.FillQuantity > 0 and security.Price > vwap) or (event.FillQuantity < 0 and security.Price < vwap):
+                raise SystemExit(f"unfavourable child order {event.Symbol} {event.FillQuantity} @ {security.Price} vs VWAP {vwap}")
+            if abs(event.FillQuantity) > 0.01 * security.Volume:
+                raise SystemExit(f"child order {event.Symbol} {event.FillQuantity} exceeds 1% of volume {security.Volume}")
+    filled = sum(1 for s, target in zip(symbols, targets) if algorithm.Portfolio[s].Quantity == target.Quantity)
+    return error, len(orders), filled
+
+
+def timed(symbols, bars=50):
+    steps = make_minute_bars(symbols, bars, sessions=1)
+    model = VwapExecutionModel(maximumOrderQuantityPercentVolume=1e-4)
+    algorithm = new_algorithm(symbols, model)
+    targets = [PortfolioTarget(s, 10 ** 9) for s in symbols]  # never completes, every symbol stays pending
+    step(algorithm, model, *steps[0], targets)
+    elapsed = 0.0
+    for now, bars in steps[1:]:
+        start = time.perf_counter()
+        step(algorithm, model, now, bars, [])
+        elapsed += time.perf_counter() - start
+    return elapsed / (len(steps) - 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, nargs='+', default=[100, 500, 2000])
+    parser.add_argument('--minutes', type=int, default=390)
+    args = parser.parse_args()
+
+    error, orders, filled = check(make_symbols(50), args.minutes)
+    print(f"reference check: 50 symbols x 2 sessions x {args.minutes} minutes, max relative VWAP error {error:.1e}, "
+          f"{orders} favourable child orders, {filled}/50 targets filled")
+
+    print(f"{'symbols':>8} {'ms/bar':>8} {'us/symbol':>10}")
+    for count in args.symbols:
+        seconds = timed(make_symbols(count))
+        print(f"{count:>8} {seconds * 1e3:>8.3f} {seconds / count * 1e6:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+# Micro-benchmark suite for the alpha models and universe selection functions.
+#
+# Every case runs against synthetic inputs through the local LEAN stand-ins, records
+# the median wall time and the peak traced allocation of one call, and is compared
+# with a JSON baseline. A case regresses when either figure exceeds its baseline by
+# more than --threshold (default 25%); any regression, a case missing from the baseline
+# or a missing baseline file makes the run exit non-zero.
+#
+#   python benchmarks/suite.py --save-baseline     # record benchmarks/baseline.json
+#   python benchmarks/suite.py                     # compare against it
+#   python benchmarks/suite.py -k ema_cross        # only cases whose name contains ema_cross
+#
+# Timings are machine specific: record the baseline on the machine that runs the checks.
+
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+import tracemalloc
+
+from synthetic import (START, make_coarse, make_fine, make_history, make_securities, make_slices, make_symbols)
+from loader import load_module
+from AlgorithmImports import QCAlgorithm, Security, SecurityChanges, datetime, timedelta
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+EMA_CROSS_ALPHA = 'library/EmaCrossAlpha.py'
+FACTOR_ALPHA = 'example-algos/qc-framework/AlphaModel.py'
+ALGORITHMS = {
+    'qc_framework': 'example-algos/qc-framework/main.py',
+    'immediate_execution': 'strategies/ema-cross/equal-weighted-portfolio/immediate-execution/main.py',
+    'old_sma': 'example-algos/moving-averages/OldSMAStrat.py',
+    'ema_universe': 'example-algos/moving-averages/EMA-with-universe-selection.py',
+}
+
+CASES = {}
+
+
+def case(name):
+    '''Registers a setup function returning the zero-argument callable to measure'''
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def algorithm(key, time=START):
+    module = load_module(ALGORITHMS[key], f"bench_{key}")
+    instance = next(v for v in vars(module).values()
+                    if isinstance(v, type) and issubclass(v, QCAlgorithm) and v.__module__ == module.__name__)()
+    instance.Initialize()
+    instance.Time = time
+    return instance
+
+
+# EmaCrossAlphaModel
+
+def ema_cross_update(count, vectorized):
+    module = load_module(EMA_CROSS_ALPHA)
+    symbols = make_symbols(count)
+    slices = make_slices(symbols, 60)
+    host = QCAlgorithm()
+    model = module.EmaCrossAlphaModel(vectorized=vectorized)
+    model.OnSecuritiesChanged(host, SecurityChanges([Security(s) for s in symbols]))
+    for data in slices[:30]:
+        host.UpdateRegisteredIndicators(data)
+        model.Update(host, data)
+    remaining = iter(slices[30:] * 1000)
+
+    def run():
+        data = next(remaining)
+        host.UpdateRegisteredIndicators(data)
+        model.Update(host, data)
+    return run
+
+
+def ema_cross_securities_changed(count, vectorized):
+    module = load_module(EMA_CROSS_ALPHA)
+    symbols = make_symbols(count)
+    history = make_history(symbols, 25)
+    changes = SecurityChanges([Security(s) for s in symbols])
+
+    def run():
+        host = QCAlgorithm()
+        host.historyProvider = lambda symbols, periods, resolution: history
+        module.EmaCrossAlphaModel(vectorized=vectorized).OnSecuritiesChanged(host, changes)
+    return run
+
+
+for _count in (500, 5000):
+    for _mode, _vectorized in (('per_symbol', False), ('vectorized', True)):
+        case(f"ema_cross.update.{_mode}.{_count}")(
+            lambda count=_count, vectorized=_vectorized: ema_cross_update(count, vectorized))
+        case(f"ema_cross.on_securities_changed.{_mode}.{_count}")(
+            lambda count=_count, vectorized=_vectorized: ema_cross_securities_changed(count, vectorized))
+
+
+# FundamentalFactorAlphaModel
+
+@case("fundamental_factor.update.500")
+def fundamental_factor_update():
+    module = load_module(FACTOR_ALPHA)
+    securities = make_securities(make_fine(make_symbols(500)))
+    model = module.FundamentalFactorAlphaModel()
+    model.OnSecuritiesChanged(None, SecurityChanges(securities))
+    host = QCAlgorithm()
+    host.Time = START
+
+    def run():
+        model.rebalanceTime = datetime.min
+        model.Update(host, None)
+    return run
+
+
+# Universe selection
+
+@case("qc_framework.coarse.8000")
+def qc_framework_coarse():
+    host = algorithm('qc_framework', datetime(2020, 4, 1))
+    coarse = make_coarse(8000)
+
+    return lambda: host.CoarseSelectionFunction(coarse)
+
+
+@case("qc_framework.fine.500")
+def qc_framework_fine():
+    host = algorithm('qc_framework')
+    fine = make_fine(make_symbols(500))
+    return lambda: host.FineSelectionFunction(fine)
+
+
+@case("immediate_execution.coarse.8000")
+def immediate_execution_coarse():
+    host = algorithm('immediate_execution', datetime(2015, 1, 5))
+    coarse = make_coarse(8000)
+    return lambda: host.CoarseSelectionFunction(coarse)
+
+
+@case("immediate_execution.fine.500")
+def immediate_execution_fine():
+    host = algorithm('immediate_execution')
+    fine = make_fine(make_symbols(500))
+    random.seed(0)
+    return lambda: host.FineSelectionFunction(fine)
+
+
+@case("old_sma.coarse.8000")
+def old_sma_coarse():
+    host = algorithm('old_sma')
+    coarse = make_coarse(8000)
+    return lambda: host.CoarseSelectionFunction(coarse)
+
+
+@case("ema_universe.coarse.8000")
+def ema_universe_coarse():
+    host = algorithm('ema_universe')
+    coarse = make_coarse(8000)
+    history = make_history(make_symbols(1), 200)
+    host.historyProvider = lambda symbol, periods, resolution: history
+    host.CoarseSelectionFunction(coarse)  # steady state: every selected symbol already warm
+
+    def run():
+        host.Time += timedelta(days=1)
+        host.CoarseSelectionFunction(coarse)
+    return run
+
+
+@case("ema_universe.selection_data_warmup.100")
+def selection_data_warmup():
+    module = load_module(ALGORITHMS['ema_universe'], "bench_ema_universe")
+    prices = [make_history(make_symbols(1), 200, seed=i)['close'].tolist() for i in range(100)]
+    return lambda: [module.SelectionData(p) for p in prices]
+
+
+# Runner
+
+def measure(run, repeat):
+    run()  # warm caches and lazy imports
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    run()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return {'seconds': statistics.median(times), 'peak_bytes': peak}
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            regressions.append(f"{name}: no baseline entry; run with --save-baseline to record it")
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            limit = expected[metric] * (1 + threshold)
+            # Ignore noise on tiny allocations
+            if result[metric] > limit and not (metric == 'peak_bytes' and result[metric] < 4096):
+                regressions.append(f"{name}: {metric} {result[metric]:.6g} > {expected[metric]:.6g} (+{threshold:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-k', dest='filter', default='', help='only run cases whose name contains this')
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--threshold', type=float, default=0.25)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':<48} {'median ms':>10} {'peak KiB':>10}")
+    for name, setup in CASES.items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(setup(), args.repeat)
+        print(f"{name:<48} {results[name]['seconds'] * 1e3:>10.3f} {results[name]['peak_bytes'] / 1024:>10.1f}")
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        raise SystemExit(f"no baseline at {args.baseline}; run with --save-baseline first")
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    if regressions:
+        print('\nregressions:')
+        print('\n'.join(regressions))
+        raise SystemExit(1)
+    print('\nno regressions')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# Synthetic but realistically shaped inputs shared by the benchmarks: coarse feeds,
+# fine fundamentals, daily bar slices and (symbol, time) indexed history frames.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'offline'))
+
+import loader  # noqa: F401  (puts library/ and the LEAN stand-ins on sys.path)
+from AlgorithmImports import (CoarseFundamental, FineFundamental, MorningstarSectorCode, Security, Slice, Symbol,
+                              TradeBar, datetime, np, pd, timedelta)
+
+SECTORS = [v for k, v in vars(MorningstarSectorCode).items() if not k.startswith('_')]
+START = datetime(2015, 1, 5)
+
+
+def make_symbols(count, prefix='SYM'):
+    return [Symbol(f"{prefix}{i}") for i in range(count)]
+
+
+def make_coarse(rows, seed=11):
+    rng = np.random.default_rng(seed)
+    prices = np.round(np.exp(rng.normal(3.0, 1.2, rows)), 2)
+    volumes = np.round(np.exp(rng.normal(12.0, 2.0, rows)), -2)
+    fundamentals = rng.random(rows) < 0.6
+    return [CoarseFundamental(Symbol(f"SYM{i}"), p, v, f)
+            for i, (p, v, f) in enumerate(zip(prices.tolist(), volumes.tolist(), fundamentals.tolist()))]
+
+
+def make_fine(symbols, seed=13):
+    rng = np.random.default_rng(seed)
+    count = len(symbols)
+    ipo_days = rng.integers(0, 365 * 20, count).tolist()
+    return [FineFundamental(symbol, float(cap), int(sector), START - timedelta(days=ipo), float(roe), float(margin), float(pe))
+            for symbol, cap, sector, ipo, roe, margin, pe in zip(
+                symbols, np.exp(rng.normal(21.0, 1.5, count)), rng.choice(SECTORS, count), ipo_days,
+                rng.normal(0.08, 0.15, count), rng.normal(0.06, 0.12, count),
+                rng.lognormal(2.8, 0.6, count) * rng.choice([1, 1, 1, -1], count))]
+
+
+def make_securities(fine):
+    return [Security(x.Symbol, x) for x in fine]
+
+
+def make_closes(symbols, bars, seed=7):
+    rng = np.random.default_rng(seed)
+    return 50.0 * np.exp(np.cumsum(rng.normal(0.0, 0.02, size=(bars, len(symbols))), axis=0))
+
+
+def make_slices(symbols, bars, seed=7, start=START):
+    closes = make_closes(symbols, bars, seed)
+    slices = []
+    for t in range(bars):
+        now = start + timedelta(days=t)
+        slices.append(Slice(now, {s: TradeBar(now, s, c, c, c, c, 1e6, timedelta(days=1))
+                                  for s, c in zip(symbols, closes[t].tolist())}))
+    return slices
+
+
+def make_history(symbols, bars, seed=5, end=START):
+    '''(symbol, time) indexed close history like QCAlgorithm.History returns'''
+    closes = make_closes(symbols, bars, seed)
+    times = pd.date_range(end=end - timedelta(days=1), periods=bars, freq='D')
+    index = pd.MultiIndex.from_product([symbols, times], names=['symbol', 'time'])
+    return pd.DataFrame({'close': closes.T.reshape(-1)}, index=index)
@@ -7,6 +7,9 @@ class MyAlgorithm(QCAlgorithm):
         self.SetEndDate(2017, 1, 1)
         self.SetCash(100000)
         
+        # Sidecar written by score_tweets.py; without it tweets are fetched and scored remotely
+        MuskTweet.localFile = self.GetParameter("musk-tweets-sidecar")
+        
         self.tsla = self.AddEquity("TSLA", Resolution.Minute).Symbol
         self.musk = self.AddData(MuskTweet, "MUSKTWTS", Resolution.Minute).Symbol
         
@@ -33,9 +36,12 @@ class MyAlgorithm(QCAlgorithm):
 
 class MuskTweet(PythonData):
 
-    sia = SentimentIntensityAnalyzer()
+    sia = None
+    localFile = None
 
     def GetSource(self, config, date, isLive):
+        if MuskTweet.localFile:
+            return SubscriptionDataSource(MuskTweet.localFile, SubscriptionTransportMedium.LocalFile)
         source = "https://www.dropbox.com/s/ovnsrgg1fou1y0r/MuskTweetsPreProcessed.csv?dl=1"
         return SubscriptionDataSource(source, SubscriptionTransportMedium.RemoteFile);
 
@@ -43,6 +49,12 @@ class MuskTweet(PythonData):
         if not (line.strip() and line[0].isdigit()):
             return None
         
+        if MuskTweet.localFile:
+            return self.ReadScored(config, line)
+        
+        if MuskTweet.sia is None:
+            MuskTweet.sia = SentimentIntensityAnalyzer()
+        
         data = line.split(',')
         tweet = MuskTweet()
         
@@ -62,3 +74,18 @@ class MuskTweet(PythonData):
             return None
         
         return tweet
+    
+    def ReadScored(self, config, line):
+        # time,score,tweet with the time already shifted and the score precomputed
+        data = line.split(',', 2)
+        tweet = MuskTweet()
+        
+        try:
+            tweet.Symbol = config.Symbol
+            tweet.Time = datetime.fromisoformat(data[0])
+            tweet.Value = float(data[1])
+            tweet["Tweet"] = data[2]
+        except (ValueError, IndexError):
+            return None
+        
+        return tweet
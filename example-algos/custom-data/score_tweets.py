@@ -0,0 +1,104 @@
+# Scores the Musk tweet file once, ahead of the backtest, and writes the compact local
+# sidecar that MuskTweet reads in local-file mode:
+#
+#   time,score,tweet          (time already shifted by the one minute Reader adds)
+#
+# Compound scores are cached by content hash next to the sidecar, so a rerun on an
+# updated tweet file only scores the new tweets. Scoring runs on a process pool.
+#
+#   python score_tweets.py https://www.dropbox.com/s/ovnsrgg1fou1y0r/MuskTweetsPreProcessed.csv?dl=1 \
+#       MuskTweetsScored.csv [--workers 8]
+
+import argparse
+import csv
+import hashlib
+import os
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+_sia = None
+
+
+def _init_worker():
+    global _sia
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    _sia = SentimentIntensityAnalyzer()
+
+
+def _score(contents):
+    return [_sia.polarity_scores(content)["compound"] for content in contents]
+
+
+def read_lines(source):
+    if source.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(source) as response:
+            return response.read().decode('utf-8', errors='replace').splitlines()
+    with open(source, encoding='utf-8', errors='replace') as f:
+        return f.read().splitlines()
+
+
+def parse(lines):
+    '''Yields (time, content) exactly as MuskTweet.Reader parses each line'''
+    for line in lines:
+        if not (line.strip() and line[0].isdigit()):
+            continue
+        data = line.split(',')
+        try:
+            time = datetime.strptime(data[0], '%Y-%m-%d %H:%M:%S') + timedelta(minutes=1)
+        except ValueError:
+            continue
+        if len(data) > 1:
+            yield time, data[1].lower()
+
+
+def content_hash(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def load_cache(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline='') as f:
+        return {key: float(score) for key, score in csv.reader(f)}
+
+
+def score_file(source, sidecar, workers=None, chunk_size=500):
+    tweets = list(parse(read_lines(source)))
+    cache_path = sidecar + '.scores'
+    cache = load_cache(cache_path)
+
+    # Only tweets mentioning Tesla are scored, the rest score 0 like in Reader
+    relevant = {}
+    for _, content in tweets:
+        if "tsla" in content or "tesla" in content:
+            relevant.setdefault(content_hash(content), content)
+    missing = [key for key in relevant if key not in cache]
+
+    if missing:
+        chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for keys, scores in zip(chunks, pool.map(_score, [[relevant[k] for k in chunk] for chunk in chunks])):
+                cache.update(zip(keys, scores))
+        with open(cache_path, 'w', newline='') as f:
+            csv.writer(f).writerows(cache.items())
+
+    with open(sidecar, 'w', newline='') as f:
+        for time, content in tweets:
+            score = cache.get(content_hash(content), 0.0) if ("tsla" in content or "tesla" in content) else 0.0
+            f.write(f"{time:%Y-%m-%d %H:%M:%S},{score},{content}\n")
+    return len(tweets), len(missing)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('source', help='tweet CSV path or URL')
+    parser.add_argument('sidecar', help='output file read by MuskTweet in local-file mode')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    tweets, scored = score_file(args.source, args.sidecar, args.workers)
+    print(f"{tweets} tweets written to {args.sidecar}, {scored} newly scored")
+
+
+if __name__ == '__main__':
+    main()
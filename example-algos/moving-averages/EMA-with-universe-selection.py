@@ -1,3 +1,9 @@
+from CoarseSelection import *
+from Instrumentation import *
+from Rebalancer import *
+from Indicators import *
+import json
+
 class EMAMomentumUniverse(QCAlgorithm):
     
     def Initialize(self):
@@ -5,26 +11,45 @@ class EMAMomentumUniverse(QCAlgorithm):
         self.SetEndDate(2021, 1, 7)
         self.SetCash(100000)
         self.UniverseSettings.Resolution = Resolution.Daily
-        self.AddUniverse(self.CoarseSelectionFunction) 
+        
+        # Callback timers, counters and leveled logging (log-level parameter), summarised weekly
+        self.instrumentation = Instrumentation(self)
+        self.AddUniverse(self.instrumentation.Timed("CoarseSelectionFunction", self.CoarseSelectionFunction)) 
         self.averages = {}
+        self.coarseSelection = TopDollarVolumeSelection(100)
         self._changes = None
+        
+        # Drop the averages, and the cached warm-up prices, of symbols that have been out of the
+        # top 100 for this many days
+        self.evictAfterDays = 30
+        
+        # Warm-up windows persisted across backtests and restarts
+        self.warmStateCache = WarmStateCache(self.ObjectStore, "ema-momentum-universe/warm-state", self.evictAfterDays)
+        
+        # Universe changes are traded as one batch of orders, exits first
+        self.rebalancer = TargetWeightRebalancer(self)
     
     # "First Pass" filtering on highest DollarVolume and whether security has FundamentalData available
     # Narrows the universe down to 10 securities which have 50 day moving averages greater than 200 day
     def CoarseSelectionFunction(self, universe):  
         selected = []
-        universe = sorted(universe, key=lambda c: c.DollarVolume, reverse=True)  
-        universe = [ x for x in universe if x.HasFundamentalData ][:100]
+        universe = self.coarseSelection.Select(universe)
 
         for coarse in universe:  
             symbol = coarse.Symbol
             
             if symbol not in self.averages:
-                # Call history to get an array of 200 days of history data
-                history = self.History(symbol, 200, Resolution.Daily)
+                prices = self.warmStateCache.Get(symbol, self.Time)
+                if prices is None:
+                    # Call history to get an array of 200 days of history data
+                    history = self.History(symbol, 200, Resolution.Daily)
+                    prices = history.close.tolist() if 'close' in history else []
+                    self.warmStateCache.Set(symbol, self.Time, prices)
                 
                 # Add security to dict as SelectionData obj
-                self.averages[symbol] = SelectionData(history) 
+                self.averages[symbol] = SelectionData(prices)
+            
+            self.averages[symbol].lastSeen = self.Time
 
             # Update the indicator with Adjusted Price (account for splits and dividends)
             self.averages[symbol].update(self.Time, coarse.AdjustedPrice)
@@ -33,37 +58,107 @@ class EMAMomentumUniverse(QCAlgorithm):
             if self.averages[symbol].is_ready() and self.averages[symbol].fast > self.averages[symbol].slow:
                 selected.append(symbol)
         
+        self.warmStateCache.Touch([coarse.Symbol for coarse in universe], self.Time)
+        self.EvictStaleAverages()
         return selected[:10]
+    
+    def EvictStaleAverages(self):
+        cutoff = self.Time - timedelta(days=self.evictAfterDays)
+        stale = [symbol for symbol, averages in self.averages.items() if averages.lastSeen < cutoff]
+        for symbol in stale:
+            del self.averages[symbol]
+        if stale:
+            self.warmStateCache.Prune(self.Time)
+    
+    def OnEndOfAlgorithm(self):
+        self.Log(self.rebalancer.Summary())
+        self.warmStateCache.Save(self.Time)
+        self.instrumentation.Flush(force=True)
         
     # This event fires whenever we have changes to our universe
     def OnSecuritiesChanged(self, changes):
         self._changes = changes
-        self.Log(f"OnSecuritiesChanged({self.UtcTime}):: {changes}")
-        for security in changes.RemovedSecurities:
-            self.Liquidate(security.Symbol)
-       
-        for security in changes.AddedSecurities:
-            self.SetHoldings(security.Symbol, 0.10)
+        self.instrumentation.Info("OnSecuritiesChanged(%s):: %s", self.UtcTime, changes)
+        targets = {security.Symbol: 0.0 for security in changes.RemovedSecurities}
+        targets.update({security.Symbol: 0.10 for security in changes.AddedSecurities})
+        self.rebalancer.Rebalance(targets, liquidateOthers=False)
             
     # This even fires whenever an order is placed
     def OnOrderEvent(self, fill):
-        self.Log(f"OnOrderEvent({self.UtcTime}):: {fill}") 
+        self.instrumentation.Count("order events")
+        self.instrumentation.Debug("OnOrderEvent(%s):: %s", self.UtcTime, fill, key=fill.Symbol)
             
 class SelectionData():
-    def __init__(self, history):
-        self.slow = SimpleMovingAverage(200)
-        self.fast = SimpleMovingAverage(50)
-        
-        # Loop over the history data and update the indicators
-        for bar in history.itertuples():
-            self.fast.Update(bar.Index[1], bar.close)
-            self.slow.Update(bar.Index[1], bar.close)
+    '''50 and 200 day simple moving averages (Sma of the Indicators library), warmed up from
+    the most recent history prices'''
+    __slots__ = ('fastSma', 'slowSma', 'lastSeen')
+    
+    def __init__(self, prices = (), fastPeriod = 50, slowPeriod = 200):
+        prices = list(prices)
+        self.fastSma = Sma(fastPeriod, prices=prices)
+        self.slowSma = Sma(slowPeriod, prices=prices)
+        self.lastSeen = None
+    
+    @property
+    def fast(self):
+        return self.fastSma.Current.Value
+    
+    @property
+    def slow(self):
+        return self.slowSma.Current.Value
     
     def is_ready(self):
-        return self.slow.IsReady and self.fast.IsReady
+        return self.slowSma.IsReady
     
     def update(self, time, price):
-        self.fast.Update(time, price)
-        self.slow.Update(time, price)
-  
+        self.fastSma.Update(time, price)
+        self.slowSma.Update(time, price)
 
+
+class WarmStateCache():
+    '''Warm-up prices of SelectionData keyed by symbol and date, stored in the ObjectStore so
+    repeated backtests and restarts skip the 200 bar history request and replay. The entries of
+    a symbol that has been out of the universe for evictAfterDays are pruned on Save, so the
+    stored payload follows the recent universe instead of every symbol ever selected.'''
+    def __init__(self, objectStore, key, evictAfterDays = 30):
+        self.objectStore = objectStore
+        self.key = key
+        self.evictAfterDays = evictAfterDays
+        self.dirty = False
+        payload = json.loads(objectStore.Read(key)) if objectStore.ContainsKey(key) else {}
+        # Warm-up prices by symbol then date, and the last date each symbol was in the universe
+        self.entries = payload.get('entries', {})
+        self.lastSeen = payload.get('lastSeen', {})
+    
+    def Get(self, symbol, date):
+        return self.entries.get(symbol.Value, {}).get(f"{date:%Y%m%d}")
+    
+    def Set(self, symbol, date, prices):
+        self.entries.setdefault(symbol.Value, {})[f"{date:%Y%m%d}"] = prices
+        self.dirty = True
+    
+    def Touch(self, symbols, date):
+        '''Records that symbols were in the universe on date'''
+        day = f"{date:%Y%m%d}"
+        for symbol in symbols:
+            if self.lastSeen.get(symbol.Value, '') < day:
+                self.lastSeen[symbol.Value] = day
+                self.dirty = True
+    
+    def Prune(self, date):
+        '''Drops the entries of symbols not in the universe during the evictAfterDays before date'''
+        cutoff = f"{date - timedelta(days=self.evictAfterDays):%Y%m%d}"
+        stale = [value for value in self.entries.keys() | self.lastSeen.keys() if self.lastSeen.get(value, '') < cutoff]
+        for value in stale:
+            self.entries.pop(value, None)
+            self.lastSeen.pop(value, None)
+        if stale:
+            self.dirty = True
+        return len(stale)
+    
+    def Save(self, date):
+        '''Prunes the stale entries as of date, then writes the cache if it changed'''
+        self.Prune(date)
+        if self.dirty:
+            self.objectStore.Save(self.key, json.dumps({'entries': self.entries, 'lastSeen': self.lastSeen}))
+            self.dirty = False
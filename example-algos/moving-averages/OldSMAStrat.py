@@ -1,5 +1,8 @@
 from AlgorithmImports import *
 from System.Collections.Generic import List
+from CoarseSelection import *
+from Instrumentation import *
+from Rebalancer import *
 
 # Leverage SimpleMovingAverage Indicator
 # 100% entry and exit points based on 50 and 200 day moving averages
@@ -19,13 +22,20 @@ class OldSMAStrat(QCAlgorithm):
         self.SetEndDate(2021,11,9)    #Set End Date
         self.SetCash(100000)         #Set Strategy Cash
 
+        # Callback timers and leveled logging (log-level parameter), summarised weekly
+        self.instrumentation = Instrumentation(self)
+
         self.UniverseSettings.Resolution = Resolution.Daily
-        self.AddUniverse(self.CoarseSelectionFunction)
+        self.AddUniverse(self.instrumentation.Timed("CoarseSelectionFunction", self.CoarseSelectionFunction))
 
     # Global vars that will help expand scope of some of the wrapper functions
         self.__numberOfSymbols = 3
+        self.__coarseSelection = TopDollarVolumeSelection(self.__numberOfSymbols)
         self._changes = None
         
+        # Diffs the equal-weight targets against the holdings instead of liquidating and rebuying
+        self.rebalancer = TargetWeightRebalancer(self, tolerance=0.02)
+        
     # ---------------------------------------
 
         # Set BND Benchmark
@@ -47,38 +57,39 @@ class OldSMAStrat(QCAlgorithm):
 
     # Sort the data by daily dollar volume and take the top 'NumberOfSymbols'
     def CoarseSelectionFunction(self, coarse):
-        # sort descending by daily dollar volume
-        sortedByDollarVolume = sorted(coarse, key = lambda x: x.DollarVolume, reverse=True)
-        filtered = [ x.Symbol for x in sortedByDollarVolume if x.HasFundamentalData ]
-
-        return filtered[:self.__numberOfSymbols]
+        # top 'NumberOfSymbols' with fundamental data, descending by daily dollar volume
+        return self.__coarseSelection.SelectSymbols(coarse)
 
     # This event fires whenever we have changes to our universe
     def OnSecuritiesChanged(self, changes):
         self._changes = changes
-        self.Log(f"OnSecuritiesChanged({self.UtcTime}):: {changes}")
+        self.instrumentation.Info("OnSecuritiesChanged(%s):: %s", self.UtcTime, changes)
 
     # This even fires whenever an order is placed
     def OnOrderEvent(self, fill):
-        self.Log(f"OnOrderEvent({self.UtcTime}):: {fill}") 
+        self.instrumentation.Count("order events")
+        self.instrumentation.Debug("OnOrderEvent(%s):: %s", self.UtcTime, fill, key=fill.Symbol)
+
+    def OnEndOfAlgorithm(self):
+        self.Log(self.rebalancer.Summary())
+        self.instrumentation.Flush(force=True)
 
     def OnData(self, data):
+        with self.instrumentation.Timer("OnData"):
+            self.Rebalance()
+
+    def Rebalance(self):
 
     # if we have no changes, do nothing
         if self._changes is None: return
 
-        # liquidate securities removed from universe 
-        for security in self._changes.RemovedSecurities:
-            if security.Invested:
-                self.Liquidate(security.Symbol)
-
         # This is where we are going to implement our strategy for both Added Securities and Existing Securities
         # Can accomplish through the use of self.ActiveSecurities (select the assets currently in your universe)
         # Docs: /docs/algorithm-reference/securities-and-portfolio#Securities-and-Portfolio-Active-Securities
-        # ---> For now, this just sells existing holdings, and evenly distributes cash across all securities in our universe
-        for security in self.ActiveSecurities.Keys:
-            self.Liquidate(security)
-            self.SetHoldings(security, 1/len(self.ActiveSecurities))
+        # ---> For now, this evenly distributes cash across all securities in our universe; securities
+        # removed from the universe are held outside the targets, so the rebalancer liquidates them
+        if len(self.ActiveSecurities) == 0: return
+        self.rebalancer.Rebalance({symbol: 1 / len(self.ActiveSecurities) for symbol in self.ActiveSecurities.Keys})
 
         # Validate indicators exist and are ready before using them
         # indicatorsExist = self.spySMATen is not None and self.spySMAFifty is not None and self.spySMATwoHund is not None and self.spyROCPOne is not None
@@ -1,10 +1,19 @@
+from FundamentalSelection import *
+
 class FundamentalFactorAlphaModel(AlphaModel):
     
-    def __init__(self):
+    def __init__(self, fundamentals = None):
+        '''Initializes a new instance of the FundamentalFactorAlphaModel class
+        Args:
+            fundamentals: Function returning the latest FundamentalSnapshot of the universe
+                          selection; its columns are reused when it covers every security'''
+        self.fundamentals = fundamentals
         self.rebalanceTime = datetime.min
         # Dictionary containing set of securities in each sector
         # e.g. {technology: set(AAPL, TSLA, ...), healthcare: set(XYZ, ABC, ...), ... }
         self.sectors = {}
+        # Reverse index so a removed security is found without scanning every sector
+        self.sectorBySymbol = {}
 
     def Update(self, algorithm, data):
         '''Updates this alpha model with the latest data from the algorithm.
@@ -23,24 +32,28 @@ class FundamentalFactorAlphaModel(AlphaModel):
         
         insights = []
         
-        for sector in self.sectors:
-            securities = self.sectors[sector]
-            sortedByROE = sorted(securities, key=lambda x: x.Fundamentals.OperationRatios.ROE.Value, reverse=True)
-            sortedByPM = sorted(securities, key=lambda x: x.Fundamentals.OperationRatios.NetMargin.Value, reverse=True)
-            sortedByPE = sorted(securities, key=lambda x: x.Fundamentals.ValuationRatios.PERatio, reverse=False)
-
-            # Dictionary holding a dictionary of scores for each security in the sector
-            scores = {}
-            for security in securities:
-                score = sum([sortedByROE.index(security), sortedByPM.index(security), sortedByPE.index(security)])
-                scores[security] = score
-                
-            # Add best 20% of each sector to longs set (minimum 1)
-            length = max(int(len(scores)/5), 1)
-            for security in sorted(scores.items(), key=lambda x: x[1], reverse=False)[:length]:
-                symbol = security[0].Symbol
-                # Use Expiry.EndOfQuarter in this case to match Universe, Alpha and PCM
-                insights.append(Insight.Price(symbol, Expiry.EndOfQuarter, InsightDirection.Up))
+        # Columnar snapshot of every security, grouped by sector in iteration order
+        securities = []
+        sectorIds = []
+        for sectorId, sector in enumerate(self.sectors):
+            securities.extend(self.sectors[sector])
+            sectorIds.extend([sectorId] * len(self.sectors[sector]))
+        if not securities:
+            return insights
+        
+        snapshot = self.fundamentals() if self.fundamentals is not None else None
+        rows = snapshot.Rows([x.Symbol for x in securities]) if snapshot is not None else None
+        if rows is None:
+            # Read the fundamentals of every security in one pass
+            snapshot = FundamentalSnapshot([x.Fundamentals for x in securities])
+            rows = np.arange(len(securities))
+        
+        # Add best 20% of each sector to longs set (minimum 1)
+        for i in RankSectors(np.array(sectorIds, dtype=np.int64), snapshot.Values('ROE', rows),
+                             snapshot.Values('NetMargin', rows), snapshot.Values('PERatio', rows)):
+            symbol = securities[i].Symbol
+            # Use Expiry.EndOfQuarter in this case to match Universe, Alpha and PCM
+            insights.append(Insight.Price(symbol, Expiry.EndOfQuarter, InsightDirection.Up))
         
         return insights
 
@@ -52,13 +65,46 @@ class FundamentalFactorAlphaModel(AlphaModel):
         
         # Remove security from sector set
         for security in changes.RemovedSecurities:
-            for sector in self.sectors:
-                if security in self.sectors[sector]:
-                    self.sectors[sector].remove(security)
+            sector = self.sectorBySymbol.pop(security.Symbol, None)
+            if sector is not None:
+                self.sectors[sector].discard(security)
         
         # Add security to corresponding sector set
         for security in changes.AddedSecurities:
             sector = security.Fundamentals.AssetClassification.MorningstarSectorCode
+            previous = self.sectorBySymbol.get(security.Symbol)
+            if previous is not None and previous != sector:
+                self.sectors[previous].discard(security)
             if sector not in self.sectors:
                 self.sectors[sector] = set()
             self.sectors[sector].add(security)
+            self.sectorBySymbol[security.Symbol] = sector
+
+
+def RankSectors(sectorIds, roe, netMargin, peRatio):
+    '''Ranks every security within its sector by ROE and net margin (descending) and
+    PE ratio (ascending) in one pass and returns the positions of the best 20% of each
+    sector (minimum 1), sector by sector, best score first.
+    All sorts are stable, so ties keep their input order exactly like the sorted() /
+    list.index() ranking they replace.
+    Args:
+        sectorIds: Sector number of each security, with each sector's securities contiguous
+        roe, netMargin, peRatio: Factor values of each security
+    Returns:
+        Array of selected positions'''
+    count = len(sectorIds)
+    sectorSizes = np.bincount(sectorIds)
+    sectorStarts = np.concatenate(([0], np.cumsum(sectorSizes)[:-1]))
+    
+    def WithinSectorRank(key):
+        order = np.lexsort((key, sectorIds))
+        ranks = np.empty(count, dtype=np.int64)
+        ranks[order] = np.arange(count) - sectorStarts[sectorIds[order]]
+        return ranks
+    
+    scores = WithinSectorRank(-roe) + WithinSectorRank(-netMargin) + WithinSectorRank(peRatio)
+    
+    best = np.lexsort((scores, sectorIds))
+    positions = np.arange(count) - sectorStarts[sectorIds[best]]
+    quota = np.maximum(sectorSizes // 5, 1)
+    return best[positions < quota[sectorIds[best]]]
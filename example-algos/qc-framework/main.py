@@ -1,4 +1,7 @@
 from AlphaModel import *
+from CoarseSelection import *
+from UniverseScheduler import *
+from FundamentalSelection import *
 
 class VerticalTachyonRegulators(QCAlgorithm):
 
@@ -7,18 +10,32 @@ class VerticalTachyonRegulators(QCAlgorithm):
         self.SetEndDate(2021, 1, 1)
         self.SetCash(100000)
 
-        # Universe selection
-        self.month = 0
+        # Universe selection on the first trading day of every quarter
         self.num_coarse = 500
+        self.coarseSelection = TopDollarVolumeSelection(self.num_coarse, minPrice=5)
+        self.universeScheduler = UniverseScheduler(self, Cadence.Quarterly())
+        
+        # Equities that IPO'd more than 5 years ago in selected sectors, with positive ROE,
+        # net margin and PE ratio; compiled once, applied to a columnar snapshot of the fine data
+        sectors = [
+            MorningstarSectorCode.FinancialServices,
+            MorningstarSectorCode.RealEstate,
+            MorningstarSectorCode.Healthcare,
+            MorningstarSectorCode.Utilities,
+            MorningstarSectorCode.Technology]
+        self.fineFilter = (Field.Sector.IsIn(sectors) & (Field.IPOAge > timedelta(365*5))
+                           & (Field.ROE > 0) & (Field.NetMargin > 0) & (Field.PERatio > 0))
+        self.fundamentals = None
 
         self.UniverseSettings.Resolution = Resolution.Daily
-        self.AddUniverse(self.CoarseSelectionFunction, self.FineSelectionFunction)
+        self.AddUniverse(*self.universeScheduler.Schedule(self.CoarseSelectionFunction, self.FineSelectionFunction))
         
         # Alpha Model
-        self.AddAlpha(FundamentalFactorAlphaModel())
+        # (ranks the fundamentals already extracted by the fine selection)
+        self.AddAlpha(FundamentalFactorAlphaModel(lambda: self.fundamentals))
 
-        # Portfolio construction model
-        self.SetPortfolioConstruction(EqualWeightingPortfolioConstructionModel(self.IsRebalanceDue))
+        # Portfolio construction model, rebalanced on the same quarterly schedule
+        self.SetPortfolioConstruction(EqualWeightingPortfolioConstructionModel(self.universeScheduler.RebalanceFunction()))
         
         # Risk model
         self.SetRiskManagement(NullRiskManagementModel())
@@ -26,42 +43,16 @@ class VerticalTachyonRegulators(QCAlgorithm):
         # Execution model
         self.SetExecution(ImmediateExecutionModel())
 
-    # Share the same rebalance function for Universe and PCM for clarity
-    def IsRebalanceDue(self, time):
-        # Rebalance on the first day of the Quarter
-        if time.month == self.month or time.month not in [1, 4, 7, 10]:
-            return None
-            
-        self.month = time.month
-        return time
-
     def CoarseSelectionFunction(self, coarse):
-        # If not time to rebalance, keep the same universe
-        if not self.IsRebalanceDue(self.Time): 
-            return Universe.Unchanged
-
         # Select only those with fundamental data and a sufficiently large price
         # Sort by top dollar volume: most liquid to least liquid
-        selected = sorted([x for x in coarse if x.HasFundamentalData and x.Price > 5],
-                            key = lambda x: x.DollarVolume, reverse=True)
-
-        return [x.Symbol for x in selected[:self.num_coarse]]
+        return self.coarseSelection.SelectSymbols(coarse)
 
 
     def FineSelectionFunction(self, fine):
         # Filter the fine data for equities that IPO'd more than 5 years ago in selected sectors
-        
-        sectors = [
-            MorningstarSectorCode.FinancialServices,
-            MorningstarSectorCode.RealEstate,
-            MorningstarSectorCode.Healthcare,
-            MorningstarSectorCode.Utilities,
-            MorningstarSectorCode.Technology]
-        
-        filtered_fine = [x.Symbol for x in fine if x.SecurityReference.IPODate + timedelta(365*5) < self.Time
-                                    and x.AssetClassification.MorningstarSectorCode in sectors
-                                    and x.OperationRatios.ROE.Value > 0
-                                    and x.OperationRatios.NetMargin.Value > 0
-                                    and x.ValuationRatios.PERatio > 0]
-                
-        return filtered_fine
+        self.fundamentals = FundamentalSnapshot(fine, self.Time)
+        return self.fundamentals.Select(self.fineFilter)
+
+    def OnEndOfAlgorithm(self):
+        self.Log(self.universeScheduler.Summary())
@@ -0,0 +1,199 @@
+from AlgorithmImports import *
+from UniverseScheduler import TradingCalendar
+
+
+class SessionConsolidator:
+    '''Consolidates the minute bars of many symbols into session (daily) or N-minute OHLCV
+    bars. Each symbol has a row of preallocated accumulator arrays; every minute slice is
+    folded into them with a few vectorized operations.
+
+    Daily bars run from the session open to its close (13:00 on early-close days); N-minute
+    bars are aligned to the open, the last one ending at the close. A bar is emitted when the
+    clock reaches the end of its period, for every symbol at once, whether or not the symbol
+    traded in the final minute; a symbol that did not trade during a period emits nothing.
+    Bars outside the regular session and on non-trading days are ignored.
+
+    Emitted bars update the indicators and indicator banks registered with the consolidator,
+    then go to the handlers, so indicators work once per consolidated period while the
+    algorithm keeps the minute feed for execution:
+
+        self.consolidator = SessionConsolidator()
+        self.consolidator.RegisterBank(EmaBank(25))
+        ...
+        def OnData(self, data):
+            self.consolidator.UpdateSlice(data)'''
+    def __init__(self, period = None, calendar = None, barLength = timedelta(minutes=1), capacity = 64):
+        '''Initializes a new instance of the SessionConsolidator class
+        Args:
+            period: Length of the consolidated bars, or None for one bar per session
+            calendar: Trading calendar, defaults to the US equity calendar
+            barLength: Length of the input bars, whose Time is their start
+            capacity: Rows preallocated; grown by doubling'''
+        self.period = period
+        self.calendar = calendar if calendar is not None else TradingCalendar()
+        self.barLength = barLength
+        self.sessions = {}
+
+        self.Symbols = []
+        self.rowBySymbol = {}
+        self.open = np.zeros(capacity, dtype=np.float64)
+        self.high = np.zeros(capacity, dtype=np.float64)
+        self.low = np.zeros(capacity, dtype=np.float64)
+        self.close = np.zeros(capacity, dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.float64)
+        # Start and end of the period a row is accumulating; NaT while it is empty
+        self.start = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[us]')
+        self.end = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[us]')
+        # Earliest end of a period being accumulated, so Scan is free until then
+        self.nextEnd = None
+
+        self.indicators = {}
+        self.banks = []
+        self.handlers = []
+        self.BarsEmitted = 0
+
+    def Register(self, symbol, indicator):
+        '''Updates indicator with the close of every consolidated bar of symbol'''
+        self.indicators.setdefault(symbol, []).append(indicator)
+
+    def RegisterBank(self, bank):
+        '''Updates bank (an Indicators bank) with the closes of every consolidated bar, one
+        vectorized Update per emission; symbols are added to the bank as they appear'''
+        self.banks.append((bank, np.full(len(self.open), -1, dtype=np.int64)))
+        index = len(self.banks) - 1
+        if self.Symbols:
+            self._MapBank(index, np.arange(len(self.Symbols)))
+
+    def OnConsolidated(self, handler):
+        '''Calls handler(endTime, bars) with the list of TradeBars emitted at endTime'''
+        self.handlers.append(handler)
+
+    def Rows(self, symbols):
+        '''Rows of symbols, adding a row for each new one'''
+        rows = []
+        added = []
+        for symbol in symbols:
+            row = self.rowBySymbol.get(symbol)
+            if row is None:
+                row = len(self.Symbols)
+                if row == len(self.open):
+                    self._Grow(2 * row)
+                self.Symbols.append(symbol)
+                self.rowBySymbol[symbol] = row
+                added.append(row)
+            rows.append(row)
+        if added:
+            for index in range(len(self.banks)):
+                self._MapBank(index, np.array(added, dtype=np.int64))
+        return np.array(rows, dtype=np.int64)
+
+    def Period(self, time):
+        '''(start, end) of the consolidated bar containing the input bar starting at time, or
+        None if that bar is outside the regular session'''
+        day = time.date()
+        session = self.sessions.get(day, False)
+        if session is False:
+            session = self.sessions[day] = self.calendar.Session(time)
+        if session is None or not session[0] <= time < session[1]:
+            return None
+        open, close = session
+        if self.period is None:
+            return session
+        start = open + (time - open) // self.period * self.period
+        return start, min(start + self.period, close)
+
+    def UpdateSlice(self, data):
+        '''Folds the bars of a slice into the accumulators; returns the bars emitted'''
+        bars = list(data.Bars.values())
+        if not bars:
+            return []
+        return self.Update(bars[0].Time, self.Rows([bar.Symbol for bar in bars]),
+                           np.fromiter((bar.Open for bar in bars), np.float64, len(bars)),
+                           np.fromiter((bar.High for bar in bars), np.float64, len(bars)),
+                           np.fromiter((bar.Low for bar in bars), np.float64, len(bars)),
+                           np.fromiter((bar.Close for bar in bars), np.float64, len(bars)),
+                           np.fromiter((bar.Volume for bar in bars), np.float64, len(bars)))
+
+    def Update(self, time, rows, open, high, low, close, volume):
+        '''Folds one input bar per row, all starting at time, into the accumulators.
+        Returns the bars emitted: those of periods that ended before time (a symbol or the
+        whole feed had a gap) and those ending with this bar.'''
+        emitted = self.Scan(time)
+        period = self.Period(time)
+        if period is not None and len(rows):
+            empty = np.isnat(self.end[rows])
+            if empty.any():
+                new = rows[empty]
+                self.open[new] = open[empty]
+                self.high[new] = high[empty]
+                self.low[new] = low[empty]
+                self.close[new] = close[empty]
+                self.volume[new] = volume[empty]
+                self.start[new] = np.datetime64(period[0], 'us')
+                self.end[new] = np.datetime64(period[1], 'us')
+                if self.nextEnd is None or period[1] < self.nextEnd:
+                    self.nextEnd = period[1]
+                if empty.all():
+                    return emitted + self.Scan(time + self.barLength)
+                kept = ~empty
+                rows, high, low, close, volume = rows[kept], high[kept], low[kept], close[kept], volume[kept]
+            self.high[rows] = np.maximum(self.high[rows], high)
+            self.low[rows] = np.minimum(self.low[rows], low)
+            self.close[rows] = close
+            self.volume[rows] += volume
+        return emitted + self.Scan(time + self.barLength)
+
+    def Scan(self, time):
+        '''Emits the bar of every row whose period ended at or before time. Call it from a
+        scheduled event to flush bars when the feed stops before the session close.'''
+        if self.nextEnd is None or time < self.nextEnd:
+            return []
+        count = len(self.Symbols)
+        end = self.end[:count]
+        due = np.flatnonzero(end <= np.datetime64(time, 'us'))
+        emitted = []
+        ends = end[due]
+        for periodEnd in np.unique(ends):
+            emitted.extend(self._Emit(due[ends == periodEnd], periodEnd))
+        end[due] = np.datetime64('NaT')
+        remaining = end[~np.isnat(end)]
+        self.nextEnd = remaining.min().astype(datetime) if len(remaining) else None
+        return emitted
+
+    def _Emit(self, rows, end):
+        endTime = end.astype(datetime)
+        closes = self.close[rows]
+        for bank, bankRows in self.banks:
+            bank.Update(bankRows[rows], closes)
+
+        starts = self.start[rows].astype(datetime).tolist()
+        bars = [TradeBar(start, self.Symbols[row], o, h, l, c, v, endTime - start)
+                for row, start, o, h, l, c, v in zip(rows.tolist(), starts, self.open[rows].tolist(),
+                                                     self.high[rows].tolist(), self.low[rows].tolist(),
+                                                     closes.tolist(), self.volume[rows].tolist())]
+        if self.indicators:
+            for bar in bars:
+                for indicator in self.indicators.get(bar.Symbol, ()):
+                    indicator.Update(endTime, bar.Close)
+        for handler in self.handlers:
+            handler(endTime, bars)
+        self.BarsEmitted += len(bars)
+        return bars
+
+    def _MapBank(self, index, rows):
+        bank, bankRows = self.banks[index]
+        symbols = [self.Symbols[row] for row in rows.tolist()]
+        new = [symbol for symbol in symbols if symbol not in bank.rowBySymbol]
+        if new:
+            bank.Add(new)
+        bankRows[rows] = bank.Rows(symbols)
+
+    def _Grow(self, capacity):
+        for name in ('open', 'high', 'low', 'close', 'volume', 'start', 'end'):
+            current = getattr(self, name)
+            grown = np.full(capacity, np.datetime64('NaT'), dtype=current.dtype) if current.dtype.kind == 'M' \
+                else np.zeros(capacity, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+        self.banks = [(bank, np.concatenate([rows, np.full(capacity - len(rows), -1, dtype=np.int64)]))
+                      for bank, rows in self.banks]
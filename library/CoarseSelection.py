@@ -0,0 +1,87 @@
+from AlgorithmImports import *
+
+
+class CoarseSnapshot:
+    '''Columnar view of a coarse universe feed, with every column read in a single pass over
+    the feed. Reading the columns costs about as much as sorting the feed, so build one only
+    when several selections share it; a single selection is cheaper on the feed itself.'''
+    def __init__(self, coarse):
+        self.Coarse = list(coarse)
+        price = []
+        dollarVolume = []
+        hasFundamentalData = []
+        for x in self.Coarse:
+            price.append(x.Price)
+            dollarVolume.append(x.DollarVolume)
+            hasFundamentalData.append(x.HasFundamentalData)
+        self.Price = np.array(price, dtype=np.float64)
+        self.DollarVolume = np.array(dollarVolume, dtype=np.float64)
+        self.HasFundamentalData = np.array(hasFundamentalData, dtype=bool)
+
+    def __len__(self):
+        return len(self.Coarse)
+
+
+class TopDollarVolumeSelection:
+    '''Selects the most liquid securities of a coarse feed: the predicates are applied as
+    vectorized masks and the top count by DollarVolume is found by partial selection
+    instead of sorting the entire feed.
+    Ties in DollarVolume keep their feed order, exactly like sorted(..., reverse=True).'''
+    def __init__(self, count, minPrice = None, requireFundamentalData = True):
+        '''Args:
+            count: Maximum number of securities to select
+            minPrice: Only select securities with a price strictly above this value
+            requireFundamentalData: Only select securities with fundamental data'''
+        self.count = count
+        self.minPrice = minPrice
+        self.requireFundamentalData = requireFundamentalData
+
+    def Select(self, coarse):
+        '''Returns the selected coarse objects, most liquid first. A raw feed is filtered in one
+        pass, and only the DollarVolume of the rows that pass is read; a CoarseSnapshot shared
+        with other selections is filtered with vectorized masks over its columns.'''
+        if not isinstance(coarse, CoarseSnapshot):
+            candidates = self._Filter(coarse)
+            dollarVolume = np.fromiter((x.DollarVolume for x in candidates), dtype=np.float64, count=len(candidates))
+            return [candidates[i] for i in TopK(dollarVolume, self.count).tolist()]
+
+        mask = np.ones(len(coarse), dtype=bool)
+        if self.requireFundamentalData:
+            mask &= coarse.HasFundamentalData
+        if self.minPrice is not None:
+            mask &= coarse.Price > self.minPrice
+
+        candidates = np.flatnonzero(mask)
+        best = candidates[TopK(coarse.DollarVolume[candidates], self.count)]
+        return [coarse.Coarse[i] for i in best.tolist()]
+
+    def SelectSymbols(self, coarse):
+        '''Returns the symbols of the selected securities, most liquid first'''
+        return [x.Symbol for x in self.Select(coarse)]
+
+    def _Filter(self, coarse):
+        minPrice = self.minPrice
+        if self.requireFundamentalData:
+            if minPrice is None:
+                return [x for x in coarse if x.HasFundamentalData]
+            return [x for x in coarse if x.HasFundamentalData and x.Price > minPrice]
+        if minPrice is None:
+            return list(coarse)
+        return [x for x in coarse if x.Price > minPrice]
+
+
+def TopK(values, k):
+    '''Returns the positions of the k largest values in descending order, ties in position order'''
+    n = len(values)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-values, kind='stable')
+
+    # Everything strictly above the k-th largest value is selected, the remaining slots go to
+    # the earliest of the values equal to it
+    threshold = np.partition(values, n - k)[n - k]
+    above = np.flatnonzero(values > threshold)
+    tied = np.flatnonzero(values == threshold)[:k - len(above)]
+    selected = np.concatenate((above, tied))
+    return selected[np.argsort(-values[selected], kind='stable')]
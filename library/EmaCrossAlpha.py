@@ -0,0 +1,374 @@
+from AlgorithmImports import *
+from BarConsolidation import SessionConsolidator
+
+
+class EmaCrossAlphaModel(AlphaModel):
+    '''Emits an Up insight for every symbol whose fast EMA is above its slow EMA and a Down
+    insight where it is below. At daily resolution on an intraday feed (minute bars for VWAP
+    execution) the slices are consolidated into sessions, and the model updates and emits only
+    when a session closes, as it does on daily bars. Shared by every strategies/ema-cross
+    project, whose AlphaModel.py only imports it:
+
+        from EmaCrossAlpha import *'''
+    def __init__(self,
+                 fastPeriod = 5,
+                 slowPeriod = 25,
+                 resolution = Resolution.Daily,
+                 vectorized = False,
+                 emitOnCross = False,
+                 refreshPeriod = timedelta(days=1)):
+        '''Initializes a new instance of the EmaCrossAlphaModel class
+        Args:
+            fastPeriod: The fast EMA period
+            slowPeriod: The slow EMA period
+            vectorized: Keep the EMA state of every symbol in NumPy arrays and update
+                        them all in one step per bar instead of one indicator per symbol
+            emitOnCross: Emit an insight only when the fast/slow relationship of a symbol
+                         flips, instead of one for every ready symbol on every bar
+            refreshPeriod: With emitOnCross, re-emit an unchanged direction once its
+                           previous insight expires within this period'''
+        self.fastPeriod = fastPeriod
+        self.slowPeriod = slowPeriod
+        self.resolution = resolution
+        self.predictionInterval = 5
+        self.emitOnCross = emitOnCross
+        self.refreshPeriod = refreshPeriod
+        self.suppressedInsights = 0
+        
+        self.insightSymbol = None
+        self.insightPrice = None
+        self.insightInterval = None
+        self.insightDirection = None
+        
+        self.symbolDataBySymbol = {}
+        self.emaState = EmaCrossState(fastPeriod, slowPeriod) if vectorized else None
+        self._insights = []
+        
+        # Folds intraday bars into daily ones; created on the first intraday slice
+        self.consolidator = None
+
+    def Update(self, algorithm, data):
+        '''Updates this alpha model with the latest data from the algorithm.
+        This is called each time the algorithm receives data for subscribed securities
+        Args:
+            algorithm: The algorithm instance
+            data: The new data available
+        Returns:
+            New insights'''
+        
+        bars = self.DailyBars(data)
+        if bars is None:
+            return []
+        
+        if self.emaState is not None:
+            return self.UpdateVectorized(algorithm, bars)
+        
+        insights = []
+        suppressed = 0
+        now = algorithm.UtcTime
+        period = timedelta(days=self.predictionInterval)
+        
+        # Per-symbol debug lines are only formatted when the algorithm's instrumentation asks for them
+        log = getattr(algorithm, 'instrumentation', None)
+        debug = log is not None and log.IsDebug
+        
+        for symbol, symbolData in self.symbolDataBySymbol.items():
+            if symbolData.fastEMA.IsReady and symbolData.slowEMA.IsReady:
+                
+                if debug:
+                    log.Debug("%s %d day: %s, %d day: %s", symbol, self.slowPeriod, symbolData.slowEMA.Current.Value,
+                              self.fastPeriod, symbolData.fastEMA.Current.Value, key=symbol)
+                
+                if symbolData.slowEMA.Current.Value == symbolData.fastEMA.Current.Value:
+                    continue
+                
+                symbolData.FastIsOverSlow = symbolData.fastEMA.Current.Value > symbolData.slowEMA.Current.Value
+                direction = InsightDirection.Up if symbolData.FastIsOverSlow else InsightDirection.Down
+                if self.emitOnCross and symbolData.IsRedundant(direction, now, self.refreshPeriod):
+                    suppressed += 1
+                    continue
+                symbolData.Direction = direction
+                symbolData.InsightCloseTime = now + period
+                
+                if symbolData.SlowIsOverFast:
+                    if debug:
+                        log.Debug("%s Slow > Fast, Insight Down (sell/short)", symbol, key=symbol)
+                    self.insightSymbol = symbolData.Symbol
+                    self.insightInterval = self.predictionInterval
+                    self.insightDirection = InsightDirection.Down
+                    self.insightPrice = Insight.Price(symbolData.Symbol, timedelta(days=self.predictionInterval), InsightDirection.Down)
+                    insights.append(self.insightPrice)
+    
+                else:
+                    if debug:
+                        log.Debug("%s Fast > Slow, Insight Up", symbol, key=symbol)
+                    self.insightSymbol = symbolData.Symbol
+                    self.insightInterval = self.predictionInterval
+                    self.insightDirection = InsightDirection.Up
+                    self.insightPrice = Insight.Price(symbolData.Symbol, timedelta(days=self.predictionInterval), InsightDirection.Up)
+                    insights.append(self.insightPrice)
+    
+        self.suppressedInsights += suppressed
+        if log is not None:
+            log.Count("insights", len(insights))
+            if self.emitOnCross:
+                log.Count("suppressed insights", suppressed)
+        self._insights = insights
+        return insights
+
+    def DailyBars(self, data):
+        '''The bars of data by symbol. At daily resolution on an intraday feed, the daily bars
+        of the sessions data completes instead, or None while no session has closed.'''
+        bars = data.Bars
+        if self.consolidator is None:
+            first = next(iter(bars.values()), None)
+            if self.resolution != Resolution.Daily or first is None or first.Period >= timedelta(days=1):
+                return bars
+            self.consolidator = SessionConsolidator(barLength=first.Period)
+        emitted = self.consolidator.UpdateSlice(data)
+        if not emitted:
+            return None
+        return {bar.Symbol: bar for bar in emitted}
+
+    def UpdateVectorized(self, algorithm, bars):
+        '''Array-backed equivalent of Update: one vectorized EMA step for every symbol
+        with a bar in bars, then one masked comparison for the directions'''
+        state = self.emaState
+        
+        rows = []
+        prices = []
+        for symbol, bar in bars.items():
+            row = state.rowBySymbol.get(symbol)
+            if row is not None:
+                rows.append(row)
+                prices.append(bar.Close)
+        if rows:
+            state.Update(np.array(rows, dtype=np.int64), np.array(prices, dtype=np.float64))
+        
+        up, down = state.Directions()
+        period = timedelta(days=self.predictionInterval)
+        
+        emit = up | down
+        suppressed = 0
+        if self.emitOnCross:
+            signalled = emit
+            emit = state.Emitting(up, down, algorithm.UtcTime, self.refreshPeriod, period)
+            suppressed = int(np.count_nonzero(signalled & ~emit))
+        
+        insights = []
+        for row in np.flatnonzero(emit):
+            direction = InsightDirection.Up if up[row] else InsightDirection.Down
+            insights.append(Insight.Price(state.Symbols[row], period, direction))
+        
+        if insights:
+            self.insightSymbol = insights[-1].Symbol
+            self.insightInterval = self.predictionInterval
+            self.insightDirection = insights[-1].Direction
+            self.insightPrice = insights[-1]
+        
+        self.suppressedInsights += suppressed
+        log = getattr(algorithm, 'instrumentation', None)
+        if log is not None:
+            log.Count("insights", len(insights))
+            if self.emitOnCross:
+                log.Count("suppressed insights", suppressed)
+        
+        self._insights = insights
+        return insights
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        '''Event fired each time the we add/remove securities from the data feed
+        Args:
+            algorithm: The algorithm instance that experienced the change in securities
+            changes: The security additions and removals from the algorithm'''
+        
+        # Liquidate holdings of removed securities
+        for removed in changes.RemovedSecurities:
+            algorithm.Liquidate(removed.Symbol)
+        
+        log = getattr(algorithm, 'instrumentation', None)
+        if log is not None:
+            log.Count("added securities", len(changes.AddedSecurities))
+            if log.IsDebug:
+                for added in changes.AddedSecurities:
+                    log.Debug("Added Security: %s", added.Symbol)
+        
+        # One history request covering both EMAs of every added security
+        symbols = [x.Symbol for x in changes.AddedSecurities]
+        history = HistoryCloses(algorithm, symbols, max(self.slowPeriod, self.fastPeriod), self.resolution)
+        
+        if self.emaState is not None:
+            closes = history.to_numpy(dtype=np.float64).T if history is not None else None
+            self.emaState.Add(symbols, closes)
+            return
+        
+        # Save all newly added securities
+        for added in changes.AddedSecurities:
+            closes = history[added.Symbol].dropna() if history is not None else None
+            symbolData = self.symbolDataBySymbol.get(added.Symbol)
+            if symbolData is None:
+                symbolData = SymbolData(algorithm, added, self.slowPeriod, self.fastPeriod, self.resolution, closes)
+                self.symbolDataBySymbol[added.Symbol] = symbolData
+            else:
+                # a security that was already initialized was re-added, reset and re-warm the indicators
+                symbolData.WarmUp(closes)
+
+class SymbolData:
+    '''Contains data specific to a symbol required by this model'''
+    def __init__(self, algorithm, security, slowPeriod, fastPeriod, resolution, closes = None):
+        self.Security = security
+        self.Symbol = security.Symbol
+        self.slowPeriod = slowPeriod
+        self.fastPeriod = fastPeriod
+
+        # True if the fast is above the slow, otherwise false.
+        # This is used to prevent emitting the same signal repeatedly
+        self.FastIsOverSlow = False
+        
+        # Direction and close time of the last insight emitted for the symbol
+        self.Direction = InsightDirection.Flat
+        self.InsightCloseTime = None
+        
+        # Create Slow EMA Indicator for Security
+        slowEMA = algorithm.CreateIndicatorName(self.Symbol, f"EMA{slowPeriod}", resolution)
+        self.slowEMA = ExponentialMovingAverage(slowEMA, slowPeriod)
+        algorithm.RegisterIndicator(self.Symbol, self.slowEMA, resolution)
+                
+        # Create Fast EMA Indicator for Security
+        fastEMA = algorithm.CreateIndicatorName(self.Symbol, f"EMA{fastPeriod}", resolution)
+        self.fastEMA = ExponentialMovingAverage(fastEMA, fastPeriod)
+        algorithm.RegisterIndicator(self.Symbol, self.fastEMA, resolution)
+
+        self.WarmUp(closes)
+
+    def WarmUp(self, closes):
+        '''Resets both indicators and pushes the tail of the shared history through each of them'''
+        self.slowEMA.Reset()
+        self.fastEMA.Reset()
+        self.Direction = InsightDirection.Flat
+        self.InsightCloseTime = None
+        if closes is not None:
+            for time, value in closes.tail(self.slowPeriod).items():
+                self.slowEMA.Update(time, value)
+            for time, value in closes.tail(self.fastPeriod).items():
+                self.fastEMA.Update(time, value)
+
+    @property
+    def SlowIsOverFast(self):
+        return not self.FastIsOverSlow
+
+    def IsRedundant(self, direction, time, refreshPeriod):
+        '''True if the last insight already has this direction and does not expire within refreshPeriod'''
+        return direction == self.Direction and time + refreshPeriod < self.InsightCloseTime
+
+
+class EmaCrossState:
+    '''Fast and slow EMA state for every symbol held in contiguous arrays, one row per symbol.
+    Uses the same recurrence as ExponentialMovingAverage: the first sample seeds the
+    average, every later sample is blended in as value * k + current * (1 - k).'''
+    def __init__(self, fastPeriod, slowPeriod, capacity = 64):
+        self.fastPeriod = fastPeriod
+        self.slowPeriod = slowPeriod
+        self.fastK = 2.0 / (fastPeriod + 1)
+        self.slowK = 2.0 / (slowPeriod + 1)
+        
+        self.Symbols = []
+        self.rowBySymbol = {}
+        
+        self.fast = np.zeros(capacity, dtype=np.float64)
+        self.slow = np.zeros(capacity, dtype=np.float64)
+        self.fastSamples = np.zeros(capacity, dtype=np.int64)
+        self.slowSamples = np.zeros(capacity, dtype=np.int64)
+        
+        # Direction (+1 up, -1 down, 0 none yet) and close time of the last insight of each row
+        self.direction = np.zeros(capacity, dtype=np.int8)
+        self.closeTime = np.zeros(capacity, dtype='datetime64[us]')
+
+    def Add(self, symbols, closes = None):
+        '''Adds (or resets) a row per symbol and seeds both EMAs from closes, an array of
+        shape (len(symbols), bars) in time order where NaN marks a missing bar'''
+        rows = []
+        for symbol in symbols:
+            row = self.rowBySymbol.get(symbol)
+            if row is None:
+                row = len(self.Symbols)
+                if row == len(self.fast):
+                    self._Grow(2 * row)
+                self.Symbols.append(symbol)
+                self.rowBySymbol[symbol] = row
+            rows.append(row)
+        rows = np.array(rows, dtype=np.int64)
+        self.direction[rows] = 0
+        
+        if closes is None:
+            self.fastSamples[rows] = 0
+            self.slowSamples[rows] = 0
+        else:
+            self.fast[rows], self.fastSamples[rows] = SeedEma(closes, self.fastPeriod)
+            self.slow[rows], self.slowSamples[rows] = SeedEma(closes, self.slowPeriod)
+        return rows
+
+    def Update(self, rows, prices):
+        '''Advances the EMAs of the given rows by one bar each'''
+        fast = self.fast[rows]
+        slow = self.slow[rows]
+        self.fast[rows] = np.where(self.fastSamples[rows] == 0, prices, prices * self.fastK + fast * (1 - self.fastK))
+        self.slow[rows] = np.where(self.slowSamples[rows] == 0, prices, prices * self.slowK + slow * (1 - self.slowK))
+        self.fastSamples[rows] += 1
+        self.slowSamples[rows] += 1
+
+    def Directions(self):
+        '''Returns the (up, down) masks over all rows whose EMAs are ready'''
+        count = len(self.Symbols)
+        fast = self.fast[:count]
+        slow = self.slow[:count]
+        ready = (self.fastSamples[:count] >= self.fastPeriod) & (self.slowSamples[:count] >= self.slowPeriod)
+        return ready & (fast > slow), ready & (slow > fast)
+
+    def Emitting(self, up, down, time, refreshPeriod, period):
+        '''Returns the mask of rows due an insight: their direction differs from their last
+        insight's, or that insight expires within refreshPeriod. Records the direction and
+        close time, time + period, of the rows due.'''
+        count = len(self.Symbols)
+        direction = up.astype(np.int8) - down.astype(np.int8)
+        now = np.datetime64(time, 'us')
+        last = self.direction[:count]
+        closeTime = self.closeTime[:count]
+        emit = (direction != 0) & ((direction != last) | (now + np.timedelta64(refreshPeriod) >= closeTime))
+        last[emit] = direction[emit]
+        closeTime[emit] = now + np.timedelta64(period)
+        return emit
+
+    def _Grow(self, capacity):
+        for name in ('fast', 'slow', 'fastSamples', 'slowSamples', 'direction', 'closeTime'):
+            current = getattr(self, name)
+            grown = np.zeros(capacity, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+def SeedEma(closes, period):
+    '''Closed-form EMA over the last period valid closes of each row, identical to pushing
+    them one at a time through the recurrence: the oldest sample is weighted (1 - k)^n and
+    every later one k * (1 - k)^n, where n is the number of samples that follow it.
+    Returns the (values, samples) arrays.'''
+    k = 2.0 / (period + 1)
+    valid = ~np.isnan(closes)
+    after = np.cumsum(valid[:, ::-1], axis=1)[:, ::-1] - valid
+    used = valid & (after < period)
+    samples = used.sum(axis=1)
+    
+    oldest = used & (after == (samples - 1)[:, None])
+    weights = np.where(oldest, 1.0, k) * (1 - k) ** after
+    values = np.where(used, weights * np.where(valid, closes, 0.0), 0.0).sum(axis=1)
+    return values, samples
+
+def HistoryCloses(algorithm, symbols, period, resolution):
+    '''Returns the closes of the last period bars of all symbols from a single history
+    request, as a DataFrame with one column per symbol (NaN where a symbol has no bar),
+    or None when there is no history'''
+    if not symbols:
+        return None
+    history = algorithm.History(symbols, period, resolution)
+    if 'close' not in history:
+        return None
+    return history.close.unstack(0).reindex(columns=symbols)
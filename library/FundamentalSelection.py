@@ -0,0 +1,169 @@
+from AlgorithmImports import *
+import operator
+
+
+# Snapshot column name: (attribute path on a fine fundamental object, column dtype)
+FUNDAMENTAL_FIELDS = {
+    'MarketCap': ('MarketCap', np.float64),
+    'Sector': ('AssetClassification.MorningstarSectorCode', np.int64),
+    'IPODate': ('SecurityReference.IPODate', 'datetime64[us]'),
+    'ROE': ('OperationRatios.ROE.Value', np.float64),
+    'NetMargin': ('OperationRatios.NetMargin.Value', np.float64),
+    'PERatio': ('ValuationRatios.PERatio', np.float64),
+}
+
+
+class FundamentalSnapshot:
+    '''Columnar view of fine fundamentals. The FUNDAMENTAL_FIELDS columns (MarketCap,
+    Sector, IPODate, ROE, NetMargin, PERatio) are NumPy arrays filled from the nested
+    attributes of the fine objects on demand: a value is read at most once, and only if a
+    filter or ranking asks for its row. Predicates narrow the rows as they go, so later
+    conditions only read the fields of the rows that passed the earlier ones, and a factor
+    ranking sharing the snapshot reuses whatever the selection already read. Build it once
+    per selection and share it; a one-off filter whose fields nothing else reads (such as a
+    single MarketCap range) is faster as a plain comprehension over the fine objects.'''
+    def __init__(self, fine, time = None):
+        '''Args:
+            fine: Fine fundamental objects
+            time: Time the IPOAge column is measured at'''
+        self.Fine = list(fine)
+        self.Time = time
+        self.Symbols = [x.Symbol for x in self.Fine]
+        self.rowBySymbol = None
+        # name: (values, mask of the rows read so far)
+        self.columns = {}
+
+    def __getattr__(self, name):
+        if name not in FUNDAMENTAL_FIELDS:
+            raise AttributeError(name)
+        return self.Values(name)
+
+    def __len__(self):
+        return len(self.Symbols)
+
+    def Values(self, name, rows = None):
+        '''Values of column name (or the derived IPOAge) at rows, all rows by default'''
+        if rows is None:
+            rows = np.arange(len(self.Fine))
+        if name == 'IPOAge':
+            return np.datetime64(self.Time, 'us') - self.Values('IPODate', rows)
+
+        column = self.columns.get(name)
+        if column is None:
+            dtype = FUNDAMENTAL_FIELDS[name][1]
+            column = self.columns[name] = (np.empty(len(self.Fine), dtype=dtype), np.zeros(len(self.Fine), dtype=bool))
+        values, read = column
+        missing = rows[~read[rows]]
+        if len(missing):
+            path, dtype = FUNDAMENTAL_FIELDS[name]
+            get = operator.attrgetter(path)
+            fine = self.Fine if len(missing) == len(self.Fine) else [self.Fine[i] for i in missing.tolist()]
+            if dtype == 'datetime64[us]':
+                values[missing] = DatetimeColumn(list(map(get, fine)))
+            else:
+                values[missing] = np.fromiter(map(get, fine), dtype=dtype, count=len(missing))
+            read[missing] = True
+        return values[rows]
+
+    def Where(self, predicate):
+        '''Boolean mask of the rows matching predicate'''
+        return predicate(self)
+
+    def Select(self, predicate):
+        '''Symbols of the rows matching predicate, in input order'''
+        return [self.Symbols[i] for i in np.flatnonzero(predicate(self)).tolist()]
+
+    def Rows(self, symbols):
+        '''Rows of symbols, or None if any of them is not in the snapshot'''
+        if self.rowBySymbol is None:
+            self.rowBySymbol = {symbol: row for row, symbol in enumerate(self.Symbols)}
+        rows = [self.rowBySymbol.get(symbol) for symbol in symbols]
+        if any(row is None for row in rows):
+            return None
+        return np.array(rows, dtype=np.int64)
+
+
+def DatetimeColumn(values):
+    '''datetime64[us] array of datetimes, through pandas' fast parser when they all fit its
+    nanosecond range (a missing IPO date is often datetime.min, which does not)'''
+    try:
+        return pd.DatetimeIndex(values).values.astype('datetime64[us]')
+    except (pd.errors.OutOfBoundsDatetime, OverflowError):
+        return np.array(values, dtype='datetime64[us]')
+
+
+class Predicate:
+    '''A filter compiled to a function (snapshot, rows) -> boolean mask over rows.
+    Combine predicates with &, | and ~; like `and` and `or`, the right side of & is only
+    evaluated on the rows the left side kept, and the right side of | on those it dropped.'''
+    def __init__(self, mask):
+        self.mask = mask
+
+    def __call__(self, snapshot):
+        '''Boolean mask over all rows of snapshot'''
+        return self.mask(snapshot, np.arange(len(snapshot)))
+
+    def __and__(self, other):
+        def mask(snapshot, rows):
+            result = self.mask(snapshot, rows)
+            kept = np.flatnonzero(result)
+            result[kept] = other.mask(snapshot, rows[kept])
+            return result
+        return Predicate(mask)
+
+    def __or__(self, other):
+        def mask(snapshot, rows):
+            result = self.mask(snapshot, rows)
+            dropped = np.flatnonzero(~result)
+            result[dropped] = other.mask(snapshot, rows[dropped])
+            return result
+        return Predicate(mask)
+
+    def __invert__(self):
+        return Predicate(lambda snapshot, rows: ~self.mask(snapshot, rows))
+
+
+class Field:
+    '''A FundamentalSnapshot column, compared with constants to build predicates:
+
+        Field.Sector.IsIn(sectors) & (Field.IPOAge > timedelta(days=5 * 365)) & (Field.ROE > 0)
+
+    NaN never matches a comparison, like the float comparisons it replaces.'''
+    def __init__(self, name):
+        self.name = name
+
+    def __gt__(self, value):
+        return self._Compare(operator.gt, value)
+
+    def __ge__(self, value):
+        return self._Compare(operator.ge, value)
+
+    def __lt__(self, value):
+        return self._Compare(operator.lt, value)
+
+    def __le__(self, value):
+        return self._Compare(operator.le, value)
+
+    def Between(self, low, high):
+        '''Strictly between low and high'''
+        return (self > low) & (self < high)
+
+    def IsIn(self, values):
+        values = np.array(list(values))
+        return Predicate(lambda snapshot, rows: np.isin(snapshot.Values(self.name, rows), values))
+
+    def _Compare(self, compare, value):
+        if isinstance(value, timedelta):
+            value = np.timedelta64(value, 'us')
+        elif isinstance(value, datetime):
+            value = np.datetime64(value, 'us')
+        return Predicate(lambda snapshot, rows: compare(snapshot.Values(self.name, rows), value))
+
+
+Field.MarketCap = Field('MarketCap')
+Field.Sector = Field('Sector')
+Field.IPODate = Field('IPODate')
+Field.IPOAge = Field('IPOAge')
+Field.ROE = Field('ROE')
+Field.NetMargin = Field('NetMargin')
+Field.PERatio = Field('PERatio')
@@ -0,0 +1,279 @@
+from AlgorithmImports import *
+from array import array
+
+
+# Scalar indicators: one object per symbol, with the Update / IsReady / Current.Value interface
+# of LEAN's indicators and the arithmetic of ExponentialMovingAverage, SimpleMovingAverage and
+# RateOfChangePercent. They are plain Python classes, not implementations of LEAN's IIndicator,
+# so they cannot be passed to RegisterIndicator or WarmUpIndicator: keep the LEAN indicators
+# wherever the engine updates them, and use these (or the banks below) only for state the
+# algorithm updates itself, e.g. from a universe selection function or a SessionConsolidator.
+# Update takes either (time, value) or a single data point or bar.
+
+def _Input(input):
+    '''(time, value) of an IndicatorDataPoint or bar'''
+    return getattr(input, 'EndTime', input.Time), input.Value
+
+
+class Ema:
+    '''Exponential moving average with the recurrence of ExponentialMovingAverage: the first
+    sample seeds the average and every later one is blended in as value * k + current * (1 - k),
+    with k = 2 / (period + 1). Ready after period samples.'''
+    __slots__ = ('Name', 'Period', 'k', 'Samples', 'Current')
+
+    def __init__(self, name, period = None):
+        if period is None:
+            name, period = f"EMA{name}", name
+        self.Name = name
+        self.Period = period
+        self.k = 2.0 / (period + 1)
+        self.Reset()
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.Period
+
+    @property
+    def Value(self):
+        return self.Current.Value
+
+    def Update(self, time, value = None):
+        if value is None:
+            time, value = _Input(time)
+        self.Samples += 1
+        if self.Samples == 1:
+            self.Current.Value = value
+        else:
+            self.Current.Value = value * self.k + self.Current.Value * (1 - self.k)
+        self.Current.Time = time
+        return self.Samples >= self.Period
+
+    def Reset(self):
+        self.Samples = 0
+        self.Current = IndicatorDataPoint()
+
+
+class Sma:
+    '''Simple moving average of the last period samples, kept as a rolling sum over a ring
+    buffer like SimpleMovingAverage: each sample is added to the sum before the one leaving
+    the window is subtracted, and until period samples have been seen the average is over
+    those seen so far. Ready after period samples.'''
+    __slots__ = ('Name', 'Period', 'Samples', 'Current', 'window', 'sum')
+
+    def __init__(self, name, period = None, prices = ()):
+        '''Args:
+            name: Indicator name, or the period if no name is given
+            period: Number of samples averaged
+            prices: Samples to warm up with, oldest first'''
+        if period is None:
+            name, period = f"SMA{name}", name
+        self.Name = name
+        self.Period = period
+        self.window = array('d', [0.0]) * period
+        self.Reset()
+        for price in list(prices)[-period:]:
+            self.Update(None, price)
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.Period
+
+    @property
+    def Value(self):
+        return self.Current.Value
+
+    def Update(self, time, value = None):
+        if value is None:
+            time, value = _Input(time)
+        index = self.Samples % self.Period
+        if self.Samples >= self.Period:
+            self.sum = self.sum + value - self.window[index]
+        else:
+            self.sum = self.sum + value
+        self.window[index] = value
+        self.Samples += 1
+        self.Current.Value = self.sum / min(self.Samples, self.Period)
+        self.Current.Time = time
+        return self.Samples >= self.Period
+
+    def Reset(self):
+        self.Samples = 0
+        self.sum = 0.0
+        self.Current = IndicatorDataPoint()
+
+
+class Rocp:
+    '''Rate of change in percent over period samples, like RateOfChangePercent:
+    100 * (value - value period samples ago) / value period samples ago, over a ring buffer
+    of the last period + 1 samples. Until then the change is measured from the oldest sample
+    seen, and a zero base gives 0. Ready after period + 1 samples.'''
+    __slots__ = ('Name', 'Period', 'Samples', 'Current', 'window')
+
+    def __init__(self, name, period = None):
+        if period is None:
+            name, period = f"ROCP{name}", name
+        self.Name = name
+        self.Period = period
+        self.window = array('d', [0.0]) * (period + 1)
+        self.Reset()
+
+    @property
+    def IsReady(self):
+        return self.Samples > self.Period
+
+    @property
+    def Value(self):
+        return self.Current.Value
+
+    def Update(self, time, value = None):
+        if value is None:
+            time, value = _Input(time)
+        size = self.Period + 1
+        index = self.Samples % size
+        self.window[index] = value
+        self.Samples += 1
+        base = self.window[(index + 1) % size] if self.Samples > self.Period else self.window[0]
+        self.Current.Value = 100.0 * (value - base) / base if base != 0 else 0.0
+        self.Current.Time = time
+        return self.Samples > self.Period
+
+    def Reset(self):
+        self.Samples = 0
+        self.Current = IndicatorDataPoint()
+
+
+# Banks: one indicator type for many symbols, one row per symbol in contiguous arrays, all
+# advanced by one vectorized Update per bar. Each row follows exactly the arithmetic of the
+# scalar indicator above, so a bank row and a scalar indicator fed the same samples hold the
+# same values.
+
+class IndicatorBank:
+    '''Rows of per-symbol state; subclasses name their arrays in `arrays`'''
+    arrays = ('samples',)
+
+    def __init__(self, period, capacity = 64):
+        self.Period = period
+        self.Symbols = []
+        self.rowBySymbol = {}
+        self.samples = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.Symbols)
+
+    def Add(self, symbols, values = None):
+        '''Adds (or resets) a row per symbol and warms it up with values, an array of shape
+        (len(symbols), bars) in time order where NaN marks a missing bar. Returns the rows.'''
+        rows = []
+        for symbol in symbols:
+            row = self.rowBySymbol.get(symbol)
+            if row is None:
+                row = len(self.Symbols)
+                if row == len(self.samples):
+                    self._Grow(2 * row)
+                self.Symbols.append(symbol)
+                self.rowBySymbol[symbol] = row
+            rows.append(row)
+        rows = np.array(rows, dtype=np.int64)
+        self._Reset(rows)
+        if values is not None:
+            values = np.asarray(values, dtype=np.float64).reshape(len(rows), -1)
+            for column in values.T:
+                valid = ~np.isnan(column)
+                self.Update(rows[valid], column[valid])
+        return rows
+
+    def Rows(self, symbols):
+        return np.array([self.rowBySymbol[symbol] for symbol in symbols], dtype=np.int64)
+
+    @property
+    def IsReady(self):
+        '''Mask of the rows that are ready'''
+        return self.samples[:len(self.Symbols)] >= self.Period
+
+    def _Reset(self, rows):
+        self.samples[rows] = 0
+
+    def _Grow(self, capacity):
+        for name in self.arrays:
+            current = getattr(self, name)
+            grown = np.zeros((capacity,) + current.shape[1:], dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+
+class EmaBank(IndicatorBank):
+    '''Ema for many symbols'''
+    arrays = ('samples', 'values')
+
+    def __init__(self, period, capacity = 64):
+        super().__init__(period, capacity)
+        self.k = 2.0 / (period + 1)
+        self.values = np.zeros(capacity, dtype=np.float64)
+
+    def Update(self, rows, values):
+        '''Advances the given rows (each at most once) by one sample each'''
+        current = self.values[rows]
+        self.values[rows] = np.where(self.samples[rows] == 0, values, values * self.k + current * (1 - self.k))
+        self.samples[rows] += 1
+
+    @property
+    def Values(self):
+        return self.values[:len(self.Symbols)]
+
+
+class SmaBank(IndicatorBank):
+    '''Sma for many symbols, with a (rows, period) ring buffer'''
+    arrays = ('samples', 'sums', 'window')
+
+    def __init__(self, period, capacity = 64):
+        super().__init__(period, capacity)
+        self.sums = np.zeros(capacity, dtype=np.float64)
+        self.window = np.zeros((capacity, period), dtype=np.float64)
+
+    def Update(self, rows, values):
+        '''Advances the given rows (each at most once) by one sample each'''
+        samples = self.samples[rows]
+        index = samples % self.Period
+        leaving = self.window[rows, index]
+        sums = self.sums[rows] + values
+        self.sums[rows] = np.where(samples >= self.Period, sums - leaving, sums)
+        self.window[rows, index] = values
+        self.samples[rows] = samples + 1
+
+    @property
+    def Values(self):
+        count = len(self.Symbols)
+        return self.sums[:count] / np.clip(self.samples[:count], 1, self.Period)
+
+    def _Reset(self, rows):
+        self.samples[rows] = 0
+        self.sums[rows] = 0.0
+
+
+class RocpBank(IndicatorBank):
+    '''Rocp for many symbols, with a (rows, period + 1) ring buffer'''
+    arrays = ('samples', 'values', 'window')
+
+    def __init__(self, period, capacity = 64):
+        super().__init__(period, capacity)
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.window = np.zeros((capacity, period + 1), dtype=np.float64)
+
+    def Update(self, rows, values):
+        '''Advances the given rows (each at most once) by one sample each'''
+        size = self.Period + 1
+        index = self.samples[rows] % size
+        self.window[rows, index] = values
+        samples = self.samples[rows] + 1
+        self.samples[rows] = samples
+        base = self.window[rows, np.where(samples > self.Period, (index + 1) % size, 0)]
+        change = np.divide(100.0 * (values - base), base, out=np.zeros(len(rows)), where=base != 0)
+        self.values[rows] = change
+
+    @property
+    def IsReady(self):
+        return self.samples[:len(self.Symbols)] > self.Period
+
+    @property
+    def Values(self):
+        return self.values[:len(self.Symbols)]
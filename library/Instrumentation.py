@@ -0,0 +1,190 @@
+from AlgorithmImports import *
+import time as clock
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'error': ERROR, 'off': OFF}
+
+
+class Instrumentation:
+    '''Leveled logging, per-callback timers and counters for an algorithm.
+
+    Messages are %-style templates formatted only when their level is enabled, so a
+    disabled Debug call costs one comparison; hot loops can test IsDebug once and skip
+    even the call. Messages given a key (usually a symbol) can be sampled, 1 in sampleEvery,
+    and capped at maxPerKey per flush interval. Timers, counters and the number of dropped
+    messages are accumulated and written as one compact summary line every flushInterval
+    of algorithm time instead of one line per event.'''
+    def __init__(self,
+                 algorithm,
+                 level = None,
+                 flushInterval = timedelta(days=7),
+                 sampleEvery = 1,
+                 maxPerKey = None,
+                 buffered = False):
+        '''Initializes a new instance of the Instrumentation class
+        Args:
+            algorithm: The algorithm that receives the log lines
+            level: Minimum level logged, a name or number; defaults to the log-level
+                   parameter, or info
+            flushInterval: Algorithm time between two summaries
+            sampleEvery: Log only every n-th keyed message per key
+            maxPerKey: Log at most this many keyed messages per key and flush interval
+            buffered: Hold messages and write them with the summary as one log call'''
+        self.algorithm = algorithm
+        self.level = INFO
+        self.SetLevel(level if level is not None else (algorithm.GetParameter("log-level") or 'info'))
+        self.flushInterval = flushInterval
+        self.sampleEvery = sampleEvery
+        self.maxPerKey = maxPerKey
+        self.buffered = buffered
+
+        self.seenByKey = {}
+        self.loggedByKey = {}
+        self.buffer = []
+        self.counters = {}
+        self.timers = {}
+        self.dropped = 0
+        self.intervalStart = None
+        self.nextFlush = None
+
+    def SetLevel(self, level):
+        self.level = LEVELS[level.lower()] if isinstance(level, str) else level
+        self.IsDebug = self.level <= DEBUG
+        self.IsInfo = self.level <= INFO
+
+    # Logging
+
+    def Debug(self, message, *args, key = None):
+        if self.level <= DEBUG:
+            self._Write(DEBUG, message, args, key)
+
+    def Info(self, message, *args, key = None):
+        if self.level <= INFO:
+            self._Write(INFO, message, args, key)
+
+    def Warning(self, message, *args, key = None):
+        if self.level <= WARNING:
+            self._Write(WARNING, message, args, key)
+
+    def Error(self, message, *args, key = None):
+        if self.level <= ERROR:
+            self._Write(ERROR, message, args, key)
+
+    def _Write(self, level, message, args, key):
+        if key is not None:
+            seen = self.seenByKey[key] = self.seenByKey.get(key, 0) + 1
+            logged = self.loggedByKey.get(key, 0)
+            if (seen - 1) % self.sampleEvery or (self.maxPerKey is not None and logged >= self.maxPerKey):
+                self.dropped += 1
+                return
+            self.loggedByKey[key] = logged + 1
+
+        text = message % args if args else message
+        if self.buffered and level < ERROR:
+            self.buffer.append(text)
+        elif level == DEBUG:
+            self.algorithm.Debug(text)
+        elif level == ERROR:
+            self.algorithm.Error(text)
+        else:
+            self.algorithm.Log(text)
+
+    # Counters and timers
+
+    def Count(self, name, amount = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def Timer(self, name):
+        '''Reusable context manager timing the enclosed block under name'''
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = CallbackTimer(self)
+        return timer
+
+    def Timed(self, name, func):
+        '''Wraps func so every call is timed under name'''
+        timer = self.Timer(name)
+        def timed(*args, **kwargs):
+            start = clock.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timer.Add(clock.perf_counter() - start)
+        return timed
+
+    def Instrument(self, model, *methods):
+        '''Times the framework model's Update (or the given methods) under
+        "<ModelType>.<method>" and returns the model'''
+        for method in methods or ('Update',):
+            setattr(model, method, self.Timed(f"{type(model).__name__}.{method}", getattr(model, method)))
+        return model
+
+    # Summary
+
+    def Flush(self, force = False):
+        '''Writes the summary of the elapsed interval when it is due, or now if force'''
+        time = self.algorithm.Time
+        if self.nextFlush is None:
+            self.intervalStart = time
+            self.nextFlush = time + self.flushInterval
+            if not force:
+                return
+        if not force and time < self.nextFlush:
+            return
+
+        parts = [f"{name} {timer.Summary()}" for name, timer in self.timers.items() if timer.calls]
+        parts += [f"{name}={value}" for name, value in self.counters.items()]
+        if self.dropped:
+            parts.append(f"sampled-out log lines={self.dropped}")
+        if self.buffer:
+            self.algorithm.Log('\n'.join(self.buffer))
+        if parts:
+            self.algorithm.Log(f"[{self.intervalStart:%Y-%m-%d} - {time:%Y-%m-%d}] " + " | ".join(parts))
+
+        self.buffer = []
+        self.counters = {}
+        self.loggedByKey = {}
+        self.dropped = 0
+        for timer in self.timers.values():
+            timer.Reset()
+        self.intervalStart = time
+        self.nextFlush = time + self.flushInterval
+
+
+class CallbackTimer:
+    '''Call count, total and worst wall time of one callback within a flush interval'''
+    __slots__ = ('owner', 'calls', 'total', 'worst', 'start')
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.start = 0.0
+        self.Reset()
+
+    def Reset(self):
+        self.calls = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def Add(self, seconds):
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.worst:
+            self.worst = seconds
+        owner = self.owner
+        if owner.nextFlush is None or owner.algorithm.Time >= owner.nextFlush:
+            owner.Flush()
+
+    def Summary(self):
+        return f"{self.calls}x avg {self.total / self.calls * 1e3:.3f} ms max {self.worst * 1e3:.3f} ms"
+
+    def __enter__(self):
+        self.start = clock.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.Add(clock.perf_counter() - self.start)
+        return False
@@ -0,0 +1,264 @@
+from AlgorithmImports import *
+
+
+class RollingCovariance:
+    '''Sample covariance of the last `window` return vectors. Each new vector costs two
+    rank-1 corrections of the centered scatter matrix (remove the oldest, add the newest),
+    O(N^2) per bar instead of O(window * N^2) for recomputing it. The scatter matrix is
+    recomputed exactly from the window every `window` updates so rounding cannot drift.'''
+    def __init__(self, window, size = 0):
+        self.window = window
+        self.Version = 0
+        self.Reset(np.zeros((0, size)))
+
+    def Reset(self, returns):
+        '''Rebuilds the state from a (bars x assets) array of returns, oldest first'''
+        returns = np.asarray(returns, dtype=np.float64)[-self.window:]
+        self.size = returns.shape[1]
+        self.buffer = np.zeros((self.window, self.size))
+        self.count = len(returns)
+        self.head = self.count % self.window
+        self.buffer[:self.count] = returns
+        self._Recompute()
+
+    def _Recompute(self):
+        rows = self.buffer[:self.count]
+        self.mean = rows.mean(axis=0) if self.count else np.zeros(self.size)
+        centered = rows - self.mean
+        self.scatter = centered.T @ centered
+        self.sinceRecompute = 0
+        self.Version += 1
+
+    def Update(self, returns):
+        '''Adds one return vector, evicting the oldest once the window is full.
+        Returns:
+            Once the window is full, the change of Covariance as [(coefficient, vector)] so that
+            it grew by the sum of coefficient * outer(vector, vector); otherwise None'''
+        x = np.asarray(returns, dtype=np.float64)
+        full = self.count == self.window
+        terms = []
+        if full:
+            # With m' the mean after eviction, old - m = (old - m') (n - 1) / n
+            n = self.count
+            old = self.buffer[self.head]
+            previous = self.mean.copy()
+            self.mean -= (old - previous) / (n - 1)
+            removed = old - self.mean
+            self.scatter -= np.outer(removed, old - previous)
+            self.count -= 1
+            terms.append((-(n - 1) / n / (self.window - 1), removed))
+
+        delta = x - self.mean
+        self.count += 1
+        self.mean += delta / self.count
+        self.scatter += np.outer(delta, x - self.mean)
+        self.buffer[self.head] = x
+        self.head = (self.head + 1) % self.window
+        terms.append(((self.count - 1) / self.count / (self.window - 1), delta))
+
+        self.sinceRecompute += 1
+        if self.sinceRecompute >= self.window:
+            self._Recompute()
+        else:
+            self.Version += 1
+        return terms if full else None
+
+    @property
+    def IsReady(self):
+        return self.count >= 2
+
+    @property
+    def Covariance(self):
+        return self.scatter / (self.count - 1)
+
+
+class CachedPrecision:
+    '''Inverse of a (shrunk) covariance submatrix, kept current under rank-1 changes'''
+    __slots__ = ('Key', 'Columns', 'Precision', 'Target', 'Age')
+
+    def __init__(self, key, columns, precision, target):
+        self.Key = key
+        self.Columns = columns
+        self.Precision = precision
+        self.Target = target
+        self.Age = 0
+
+    def Update(self, terms, scale):
+        '''Applies covariance += scale * coefficient * outer(v, v) for every term by the
+        Sherman-Morrison formula. Returns False when an update is numerically unsafe.'''
+        precision = self.Precision
+        for coefficient, vector in terms:
+            v = vector[self.Columns]
+            pv = precision @ v
+            c = scale * coefficient
+            denominator = 1.0 + c * (v @ pv)
+            if denominator <= 1e-8:
+                return False
+            precision -= (c / denominator) * np.outer(pv, pv)
+        self.Age += 1
+        return True
+
+
+class MeanVariancePortfolioConstructionModel(PortfolioConstructionModel):
+    '''Weights the symbols with an active Up/Down insight by w ~ inverse(S) d, where S is the
+    rolling covariance of daily returns (optionally shrunk towards a scaled identity) and d
+    the insight directions. Weights whose sign contradicts their insight are dropped and the
+    rest scaled to a gross exposure of 1.
+
+    The covariance is updated incrementally once per bar of its resolution. Its shrunk inverse is cached for
+    the current set of symbols and kept exact through the per-bar rank-1 changes with
+    Sherman-Morrison updates, so a rebalance costs O(N^2) instead of an O(N^3) inversion.
+    It is recomputed from scratch when the symbols change and every refactorPeriod bars,
+    which also refreshes the shrinkage target (the average variance).'''
+    def __init__(self,
+                 lookback = 63,
+                 shrinkage = 0.1,
+                 refactorPeriod = 21,
+                 resolution = Resolution.Daily):
+        '''Initializes a new instance of the MeanVariancePortfolioConstructionModel class
+        Args:
+            lookback: Number of daily returns in the covariance window
+            shrinkage: Weight of the scaled identity target, 0 for the sample covariance
+            refactorPeriod: Recompute the cached inverse after this many bars, 1 for every bar
+            resolution: Resolution of the history used to seed added symbols'''
+        self.lookback = lookback
+        self.shrinkage = shrinkage
+        self.refactorPeriod = refactorPeriod
+        self.resolution = resolution
+
+        self.symbols = []
+        self.columnBySymbol = {}
+        self.covariance = RollingCovariance(lookback)
+        self.lastPrices = None
+        self.lastTime = None
+        self.universeChanged = False
+
+        self.activeInsights = {}
+        self.removedSymbols = []
+        self.factorization = None
+        self.Factorizations = 0
+
+    def CreateTargets(self, algorithm, insights):
+        '''Create portfolio targets from the specified insights
+        Args:
+            algorithm: The algorithm instance
+            insights: The insights to create portfolio targets from
+        Returns:
+            An enumerable of portfolio targets to be sent to the execution model'''
+        if self.universeChanged:
+            self.RebuildCovariance(algorithm)
+        elif self._Sample(algorithm.Time) != self.lastTime:
+            self.UpdateCovariance(algorithm)
+
+        time = algorithm.UtcTime
+        for insight in insights:
+            self.activeInsights[insight.Symbol] = insight
+        expired = [symbol for symbol, insight in self.activeInsights.items() if not insight.IsActive(time)]
+        for symbol in expired:
+            del self.activeInsights[symbol]
+
+        if not (insights or expired or self.removedSymbols):
+            return []
+
+        targets = [PortfolioTarget(symbol, 0) for symbol in self.removedSymbols + expired]
+        self.removedSymbols = []
+
+        directional = [x for x in self.activeInsights.values()
+                       if x.Direction != InsightDirection.Flat and x.Symbol in self.columnBySymbol]
+        if not directional or not self.covariance.IsReady:
+            return targets
+
+        symbols = [x.Symbol for x in directional]
+        directions = np.array([x.Direction for x in directional], dtype=np.float64)
+        weights = self.Weights(symbols, directions)
+
+        value = algorithm.Portfolio.TotalPortfolioValue
+        for symbol, weight in zip(symbols, weights.tolist()):
+            price = algorithm.Securities[symbol].Price
+            targets.append(PortfolioTarget(symbol, int(weight * value / price) if price > 0 else 0))
+        return targets
+
+    def Weights(self, symbols, directions):
+        '''Gross-exposure-1 weights for the given symbols and insight directions'''
+        raw = self.Precision(symbols) @ directions
+        raw[np.sign(raw) != directions] = 0.0
+        gross = np.abs(raw).sum()
+        return raw / gross if gross > 0 else raw
+
+    def Precision(self, symbols):
+        '''Inverse of the shrunk covariance of symbols, from the cache when possible'''
+        key = tuple(symbols)
+        cached = self.factorization
+        if cached is not None and cached.Key == key and cached.Age < self.refactorPeriod:
+            return cached.Precision
+
+        columns = np.array([self.columnBySymbol[s] for s in symbols])
+        covariance = self.covariance.Covariance
+        if len(columns) != covariance.shape[0] or not np.array_equal(columns, np.arange(len(columns))):
+            covariance = covariance[np.ix_(columns, columns)]
+        target = max(np.trace(covariance) / len(covariance), 1e-12)
+        if self.shrinkage:
+            covariance = (1 - self.shrinkage) * covariance
+            covariance.flat[::len(covariance) + 1] += self.shrinkage * target
+        try:
+            precision = np.linalg.inv(covariance)
+        except np.linalg.LinAlgError:
+            precision = np.linalg.pinv(covariance)
+
+        self.factorization = CachedPrecision(key, columns, precision, target)
+        self.Factorizations += 1
+        return precision
+
+    def UpdateCovariance(self, algorithm):
+        '''Adds the return since the previous bar of every tracked symbol'''
+        self.lastTime = self._Sample(algorithm.Time)
+        if not self.symbols:
+            return
+        securities = algorithm.Securities
+        prices = np.fromiter((securities[s].Price for s in self.symbols), dtype=np.float64, count=len(self.symbols))
+        if self.lastPrices is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = prices / self.lastPrices - 1.0
+            terms = self.covariance.Update(np.where(np.isfinite(returns), returns, 0.0))
+            if self.factorization is not None:
+                if terms is None or not self.factorization.Update(terms, 1 - self.shrinkage):
+                    self.factorization = None
+        self.lastPrices = prices
+
+    def RebuildCovariance(self, algorithm):
+        '''Reseeds the covariance window of the whole universe from one history request'''
+        self.universeChanged = False
+        self.lastTime = self._Sample(algorithm.Time)
+        self.symbols = sorted(self.columnBySymbol, key=str)
+        self.columnBySymbol = {s: i for i, s in enumerate(self.symbols)}
+        self.factorization = None
+
+        returns = np.zeros((0, len(self.symbols)))
+        if self.symbols:
+            history = algorithm.History(self.symbols, self.lookback + 1, self.resolution)
+            if 'close' in history:
+                closes = history.close.unstack(0).reindex(columns=self.symbols).ffill()
+                returns = np.nan_to_num(closes.pct_change().to_numpy()[1:])
+        self.covariance.Reset(returns)
+
+        securities = algorithm.Securities
+        self.lastPrices = np.fromiter((securities[s].Price for s in self.symbols), dtype=np.float64, count=len(self.symbols))
+
+    def _Sample(self, time):
+        '''Covariance bar containing time: returns are sampled once a day at daily resolution,
+        even when the algorithm receives intraday data'''
+        return time.date() if self.resolution == Resolution.Daily else time
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        '''Event fired each time the we add/remove securities from the data feed
+        Args:
+            algorithm: The algorithm instance that experienced the change in securities
+            changes: The security additions and removals from the algorithm'''
+        for security in changes.AddedSecurities:
+            self.columnBySymbol.setdefault(security.Symbol, None)
+        for security in changes.RemovedSecurities:
+            self.columnBySymbol.pop(security.Symbol, None)
+            if self.activeInsights.pop(security.Symbol, None) is not None:
+                self.removedSymbols.append(security.Symbol)
+        self.universeChanged = True
+
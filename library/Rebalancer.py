@@ -0,0 +1,148 @@
+from AlgorithmImports import *
+
+
+class TargetWeightRebalancer:
+    '''Moves the portfolio to a vector of target weights with the fewest orders. The target
+    quantities (truncated like SetHoldings) are diffed against the current holdings in one
+    vectorized step, and only the differences are ordered:
+
+      - a held position whose weight is within `tolerance` of its target is left alone, and
+        an order smaller than `minimumOrderValue` or `minimumOrderQuantity` is dropped; exits
+        to a zero target are always sent, so no dust is left behind
+      - sells are submitted first and synchronously, so they have filled and freed their
+        cash before the buys are submitted (asynchronously, as one batch)
+      - a target that cannot be priced (not in Securities, or no price yet) is skipped and
+        reported: the symbols of the last call are in Skipped, and each one is logged
+
+    Every rebalance is also priced the way the liquidate-then-SetHoldings loops it replaces
+    would trade it (exit every held target, then buy it back), and the orders and turnover
+    saved against that are counted (and added to the algorithm's instrumentation counters,
+    if it has any).
+
+        self.rebalancer = TargetWeightRebalancer(self, tolerance=0.02)
+        self.rebalancer.Rebalance({symbol: 1 / len(symbols) for symbol in symbols})'''
+    def __init__(self, algorithm, tolerance = 0.01, minimumOrderValue = 0.0, minimumOrderQuantity = 1):
+        '''Initializes a new instance of the TargetWeightRebalancer class
+        Args:
+            algorithm: The algorithm whose portfolio is rebalanced
+            tolerance: No-trade band around each target weight, as a fraction of the portfolio
+            minimumOrderValue: Smallest order, in account currency, worth sending
+            minimumOrderQuantity: Smallest order, in shares, worth sending'''
+        self.algorithm = algorithm
+        self.tolerance = tolerance
+        self.minimumOrderValue = minimumOrderValue
+        self.minimumOrderQuantity = minimumOrderQuantity
+
+        self.Rebalances = 0
+        self.OrdersSubmitted = 0
+        self.OrdersSaved = 0
+        self.TurnoverTraded = 0.0
+        self.TurnoverSaved = 0.0
+        self.TargetsSkipped = 0
+        self.Skipped = []
+
+    def Orders(self, targets, liquidateOthers = True):
+        '''Returns the (symbols, quantities) of the orders moving the portfolio to targets
+        without submitting them
+        Args:
+            targets: Target weight by Symbol
+            liquidateOthers: Also target a weight of zero for every held symbol not in targets'''
+        symbols, weights, prices, held = self._Targets(targets, liquidateOthers)
+        if not len(symbols):
+            return [], np.zeros(0, dtype=np.int64)
+        quantities = self._Diff(weights, prices, held)[0]
+        trade = quantities != 0
+        return [symbol for symbol, t in zip(symbols, trade.tolist()) if t], quantities[trade]
+
+    def Rebalance(self, targets, liquidateOthers = True):
+        '''Submits the orders moving the portfolio to targets, sells before buys; returns their
+        tickets. Targets that cannot be priced are skipped, listed in Skipped and logged.
+        Args:
+            targets: Target weight by Symbol
+            liquidateOthers: Also target a weight of zero for every held symbol not in targets'''
+        symbols, weights, prices, held = self._Targets(targets, liquidateOthers)
+        self._ReportSkipped()
+        if not len(symbols):
+            return []
+        quantities, targetQuantities = self._Diff(weights, prices, held)
+
+        # Market orders are asynchronous, so submitting the sells first is not enough for them
+        # to fill first: the sells block until filled, then the buys go out together, each side
+        # in target order
+        trade = np.flatnonzero(quantities != 0)
+        trade = trade[np.argsort(quantities[trade] > 0, kind='stable')]
+        tickets = [self.algorithm.MarketOrder(symbols[i], int(quantities[i]), asynchronous=bool(quantities[i] > 0))
+                   for i in trade.tolist()]
+
+        # What a liquidate-then-SetHoldings pass over the same targets would have traded
+        naiveOrders = int(np.count_nonzero(held) + np.count_nonzero(targetQuantities))
+        naiveTurnover = float(np.abs(held * prices).sum() + np.abs(targetQuantities * prices).sum())
+        turnover = float(np.abs(quantities[trade] * prices[trade]).sum())
+        self.Rebalances += 1
+        self.OrdersSubmitted += len(trade)
+        self.OrdersSaved += naiveOrders - len(trade)
+        self.TurnoverTraded += turnover
+        self.TurnoverSaved += naiveTurnover - turnover
+
+        log = getattr(self.algorithm, 'instrumentation', None)
+        if log is not None:
+            log.Count("rebalance orders", len(trade))
+            log.Count("rebalance orders saved", naiveOrders - len(trade))
+        return tickets
+
+    def Summary(self):
+        return (f"{self.Rebalances} rebalances: {self.OrdersSubmitted} orders ({self.OrdersSaved} saved), "
+                f"turnover {self.TurnoverTraded:,.0f} ({self.TurnoverSaved:,.0f} saved), "
+                f"{self.TargetsSkipped} targets skipped without a price")
+
+    def _ReportSkipped(self):
+        '''Counts and logs the targets the last _Targets call could not price'''
+        if not self.Skipped:
+            return
+        self.TargetsSkipped += len(self.Skipped)
+        skipped = ", ".join(str(symbol) for symbol in self.Skipped)
+        log = getattr(self.algorithm, 'instrumentation', None)
+        if log is not None:
+            log.Count("rebalance targets skipped", len(self.Skipped))
+            log.Warning("Rebalance skipped %d targets without a price: %s", len(self.Skipped), skipped)
+        else:
+            self.algorithm.Log(f"Rebalance skipped {len(self.Skipped)} targets without a price: {skipped}")
+
+    def _Targets(self, targets, liquidateOthers):
+        '''(symbols, target weights, prices, held quantities) of the targets that can be priced,
+        followed by the held symbols missing from targets when liquidateOthers. The targets that
+        cannot be priced, other than zero weights that are not held, are left in Skipped.'''
+        algorithm = self.algorithm
+        weights = dict(targets)
+        if liquidateOthers:
+            for security in algorithm.Securities.Values:
+                if security.Invested:
+                    weights.setdefault(security.Symbol, 0.0)
+
+        symbols = []
+        securities = []
+        self.Skipped = []
+        for symbol, weight in weights.items():
+            security = algorithm.Securities[symbol] if algorithm.Securities.ContainsKey(symbol) else None
+            if security is not None and security.Price > 0:
+                symbols.append(symbol)
+                securities.append(security)
+            elif weight != 0 or (security is not None and security.Invested):
+                self.Skipped.append(symbol)
+        return (symbols, np.fromiter((weights[symbol] for symbol in symbols), np.float64, len(symbols)),
+                np.fromiter((x.Price for x in securities), np.float64, len(symbols)),
+                np.fromiter((x.Holdings.Quantity for x in securities), np.float64, len(symbols)))
+
+    def _Diff(self, weights, prices, held):
+        '''(order quantities, target quantities) after the tolerance band and minimum order size'''
+        value = self.algorithm.Portfolio.TotalPortfolioValue
+        targetQuantities = np.trunc(weights * value / prices)
+        quantities = targetQuantities - held
+
+        # The band only holds back resizing: entries from flat are subject to the minimum
+        # order size alone, and exits to a zero target are always sent
+        exit = (targetQuantities == 0) & (held != 0)
+        inBand = (np.abs(held * prices / value - weights) <= self.tolerance) & (held != 0)
+        tooSmall = (np.abs(quantities) < self.minimumOrderQuantity) | (np.abs(quantities * prices) < self.minimumOrderValue)
+        quantities[(inBand | tooSmall) & ~exit] = 0
+        return quantities.astype(np.int64), targetQuantities
@@ -0,0 +1,224 @@
+from AlgorithmImports import *
+
+
+class RollingMoments:
+    '''Mean and population standard deviation of the last `period` prices of many symbols.
+    Each symbol owns one column of a (period x capacity) ring buffer plus its running mean
+    and sum of squared deviations, updated with the windowed Welford recurrence: a full
+    window swaps the oldest price for the newest in O(1), whatever the period. All symbols
+    with a new price are updated in one vectorized step, and the moments are recomputed
+    exactly from the buffer every `period` steps so rounding cannot drift.'''
+    def __init__(self, period, capacity = 64):
+        self.period = period
+        self.Symbols = []
+        self.rowBySymbol = {}
+        self.freeRows = []
+        self.buffer = np.zeros((period, capacity))
+        self.head = np.zeros(capacity, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.mean = np.zeros(capacity)
+        self.m2 = np.zeros(capacity)
+        self.last = np.full(capacity, np.nan)
+        self.sinceRecompute = 0
+
+    def Add(self, symbols, closes = None):
+        '''Allocates a row per symbol and seeds it from a (bars x symbols) array of closes,
+        oldest first, where NaN marks a missing bar. Returns the rows.'''
+        rows = np.array([self._Row(symbol) for symbol in symbols], dtype=np.int64)
+        self.buffer[:, rows] = 0.0
+        self.head[rows] = 0
+        self.count[rows] = 0
+        self.last[rows] = np.nan
+        if closes is not None:
+            for row, column in zip(rows.tolist(), np.asarray(closes, dtype=np.float64).T):
+                values = column[~np.isnan(column)][-self.period:]
+                self.buffer[:len(values), row] = values
+                self.count[row] = len(values)
+                self.head[row] = len(values) % self.period
+                if len(values):
+                    self.last[row] = values[-1]
+        self._Recompute(rows)
+        return rows
+
+    def Remove(self, symbol):
+        row = self.rowBySymbol.pop(symbol, None)
+        if row is not None:
+            self.Symbols[row] = None
+            self.freeRows.append(row)
+
+    def Update(self, rows, prices):
+        '''Pushes one price for each of the distinct rows'''
+        head = self.head[rows]
+        count = self.count[rows]
+        mean = self.mean[rows]
+        m2 = self.m2[rows]
+        old = self.buffer[head, rows]
+        full = count == self.period
+
+        # Growing window: classic Welford. Full window: replace the oldest value.
+        n = np.where(full, count, count + 1)
+        delta = np.where(full, prices - old, prices - mean)
+        newMean = mean + delta / n
+        m2 += np.where(full, (prices - old) * (prices - newMean + old - mean), delta * (prices - newMean))
+
+        self.mean[rows] = newMean
+        self.m2[rows] = np.maximum(m2, 0.0)
+        self.count[rows] = n
+        self.buffer[head, rows] = prices
+        self.head[rows] = (head + 1) % self.period
+        self.last[rows] = prices
+
+        self.sinceRecompute += 1
+        if self.sinceRecompute >= self.period:
+            self._Recompute(np.flatnonzero(self.count[:len(self.Symbols)]))
+
+    def IsReady(self, rows):
+        return self.count[rows] == self.period
+
+    def Mean(self, rows):
+        return self.mean[rows]
+
+    def StandardDeviation(self, rows):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.sqrt(self.m2[rows] / self.count[rows])
+
+    def _Recompute(self, rows):
+        self.sinceRecompute = 0
+        if len(rows) == 0:
+            return
+        values = self.buffer[:, rows]
+        valid = np.arange(self.period)[:, None] < self.count[rows][None, :]
+        count = np.maximum(self.count[rows], 1)
+        mean = np.where(valid, values, 0.0).sum(axis=0) / count
+        self.mean[rows] = mean
+        self.m2[rows] = np.where(valid, (values - mean) ** 2, 0.0).sum(axis=0)
+
+    def _Row(self, symbol):
+        row = self.rowBySymbol.get(symbol)
+        if row is not None:
+            return row
+        if self.freeRows:
+            row = self.freeRows.pop()
+            self.Symbols[row] = symbol
+        else:
+            row = len(self.Symbols)
+            self.Symbols.append(symbol)
+            if row == len(self.count):
+                self._Grow()
+        self.rowBySymbol[symbol] = row
+        return row
+
+    def _Grow(self):
+        size = 2 * len(self.count)
+        buffer = np.zeros((self.period, size))
+        buffer[:, :self.buffer.shape[1]] = self.buffer
+        self.buffer = buffer
+        for name, fill in (('head', 0), ('count', 0), ('mean', 0.0), ('m2', 0.0), ('last', np.nan)):
+            current = getattr(self, name)
+            grown = np.full(size, fill, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+
+class StdDevExecutionModel(ExecutionModel):
+    '''Works each portfolio target towards completion with market orders placed only when
+    the price has moved `deviations` standard deviations in our favour from its rolling
+    mean: below mean - k * std when buying, above mean + k * std when selling. Each order
+    is at most maximumOrderValue in size; targets carry over until they are filled.
+    Targets of symbols that have left the universe are executed immediately.'''
+    def __init__(self,
+                 period = 60,
+                 deviations = 2,
+                 resolution = Resolution.Minute,
+                 maximumOrderValue = 20000):
+        '''Initializes a new instance of the StdDevExecutionModel class
+        Args:
+            period: Number of bars in the rolling mean and standard deviation
+            deviations: Distance from the mean, in standard deviations, that triggers an order
+            resolution: Resolution of the bars and of the warm-up history
+            maximumOrderValue: Largest value of a single order'''
+        self.period = period
+        self.deviations = deviations
+        self.resolution = resolution
+        self.maximumOrderValue = maximumOrderValue
+        self.moments = RollingMoments(period)
+        self.targetsBySymbol = {}
+        self.lastTime = None
+
+    def Execute(self, algorithm, targets):
+        '''Updates the rolling moments with the current bars and places the orders
+        Args:
+            algorithm: The algorithm instance
+            targets: The portfolio targets to be ordered'''
+        if algorithm.Time != self.lastTime:
+            self.lastTime = algorithm.Time
+            self.UpdateMoments(algorithm)
+
+        for target in targets:
+            self.targetsBySymbol[target.Symbol] = target
+        if not self.targetsBySymbol:
+            return
+
+        symbols = []
+        rows = []
+        for symbol in list(self.targetsBySymbol):
+            row = self.moments.rowBySymbol.get(symbol)
+            if row is None:
+                quantity = self.Unordered(algorithm, symbol)
+                if quantity != 0:
+                    algorithm.MarketOrder(symbol, quantity)
+                del self.targetsBySymbol[symbol]
+            else:
+                symbols.append(symbol)
+                rows.append(row)
+        if not rows:
+            return
+
+        rows = np.array(rows)
+        unordered = np.fromiter((self.Unordered(algorithm, s) for s in symbols), dtype=np.float64, count=len(symbols))
+        price = self.moments.last[rows]
+        mean = self.moments.Mean(rows)
+        band = self.deviations * self.moments.StandardDeviation(rows)
+        ready = self.moments.IsReady(rows)
+        favourable = ready & (((unordered > 0) & (price < mean - band)) | ((unordered < 0) & (price > mean + band)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            limit = np.floor(self.maximumOrderValue / price)
+        quantity = np.sign(unordered) * np.minimum(np.abs(unordered), limit)
+
+        for i in np.flatnonzero(unordered == 0).tolist():
+            del self.targetsBySymbol[symbols[i]]
+        for i in np.flatnonzero(favourable & (quantity != 0)).tolist():
+            algorithm.MarketOrder(symbols[i], int(quantity[i]))
+            if quantity[i] == unordered[i]:
+                del self.targetsBySymbol[symbols[i]]
+
+    def Unordered(self, algorithm, symbol):
+        '''Quantity still needed to reach the target of symbol'''
+        return self.targetsBySymbol[symbol].Quantity - algorithm.Portfolio[symbol].Quantity
+
+    def UpdateMoments(self, algorithm):
+        '''Pushes the closes of the current slice into the rolling moments in one step'''
+        data = algorithm.CurrentSlice
+        if data is None:
+            return
+        rowBySymbol = self.moments.rowBySymbol
+        bars = [(rowBySymbol[symbol], bar.Close) for symbol, bar in data.Bars.items() if symbol in rowBySymbol]
+        if bars:
+            rows = np.fromiter((row for row, _ in bars), dtype=np.int64, count=len(bars))
+            closes = np.fromiter((close for _, close in bars), dtype=np.float64, count=len(bars))
+            self.moments.Update(rows, closes)
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        '''Event fired each time the we add/remove securities from the data feed
+        Args:
+            algorithm: The algorithm instance that experienced the change in securities
+            changes: The security additions and removals from the algorithm'''
+        for security in changes.RemovedSecurities:
+            self.moments.Remove(security.Symbol)
+
+        # Warm up every added symbol from a single history request
+        symbols = [x.Symbol for x in changes.AddedSecurities]
+        if symbols:
+            history = algorithm.History(symbols, self.period, self.resolution)
+            closes = history.close.unstack(0).reindex(columns=symbols).to_numpy() if 'close' in history else None
+            self.moments.Add(symbols, closes)
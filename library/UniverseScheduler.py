@@ -0,0 +1,216 @@
+from AlgorithmImports import *
+from datetime import date, time as clock
+
+
+class TradingCalendar:
+    '''US equity trading days: weekdays other than the regular NYSE holidays (observed on the
+    nearest weekday). One-off closures such as national days of mourning are not included.
+    Regular sessions run 9:30 to 16:00, or to 13:00 on the early-close days.'''
+    SessionOpenTime = clock(9, 30)
+    SessionCloseTime = clock(16, 0)
+    EarlyCloseTime = clock(13, 0)
+
+    def __init__(self, firstYear = 1990, lastYear = 2050):
+        holidays = [day for year in range(firstYear, lastYear + 1) for day in UsEquityHolidays(year)]
+        self.busdaycalendar = np.busdaycalendar(holidays=np.array(holidays, dtype='datetime64[D]'))
+        self.earlyCloses = {day for year in range(firstYear, lastYear + 1) for day in UsEquityEarlyCloses(year)}
+
+    def IsTradingDay(self, time):
+        return bool(np.is_busday(np.datetime64(time.date(), 'D'), busdaycal=self.busdaycalendar))
+
+    def TradingDayIndex(self, time):
+        '''Number of trading days between 1970-01-01 and time'''
+        return int(np.busday_count(np.datetime64('1970-01-01', 'D'), np.datetime64(time.date(), 'D'),
+                                   busdaycal=self.busdaycalendar))
+
+    def Session(self, time):
+        '''(open, close) datetimes of the regular session on the day of time, or None if it
+        is not a trading day'''
+        if not self.IsTradingDay(time):
+            return None
+        day = time.date()
+        close = self.EarlyCloseTime if day in self.earlyCloses else self.SessionCloseTime
+        return datetime.combine(day, self.SessionOpenTime), datetime.combine(day, close)
+
+
+def UsEquityHolidays(year):
+    def nth(month, weekday, n):
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+    def last(month, weekday):
+        following = date(year + month // 12, month % 12 + 1, 1)
+        return following - timedelta(days=(following.weekday() - weekday - 1) % 7 + 1)
+
+    def observed(day):
+        return day + timedelta(days={5: -1, 6: 1}.get(day.weekday(), 0))
+
+    holidays = [nth(2, 0, 3), GoodFriday(year), last(5, 0), observed(date(year, 7, 4)), nth(9, 0, 1),
+                nth(11, 3, 4), observed(date(year, 12, 25))]
+    # A Saturday New Year's Day is not observed on the Friday before
+    newYear = date(year, 1, 1)
+    if newYear.weekday() != 5:
+        holidays.append(observed(newYear))
+    if year >= 1998:
+        holidays.append(nth(1, 0, 3))
+    if year >= 2022:
+        holidays.append(observed(date(year, 6, 19)))
+    return holidays
+
+
+def UsEquityEarlyCloses(year):
+    '''Days the NYSE closes at 13:00: the day after Thanksgiving, and July 3 and December 24
+    when they fall on Monday to Thursday (on a Friday they are the observed holiday instead)'''
+    thanksgiving = date(year, 11, 1) + timedelta(days=(3 - date(year, 11, 1).weekday()) % 7 + 21)
+    days = [thanksgiving + timedelta(days=1)]
+    for day in (date(year, 7, 3), date(year, 12, 24)):
+        if day.weekday() <= 3:
+            days.append(day)
+    return days
+
+
+def GoodFriday(year):
+    '''Friday before Western Easter, by the anonymous Gregorian algorithm'''
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    day = (h + l - 7 * m + 33 * month + 19) % 32
+    return date(year, month, day) - timedelta(days=2)
+
+
+class Cadence:
+    '''How often a universe is reselected. Every time is mapped to the key of the period it
+    falls in; a selection is due on the first trading day whose key differs from the key of
+    the last selection.'''
+    def __init__(self, unit, count = 1):
+        self.unit = unit
+        self.count = count
+
+    @staticmethod
+    def Daily():
+        return Cadence('trading days', 1)
+
+    @staticmethod
+    def EveryTradingDays(count):
+        return Cadence('trading days', count)
+
+    @staticmethod
+    def Weekly(count = 1):
+        return Cadence('weeks', count)
+
+    @staticmethod
+    def Monthly(count = 1):
+        return Cadence('months', count)
+
+    @staticmethod
+    def Quarterly():
+        return Cadence('months', 3)
+
+    def Key(self, time, calendar):
+        if self.unit == 'trading days':
+            return calendar.TradingDayIndex(time) // self.count
+        if self.unit == 'weeks':
+            # date.toordinal() is 1 on Monday 0001-01-01, so weeks start on Mondays
+            return (time.toordinal() - 1) // 7 // self.count
+        return (time.year * 12 + time.month - 1) // self.count
+
+    def __repr__(self):
+        return f"Cadence({self.unit}, {self.count})"
+
+
+class UniverseScheduler:
+    '''Runs coarse and fine selection functions on a declarative cadence. On days that are
+    not due, or are not trading days, the wrapped coarse function returns Universe.Unchanged
+    without enumerating the coarse data. The last coarse and fine outputs are memoized with
+    the key of the period they were selected in, and the selections run and skipped are
+    counted (and added to the algorithm's instrumentation counters, if it has any).
+
+        self.universeScheduler = UniverseScheduler(self, Cadence.Quarterly())
+        self.AddUniverse(*self.universeScheduler.Schedule(self.CoarseSelectionFunction, self.FineSelectionFunction))
+        self.SetPortfolioConstruction(EqualWeightingPortfolioConstructionModel(self.universeScheduler.RebalanceFunction()))'''
+    def __init__(self, algorithm, cadence, calendar = None):
+        '''Initializes a new instance of the UniverseScheduler class
+        Args:
+            algorithm: The algorithm whose Time drives the schedule
+            cadence: The Cadence of the selections
+            calendar: Trading calendar, defaults to the US equity calendar'''
+        self.algorithm = algorithm
+        self.cadence = cadence
+        self.calendar = calendar if calendar is not None else TradingCalendar()
+
+        # (period key, output) of the last coarse and fine selections
+        self.LastCoarse = (None, None)
+        self.LastFine = (None, None)
+
+        self.coarseRuns = 0
+        self.coarseSkipped = 0
+        self.fineRuns = 0
+        self.fineSkipped = 0
+
+    def PeriodKey(self, time):
+        '''Key of the period containing time, or None if time is not a trading day'''
+        if not self.calendar.IsTradingDay(time):
+            return None
+        return self.cadence.Key(time, self.calendar)
+
+    def Schedule(self, coarseSelection, fineSelection = None):
+        '''Returns the selection functions to splat into AddUniverse: (coarse, fine), or
+        (coarse,) when there is no fine selection, since AddUniverse(coarse, None) is rejected'''
+        def coarse(data):
+            key = self.PeriodKey(self.algorithm.Time)
+            if key is None or key == self.LastCoarse[0]:
+                self._Skipped('coarse')
+                return Universe.Unchanged
+            symbols = coarseSelection(data)
+            if symbols is not Universe.Unchanged:
+                symbols = list(symbols)
+                self.LastCoarse = (key, symbols)
+            self.coarseRuns += 1
+            return symbols
+
+        def fine(data):
+            # Fine selection only follows a coarse selection that ran, so it is skipped only
+            # when it is asked again within the period it already selected for
+            key = self.LastCoarse[0]
+            if key == self.LastFine[0]:
+                self._Skipped('fine')
+                return self.LastFine[1]
+            symbols = fineSelection(data)
+            if symbols is not Universe.Unchanged:
+                symbols = list(symbols)
+                self.LastFine = (key, symbols)
+            self.fineRuns += 1
+            return symbols
+
+        return (coarse, fine) if fineSelection is not None else (coarse,)
+
+    def RebalanceFunction(self):
+        '''Returns a rebalance function for a portfolio construction model that returns the
+        time on the first trading day of every period, and None otherwise. Each call returns
+        a function with its own state, so it does not interfere with the universe selection.'''
+        lastKey = [None]
+        def rebalance(time):
+            key = self.PeriodKey(time)
+            if key is None or key == lastKey[0]:
+                return None
+            lastKey[0] = key
+            return time
+        return rebalance
+
+    def Summary(self):
+        return (f"{self.cadence}: coarse {self.coarseRuns} run / {self.coarseSkipped} skipped, "
+                f"fine {self.fineRuns} run / {self.fineSkipped} skipped")
+
+    def _Skipped(self, stage):
+        if stage == 'coarse':
+            self.coarseSkipped += 1
+        else:
+            self.fineSkipped += 1
+        log = getattr(self.algorithm, 'instrumentation', None)
+        if log is not None:
+            log.Count(f"{stage} selections skipped")
@@ -0,0 +1,185 @@
+from AlgorithmImports import *
+
+
+class SessionVwap:
+    '''Intraday volume weighted average price of many symbols. Each symbol owns one row of
+    flat arrays holding the session's cumulative price * volume and volume, so a bar of the
+    whole universe is folded in with one vectorized step. The state resets when the
+    session (the bar's date) changes.'''
+    def __init__(self, capacity = 64):
+        self.Symbols = []
+        self.rowBySymbol = {}
+        self.freeRows = []
+        self.priceVolume = np.zeros(capacity)
+        self.volume = np.zeros(capacity)
+        self.lastPrice = np.full(capacity, np.nan)
+        self.lastVolume = np.zeros(capacity)
+        self.session = None
+
+    def Add(self, symbol):
+        '''Returns the row of symbol, allocating one if needed'''
+        row = self.rowBySymbol.get(symbol)
+        if row is not None:
+            return row
+        if self.freeRows:
+            row = self.freeRows.pop()
+            self.Symbols[row] = symbol
+        else:
+            row = len(self.Symbols)
+            self.Symbols.append(symbol)
+            if row == len(self.volume):
+                self._Grow()
+        self.rowBySymbol[symbol] = row
+        self._Clear([row])
+        return row
+
+    def Remove(self, symbol):
+        row = self.rowBySymbol.pop(symbol, None)
+        if row is not None:
+            self.Symbols[row] = None
+            self.freeRows.append(row)
+
+    def Update(self, session, rows, prices, volumes, closes):
+        '''Folds one bar per row into the session totals
+        Args:
+            session: Session key of the bars, e.g. their date
+            rows: Distinct rows of the symbols with a bar
+            prices: Typical price of each bar, (high + low + close) / 3
+            volumes: Volume of each bar
+            closes: Last traded price of each bar'''
+        if session != self.session:
+            self.session = session
+            self._Clear(slice(None))
+        self.priceVolume[rows] += prices * volumes
+        self.volume[rows] += volumes
+        self.lastPrice[rows] = closes
+        self.lastVolume[rows] = volumes
+
+    def Vwap(self, rows):
+        '''Session VWAP of rows, NaN where no volume has traded yet'''
+        volume = self.volume[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(volume > 0, self.priceVolume[rows] / volume, np.nan)
+
+    def _Clear(self, rows):
+        self.priceVolume[rows] = 0.0
+        self.volume[rows] = 0.0
+        self.lastPrice[rows] = np.nan
+        self.lastVolume[rows] = 0.0
+
+    def _Grow(self):
+        size = 2 * len(self.volume)
+        for name, fill in (('priceVolume', 0.0), ('volume', 0.0), ('lastPrice', np.nan), ('lastVolume', 0.0)):
+            grown = np.full(size, fill)
+            grown[:len(getattr(self, name))] = getattr(self, name)
+            setattr(self, name, grown)
+
+
+class VwapExecutionModel(ExecutionModel):
+    '''Works each portfolio target towards completion with child market orders placed only
+    while the price is favourable relative to the session VWAP: at or below it when buying,
+    at or above it when selling. A child order is at most maximumOrderQuantityPercentVolume
+    of the bar's volume; targets carry over to later bars until they are filled.
+    Targets of symbols that have left the universe are executed immediately.
+
+    The VWAP needs intraday bars, so subscribe at minute (or hour) resolution. Fed daily
+    bars, the VWAP of a session is just its one bar's typical price, so the model logs a
+    warning once and executes every target immediately instead.'''
+    def __init__(self, maximumOrderQuantityPercentVolume = 0.01):
+        '''Initializes a new instance of the VwapExecutionModel class
+        Args:
+            maximumOrderQuantityPercentVolume: Largest child order as a fraction of the bar volume'''
+        self.maximumOrderQuantityPercentVolume = maximumOrderQuantityPercentVolume
+        self.vwap = SessionVwap()
+        self.targetsBySymbol = {}
+        self.lastTime = None
+        # True once the feed is found to carry one bar per session
+        self.sessionBars = False
+
+    def Execute(self, algorithm, targets):
+        '''Updates the session VWAP with the current bars and places the child orders
+        Args:
+            algorithm: The algorithm instance
+            targets: The portfolio targets to be ordered'''
+        if algorithm.Time != self.lastTime:
+            self.lastTime = algorithm.Time
+            self.UpdateVwap(algorithm)
+
+        for target in targets:
+            self.targetsBySymbol[target.Symbol] = target
+        if not self.targetsBySymbol:
+            return
+
+        if self.sessionBars:
+            for symbol in list(self.targetsBySymbol):
+                quantity = self.Unordered(algorithm, symbol)
+                if quantity != 0:
+                    algorithm.MarketOrder(symbol, quantity)
+            self.targetsBySymbol.clear()
+            return
+
+        symbols = []
+        rows = []
+        for symbol in list(self.targetsBySymbol):
+            row = self.vwap.rowBySymbol.get(symbol)
+            if row is None:
+                quantity = self.Unordered(algorithm, symbol)
+                if quantity != 0:
+                    algorithm.MarketOrder(symbol, quantity)
+                del self.targetsBySymbol[symbol]
+            else:
+                symbols.append(symbol)
+                rows.append(row)
+        if not rows:
+            return
+
+        rows = np.array(rows)
+        unordered = np.fromiter((self.Unordered(algorithm, s) for s in symbols), dtype=np.float64, count=len(symbols))
+        price = self.vwap.lastPrice[rows]
+        vwap = self.vwap.Vwap(rows)
+        favourable = ((unordered > 0) & (price <= vwap)) | ((unordered < 0) & (price >= vwap))
+        limit = np.floor(self.maximumOrderQuantityPercentVolume * self.vwap.lastVolume[rows])
+        child = np.sign(unordered) * np.minimum(np.abs(unordered), limit)
+
+        for i in np.flatnonzero(unordered == 0).tolist():
+            del self.targetsBySymbol[symbols[i]]
+        for i in np.flatnonzero(favourable & (child != 0)).tolist():
+            algorithm.MarketOrder(symbols[i], int(child[i]))
+            if child[i] == unordered[i]:
+                del self.targetsBySymbol[symbols[i]]
+
+    def Unordered(self, algorithm, symbol):
+        '''Quantity still needed to reach the target of symbol'''
+        return self.targetsBySymbol[symbol].Quantity - algorithm.Portfolio[symbol].Quantity
+
+    def UpdateVwap(self, algorithm):
+        '''Folds the bars of the current slice into the session VWAP in one step'''
+        data = algorithm.CurrentSlice
+        if data is None:
+            return
+        rowBySymbol = self.vwap.rowBySymbol
+        bars = [(rowBySymbol[symbol], bar) for symbol, bar in data.Bars.items() if symbol in rowBySymbol]
+        if not bars:
+            return
+        if not self.sessionBars and bars[0][1].Period >= timedelta(days=1):
+            self.sessionBars = True
+            algorithm.Log("VwapExecutionModel: daily bars have no intraday VWAP, executing targets immediately; "
+                          "subscribe at minute resolution to work orders against the VWAP")
+            return
+        count = len(bars)
+        rows = np.fromiter((row for row, _ in bars), dtype=np.int64, count=count)
+        high = np.fromiter((bar.High for _, bar in bars), dtype=np.float64, count=count)
+        low = np.fromiter((bar.Low for _, bar in bars), dtype=np.float64, count=count)
+        close = np.fromiter((bar.Close for _, bar in bars), dtype=np.float64, count=count)
+        volume = np.fromiter((bar.Volume for _, bar in bars), dtype=np.float64, count=count)
+        self.vwap.Update(algorithm.Time.date(), rows, (high + low + close) / 3, volume, close)
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        '''Event fired each time the we add/remove securities from the data feed
+        Args:
+            algorithm: The algorithm instance that experienced the change in securities
+            changes: The security additions and removals from the algorithm'''
+        for security in changes.AddedSecurities:
+            self.vwap.Add(security.Symbol)
+        for security in changes.RemovedSecurities:
+            self.vwap.Remove(security.Symbol)
@@ -0,0 +1,43 @@
+import numpy as np
+import tensorflow as tf
+
+
+class Forecaster:
+    '''Autoregressive multi-step forecasts for many tickers at once.
+
+    The whole rollout runs inside one compiled tf.function: each step calls the model
+    directly on the (tickers, look_back) window batch, writes the next value of every
+    ticker into a preallocated TensorArray and shifts the windows, so a forecast costs
+    one graph execution instead of one model.predict dispatch per step and ticker.'''
+
+    def __init__(self, model, look_back):
+        self.model = model
+        self.look_back = look_back
+        self._rollout = tf.function(self._rollout_steps, input_signature=[
+            tf.TensorSpec([None, look_back], tf.float32),
+            tf.TensorSpec([], tf.int32)])
+
+    def _rollout_steps(self, window, steps):
+        outputs = tf.TensorArray(tf.float32, size=steps)
+        for step in tf.range(steps):
+            next_value = self.model(window[:, :, None], training=False)[:, 0]
+            outputs = outputs.write(step, next_value)
+            window = tf.concat([window[:, 1:], next_value[:, None]], axis=1)
+        return tf.transpose(outputs.stack())
+
+    def forecast(self, histories, num_prediction, out=None):
+        '''Forecasts num_prediction steps past the end of each history.
+        Args:
+            histories: One close series per ticker, each at least look_back long
+            num_prediction: Number of steps to forecast
+            out: Optional (tickers, num_prediction + 1) float64 buffer to write into
+        Returns:
+            (tickers, num_prediction + 1) array: the last known close followed by the forecast'''
+        windows = np.stack([np.asarray(h, dtype=np.float32).reshape(-1)[-self.look_back:] for h in histories])
+        if out is None:
+            out = np.empty((len(windows), num_prediction + 1), dtype=np.float64)
+
+        out[:, 0] = [np.asarray(h).reshape(-1)[-1] for h in histories]
+        if num_prediction > 0:
+            out[:, 1:] = self._rollout(tf.constant(windows), tf.constant(num_prediction, dtype=tf.int32)).numpy()
+        return out
@@ -0,0 +1,268 @@
+# Headless forecast server: loads a trained stockforecast model once and serves forecasts over
+# HTTP, on a local port or a Unix socket. Concurrent requests are merged into one batched
+# Forecaster rollout: the first waiting request opens a window of at most --max-wait-ms, and
+# every request arriving within it (up to --max-batch tickers) shares the same model calls.
+#
+#   python machine-learning/serve.py --weights models/TSLA --data machine-learning [--port 8765 | --socket /tmp/forecast.sock]
+#
+#   GET /forecast?ticker=TSLA&ticker=AAPL&steps=30   {"TSLA": [last close, step 1, ...], ...}
+#   GET /plot?ticker=TSLA&steps=30                   HTML chart of the history and forecast (imports Plotly)
+#   GET /metrics                                     request count, p50/p99 latency, batch sizes
+#
+# A bad request (missing ticker, steps not an integer from 1 to --max-steps, a history shorter
+# than the model's look-back) is answered 400 before it joins a batch, an unknown ticker 404.
+# If a batched model call fails, its requests are rerun one by one so only the failing ones
+# get the error (500).
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from forecast import Forecaster
+from train import SPEC, build_model, read_json
+from windowed_dataset import load_series
+
+
+class ForecastError(RuntimeError):
+    '''The model call of a forecast request failed'''
+
+
+class MicroBatcher:
+    '''Merges forecast requests from many threads into batched Forecaster calls on one thread'''
+
+    def __init__(self, forecaster, max_batch=64, max_wait=0.005, max_steps=1000, samples=10000):
+        self.forecaster = forecaster
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_steps = max_steps
+        self.requests = queue.Queue()
+        # Latencies and batch sizes of the most recent requests and batches
+        self.latencies = deque(maxlen=samples)
+        self.batch_sizes = deque(maxlen=samples)
+        self.count = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, histories, steps):
+        '''Future of the (len(histories), steps + 1) forecast of histories. Raises ValueError
+        before queueing a request the forecaster could not run, so it never joins a batch.'''
+        if isinstance(steps, bool) or not isinstance(steps, (int, np.integer)) or not 1 <= steps <= self.max_steps:
+            raise ValueError(f"steps must be an integer from 1 to {self.max_steps}, got {steps!r}")
+        if not histories:
+            raise ValueError("no histories to forecast")
+        look_back = self.forecaster.look_back
+        for history in histories:
+            if len(history) < look_back:
+                raise ValueError(f"a history has {len(history)} closes, the model needs at least {look_back}")
+        future = Future()
+        self.requests.put((histories, int(steps), future, time.perf_counter()))
+        return future
+
+    def forecast(self, histories, steps):
+        return self.submit(histories, steps).result()
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            tickers = len(batch[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while tickers < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                tickers += len(request[0])
+            try:
+                self._forecast(batch)
+            except Exception as error:
+                # Never leave a caller waiting, and keep the batching thread alive
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(ForecastError(f"{type(error).__name__}: {error}"))
+
+    def _forecast(self, batch):
+        # One rollout to the longest horizon asked for; shorter requests get a prefix of it
+        histories = [history for request in batch for history in request[0]]
+        steps = max(request[1] for request in batch)
+        try:
+            out = self.forecaster.forecast(histories, steps)
+        except Exception as error:
+            if len(batch) == 1:
+                batch[0][2].set_exception(ForecastError(f"{type(error).__name__}: {error}"))
+                return
+            # Rerun the requests one at a time, so only the ones that fail see an error
+            for request in batch:
+                self._forecast([request])
+            return
+        done = time.perf_counter()
+        first = 0
+        with self.lock:
+            self.batch_sizes.append(len(histories))
+            for request, request_steps, future, submitted in batch:
+                future.set_result(out[first:first + len(request), :request_steps + 1])
+                first += len(request)
+                self.latencies.append(done - submitted)
+                self.count += 1
+
+    def metrics(self):
+        with self.lock:
+            latencies = np.array(self.latencies) * 1e3
+            batch_sizes = np.array(self.batch_sizes)
+            count = self.count
+        if not len(latencies):
+            return {'requests': count}
+        return {'requests': count, 'batches': len(batch_sizes),
+                'p50_ms': float(np.percentile(latencies, 50)), 'p99_ms': float(np.percentile(latencies, 99)),
+                'mean_batch_size': float(batch_sizes.mean()), 'max_batch_size': int(batch_sizes.max())}
+
+
+class ForecastService:
+    '''The model, the close series of the tickers asked for so far and the batcher'''
+
+    def __init__(self, weights, data, max_batch=64, max_wait=0.005, max_steps=1000):
+        '''Args:
+            weights: Weights file, or a train.py cache directory whose latest.json names them
+            data: Directory of price CSVs named after their tickers'''
+        spec = SPEC
+        if os.path.isdir(weights):
+            meta = read_json(os.path.join(weights, 'latest.json'))
+            spec = meta['spec']
+            weights = os.path.join(weights, meta['weights'])
+        model = build_model(spec['look_back'], spec['units'])
+        model.load_weights(weights)
+        self.data = data
+        self.series = {}
+        self.batcher = MicroBatcher(Forecaster(model, spec['look_back']), max_batch, max_wait, max_steps)
+
+    def history(self, ticker):
+        '''(dates, close) of ticker, memory-mapped from the bar store on first use'''
+        series = self.series.get(ticker)
+        if series is None:
+            path = os.path.join(self.data, f"{os.path.basename(ticker)}.csv")
+            if not os.path.exists(path):
+                raise KeyError(ticker)
+            series = self.series[ticker] = load_series(path)
+        return series
+
+    def forecast(self, tickers, steps):
+        if not tickers:
+            raise ValueError("missing ticker")
+        out = self.batcher.forecast([self.history(ticker)[1] for ticker in tickers], steps)
+        return {ticker: values.tolist() for ticker, values in zip(tickers, out)}
+
+    def plot(self, ticker, steps):
+        import pandas as pd
+        import plotly.graph_objects as go
+
+        dates, close = self.history(ticker)
+        forecast = self.forecast([ticker], steps)[ticker]
+        fig = go.Figure(data=[
+            go.Scatter(x=dates, y=close, mode='lines', name='Data'),
+            go.Scatter(x=pd.date_range(dates[-1], periods=steps + 1), y=forecast, mode='lines', name='Forecast')],
+            layout=go.Layout(title=ticker, xaxis={'title': "Date"}, yaxis={'title': "Close"}))
+        return fig.to_html(include_plotlyjs='cdn')
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        try:
+            if url.path == '/forecast':
+                self._send(200, json.dumps(self.service.forecast(query.get('ticker', []), self._steps(query))))
+            elif url.path == '/plot':
+                if 'ticker' not in query:
+                    raise ValueError("missing ticker")
+                self._send(200, self.service.plot(query['ticker'][0], self._steps(query)), 'text/html')
+            elif url.path == '/metrics':
+                self._send(200, json.dumps(self.service.batcher.metrics()))
+            else:
+                self._send(404, json.dumps({'error': url.path}))
+        except KeyError as error:
+            self._send(404, json.dumps({'error': f"unknown ticker {error}"}))
+        except ValueError as error:
+            self._send(400, json.dumps({'error': str(error)}))
+        except Exception as error:
+            self._send(500, json.dumps({'error': str(error) if isinstance(error, ForecastError)
+                                        else f"{type(error).__name__}: {error}"}))
+
+    @staticmethod
+    def _steps(query):
+        steps = query.get('steps', ['30'])[0]
+        try:
+            return int(steps)
+        except ValueError:
+            raise ValueError(f"steps must be an integer, got {steps!r}") from None
+
+    def _send(self, status, body, content_type='application/json'):
+        body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return str(self.client_address[0]) if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def fetch_forecast(tickers, steps=30, url='http://127.0.0.1:8765'):
+    '''Client for offline tools: {ticker: [last close, step 1, ...]} from a running server'''
+    query = urllib.parse.urlencode([('ticker', ticker) for ticker in tickers] + [('steps', steps)])
+    with urllib.request.urlopen(f"{url}/forecast?{query}") as response:
+        return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weights', required=True, help='weights file or train.py cache directory')
+    parser.add_argument('--data', default=os.path.dirname(os.path.abspath(__file__)), help='directory of price CSVs')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', help='serve on this Unix socket instead of the port')
+    parser.add_argument('--max-batch', type=int, default=64, help='tickers per batched model call')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help='longest a request waits for others to batch with')
+    parser.add_argument('--max-steps', type=int, default=1000, help='longest forecast horizon a request may ask for')
+    args = parser.parse_args()
+
+    Handler.service = ForecastService(args.weights, args.data, args.max_batch, args.max_wait_ms / 1e3, args.max_steps)
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = UnixHTTPServer(args.socket, Handler)
+        print(f"serving on {args.socket}")
+    else:
+        server = ThreadingHTTPServer(('127.0.0.1', args.port), Handler)
+        print(f"serving on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(Handler.service.batcher.metrics()))
+
+
+if __name__ == '__main__':
+    main()
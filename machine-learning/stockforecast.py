@@ -1,106 +1,91 @@
-import pandas as pd
-import numpy as np
-import keras
-import tensorflow as tf
-from keras.preprocessing.sequence import TimeseriesGenerator
-import plotly.graph_objects as go
-
-filename = "TSLA.csv"
-df = pd.read_csv(filename)
-print(df.info())
-
-df['Date'] = pd.to_datetime(df['Date'])
-df.set_axis(df['Date'], inplace=True)
-df.drop(columns=['Open', 'High', 'Low', 'Volume'], inplace=True)
-
-close_data = df['Close'].values
-close_data = close_data.reshape((-1,1))
-
-split_percent = 0.70
-split = int(split_percent*len(close_data))
-
-close_train = close_data[:split]
-close_test = close_data[split:]
-
-date_train = df['Date'][:split]
-date_test = df['Date'][split:]
-
-print(len(close_train))
-print(len(close_test))
-
-look_back = 15
-
-train_generator = TimeseriesGenerator(close_train, close_train, length=look_back, batch_size=20)     
-test_generator = TimeseriesGenerator(close_test, close_test, length=look_back, batch_size=1)
-
-from keras.models import Sequential
-from keras.layers import LSTM, Dense
-
-model = Sequential()
-model.add(
-    LSTM(10,
-        activation='relu',
-        input_shape=(look_back,1))
-)
-model.add(Dense(1))
-model.compile(optimizer='adam', loss='mse')
-
-num_epochs = 25
-model.fit_generator(train_generator, epochs=num_epochs, verbose=1)
-
-prediction = model.predict_generator(test_generator)
-
-close_train = close_train.reshape((-1))
-close_test = close_test.reshape((-1))
-prediction = prediction.reshape((-1))
-
-trace1 = go.Scatter(
-    x = date_train,
-    y = close_train,
-    mode = 'lines',
-    name = 'Data'
-)
-trace2 = go.Scatter(
-    x = date_test,
-    y = prediction,
-    mode = 'lines',
-    name = 'Prediction'
-)
-trace3 = go.Scatter(
-    x = date_test,
-    y = close_test,
-    mode='lines',
-    name = 'Ground Truth'
-)
-layout = go.Layout(
-    title = "Tesla Stock",
-    xaxis = {'title' : "Date"},
-    yaxis = {'title' : "Close"}
-)
-fig = go.Figure(data=[trace1, trace2, trace3], layout=layout)
-fig.show()
-
-close_data = close_data.reshape((-1))
-
-def predict(num_prediction, model):
-    prediction_list = close_data[-look_back:]
-    
-    for _ in range(num_prediction):
-        x = prediction_list[-look_back:]
-        x = x.reshape((1, look_back, 1))
-        out = model.predict(x)[0][0]
-        prediction_list = np.append(prediction_list, out)
-    prediction_list = prediction_list[look_back-1:]
-        
-    return prediction_list
-    
-def predict_dates(num_prediction):
-    last_date = df['Date'].values[-1]
-    prediction_dates = pd.date_range(last_date, periods=num_prediction+1).tolist()
-    return prediction_dates
-
-num_prediction = 30
-forecast = predict(num_prediction, model)
-forecast_dates = predict_dates(num_prediction)
-
-print(forecast)
+import os
+import pandas as pd
+import numpy as np
+import keras
+import tensorflow as tf
+import plotly.graph_objects as go
+from windowed_dataset import WindowedDataset, load_series
+from forecast import Forecaster
+from train import SPEC, fit_cached, training_series
+
+# The first ticker is plotted and forecast; every listed ticker contributes training windows
+filenames = ["TSLA.csv"]
+series = [load_series(filename) for filename in filenames]
+
+dates, close_data = series[0]
+print(len(close_data))
+
+close_data = close_data.reshape((-1,1))
+
+split_percent = 0.70
+split = int(split_percent*len(close_data))
+
+close_train = close_data[:split]
+close_test = close_data[split:]
+
+date_train = dates[:split]
+date_test = dates[split:]
+
+print(len(close_train))
+print(len(close_test))
+
+look_back = 15
+
+test_generator = WindowedDataset(close_test, look_back, batch_size=1)
+
+# Trained once per (training data, hyperparameters) and cached under models/; appended rows
+# fine-tune the previous weights. train.py does the same for many tickers in parallel.
+spec = dict(SPEC, look_back=look_back, split=split_percent)
+model, status = fit_cached(training_series([close for _, close in series], split_percent), spec,
+                           os.path.join('models', '+'.join(os.path.splitext(f)[0] for f in filenames)), verbose=1)
+print(status)
+
+prediction = model.predict_generator(test_generator)
+
+close_train = close_train.reshape((-1))
+close_test = close_test.reshape((-1))
+prediction = prediction.reshape((-1))
+
+trace1 = go.Scatter(
+    x = date_train,
+    y = close_train,
+    mode = 'lines',
+    name = 'Data'
+)
+trace2 = go.Scatter(
+    x = date_test,
+    y = prediction,
+    mode = 'lines',
+    name = 'Prediction'
+)
+trace3 = go.Scatter(
+    x = date_test,
+    y = close_test,
+    mode='lines',
+    name = 'Ground Truth'
+)
+layout = go.Layout(
+    title = "Tesla Stock",
+    xaxis = {'title' : "Date"},
+    yaxis = {'title' : "Close"}
+)
+fig = go.Figure(data=[trace1, trace2, trace3], layout=layout)
+fig.show()
+
+close_data = close_data.reshape((-1))
+
+def predict(num_prediction, model):
+    # Last close followed by num_prediction autoregressive steps; pass several histories
+    # to Forecaster.forecast to forecast many tickers in the same batched model calls
+    return Forecaster(model, look_back).forecast([close_data], num_prediction)[0]
+    
+def predict_dates(num_prediction):
+    last_date = dates[-1]
+    prediction_dates = pd.date_range(last_date, periods=num_prediction+1).tolist()
+    return prediction_dates
+
+num_prediction = 30
+forecast = predict(num_prediction, model)
+forecast_dates = predict_dates(num_prediction)
+
+print(forecast)
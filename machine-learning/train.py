@@ -0,0 +1,205 @@
+# Trains the stockforecast LSTM for many tickers, one model per ticker, on a process pool.
+# Trained weights are cached under models/<ticker>/ by a key hashed from the training data and
+# the hyperparameters: a ticker whose key is unchanged is not retrained, and one whose CSV only
+# gained new rows is fine-tuned from its previous weights instead of trained from scratch.
+#
+#   python machine-learning/train.py data/sample/prices/*.csv [--workers 4] [--epochs 25] [--cache models]
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing import get_context
+
+import numpy as np
+
+# Keras and TensorFlow are imported inside the functions that need them, so pool workers can
+# set their thread counts before TensorFlow starts its thread pools
+
+SPEC = {'look_back': 15, 'units': 10, 'epochs': 25, 'batch_size': 20, 'split': 0.70}
+
+
+def data_hash(series):
+    '''sha256 of the float64 values (and the lengths) of one or more series'''
+    digest = hashlib.sha256()
+    for values in series:
+        values = np.ascontiguousarray(values, dtype=np.float64).reshape(-1)
+        digest.update(len(values).to_bytes(8, 'little'))
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def cache_key(series, spec):
+    '''Key of the weights trained on series with spec: changes with any value, look_back,
+    layer size, epoch count or batch size'''
+    digest = hashlib.sha256(data_hash(series).encode())
+    digest.update(json.dumps(spec, sort_keys=True).encode())
+    return digest.hexdigest()[:24]
+
+
+def build_model(look_back, units):
+    from keras.models import Sequential
+    from keras.layers import LSTM, Dense
+
+    model = Sequential()
+    model.add(LSTM(units, activation='relu', input_shape=(look_back, 1)))
+    model.add(Dense(1))
+    model.compile(optimizer='adam', loss='mse')
+    return model
+
+
+def training_series(closes, split):
+    '''The first `split` of every close series, the part stockforecast trains on'''
+    return [np.asarray(close).reshape(-1)[:int(split * len(close))] for close in closes]
+
+
+def fit_cached(series, spec, directory, fine_tune_epochs=5, verbose=0):
+    '''Returns (model, status) for series trained with spec, where status is
+    'cached' when the weights for this key were already in directory,
+    'warm' when the last weights in directory were trained on a prefix of every series with
+        the same spec, and were fine-tuned on the extended series for fine_tune_epochs, or
+    'trained' when the model was trained from scratch for spec['epochs'].'''
+    from windowed_dataset import WindowedDataset
+
+    os.makedirs(directory, exist_ok=True)
+    key = cache_key(series, spec)
+    weights = os.path.join(directory, f"{key}.h5")
+    model = build_model(spec['look_back'], spec['units'])
+    if os.path.exists(weights):
+        model.load_weights(weights)
+        return model, 'cached'
+
+    previous = read_json(os.path.join(directory, 'latest.json'))
+    epochs = spec['epochs']
+    status = 'trained'
+    if previous is not None and is_extension(previous, series, spec, directory):
+        model.load_weights(os.path.join(directory, previous['weights']))
+        epochs = fine_tune_epochs
+        status = 'warm'
+
+    generator = WindowedDataset(series, spec['look_back'], batch_size=spec['batch_size'])
+    model.fit_generator(generator, epochs=epochs, verbose=verbose, workers=2, max_queue_size=16)
+
+    # Weights and metadata are written under temporary names and renamed, so a reader
+    # never loads a partial file
+    model.save_weights(weights + '.tmp.h5')
+    os.replace(weights + '.tmp.h5', weights)
+    meta = {'key': key, 'weights': os.path.basename(weights), 'spec': spec, 'status': status,
+            'rows': [len(values) for values in series], 'prefixes': [data_hash([values]) for values in series]}
+    write_json(os.path.join(directory, f"{key}.json"), meta)
+    write_json(os.path.join(directory, 'latest.json'), meta)
+    return model, status
+
+
+def is_extension(previous, series, spec, directory):
+    '''Whether the previous weights in directory were trained with spec on a strict prefix of series'''
+    if previous['spec'] != spec or len(previous['rows']) != len(series):
+        return False
+    if not os.path.exists(os.path.join(directory, previous['weights'])):
+        return False
+    grown = False
+    for rows, prefix, values in zip(previous['rows'], previous['prefixes'], series):
+        if rows > len(values) or data_hash([np.asarray(values).reshape(-1)[:rows]]) != prefix:
+            return False
+        grown = grown or rows < len(values)
+    return grown
+
+
+def read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path, value):
+    with open(path + '.tmp', 'w') as f:
+        json.dump(value, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+@contextmanager
+def thread_limits(threads):
+    '''Sets the environment limiting a process to `threads` intra-op threads (OpenMP, OpenBLAS
+    and MKL under NumPy, and TensorFlow) and one inter-op thread, and restores it on exit.
+    The libraries read it when they load, which in a spawned worker is while it imports train,
+    before any pool initializer runs, so the limits are set in the parent around the pool and
+    the workers inherit them.'''
+    limits = {name: str(threads) for name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                                              'TF_NUM_INTRAOP_THREADS')}
+    limits['TF_NUM_INTEROP_THREADS'] = '1'
+    saved = {name: os.environ.get(name) for name in limits}
+    os.environ.update(limits)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def configure_threads(threads):
+    '''Pool initializer: limits TensorFlow in a worker to `threads` intra-op threads and one
+    inter-op thread. The NumPy limits come from the environment the worker inherits, since it
+    has imported NumPy (with train) before the initializer runs.'''
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def train_ticker(filename, spec, cache_dir, fine_tune_epochs):
+    from windowed_dataset import load_series
+
+    ticker = os.path.splitext(os.path.basename(filename))[0]
+    start = time.perf_counter()
+    _, close = load_series(filename)
+    _, status = fit_cached(training_series([close], spec['split']), spec, os.path.join(cache_dir, ticker),
+                           fine_tune_epochs)
+    return ticker, status, time.perf_counter() - start
+
+
+def train_all(filenames, spec, cache_dir, workers=None, threads=None, fine_tune_epochs=5):
+    '''Trains (or loads) the model of every ticker on a pool of `workers` processes with
+    `threads` intra-op threads each; by default one worker per core, with one thread each.
+    Yields (ticker, status, seconds) as tickers finish.'''
+    cores = os.cpu_count() or 1
+    workers = workers or min(len(filenames), cores)
+    threads = threads or max(1, cores // workers)
+    # Spawned rather than forked: TensorFlow's runtime is not fork-safe
+    with thread_limits(threads), ProcessPoolExecutor(workers, mp_context=get_context('spawn'),
+                                                     initializer=configure_threads, initargs=(threads,)) as pool:
+        futures = [pool.submit(train_ticker, filename, spec, cache_dir, fine_tune_epochs) for filename in filenames]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('csv', nargs='+', help='price CSVs, one ticker per file named after it')
+    parser.add_argument('--cache', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+    parser.add_argument('--workers', type=int, help='training processes, defaults to one per core')
+    parser.add_argument('--threads', type=int, help='intra-op threads per process, defaults to cores / workers')
+    parser.add_argument('--epochs', type=int, default=SPEC['epochs'])
+    parser.add_argument('--fine-tune-epochs', type=int, default=5)
+    parser.add_argument('--look-back', type=int, default=SPEC['look_back'])
+    parser.add_argument('--units', type=int, default=SPEC['units'])
+    args = parser.parse_args()
+
+    spec = dict(SPEC, epochs=args.epochs, look_back=args.look_back, units=args.units)
+    start = time.perf_counter()
+    counts = {}
+    for ticker, status, seconds in train_all(args.csv, spec, args.cache, args.workers, args.threads,
+                                             args.fine_tune_epochs):
+        counts[status] = counts.get(status, 0) + 1
+        print(f"{ticker:<10} {status:<8} {seconds:8.1f} s")
+    print(f"{len(args.csv)} tickers in {time.perf_counter() - start:.1f} s: "
+          + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+
+if __name__ == '__main__':
+    main()
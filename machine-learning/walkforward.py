@@ -0,0 +1,132 @@
+# Walk-forward evaluation of the stockforecast LSTM: instead of one 70/30 split, the series is
+# cut into folds that each test on the `step` rows following everything trained on so far.
+# The first fold of a group trains from scratch; every later fold fine-tunes the previous
+# fold's weights on only the rows the previous fold tested on. Groups of consecutive folds are
+# independent and run in parallel. --compare also runs every fold from scratch, as a plain
+# walk-forward would, and reports the speedup and the error of both.
+#
+#   python machine-learning/walkforward.py TSLA.csv [--initial 0.5] [--step 60] [--groups 2] [--compare]
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from train import SPEC, build_model, configure_threads, thread_limits
+from windowed_dataset import load_series
+
+
+def normalized_windows(close, look_back):
+    '''(x, y, last) for every window of the series: the look_back closes before each target
+    and the target, both as returns relative to the last close of the window (`last`), so
+    windows from different price levels share one scale and no statistic of later rows
+    leaks into earlier folds'''
+    close = np.asarray(close, dtype=np.float64).reshape(-1)
+    windows = np.lib.stride_tricks.sliding_window_view(close, look_back)[:-1]
+    last = windows[:, -1].copy()
+    x = (windows / last[:, None] - 1).astype(np.float32)[:, :, None]
+    y = (close[look_back:] / last - 1).astype(np.float32)[:, None]
+    return x, y, last
+
+
+def make_folds(samples, initial, step):
+    '''(train_end, test_end) sample indices of every fold: fold k trains on the samples before
+    train_end and tests on those up to test_end, which is where fold k + 1 trains to'''
+    folds = []
+    train_end = int(initial * samples)
+    while train_end < samples:
+        folds.append((train_end, min(train_end + step, samples)))
+        train_end += step
+    return folds
+
+
+def run_group(directory, folds, spec, incremental, fine_tune_epochs):
+    '''Evaluates consecutive folds; with incremental, one model is carried from fold to fold'''
+    x = np.load(os.path.join(directory, 'x.npy'), mmap_mode='r')
+    y = np.load(os.path.join(directory, 'y.npy'), mmap_mode='r')
+    last = np.load(os.path.join(directory, 'last.npy'), mmap_mode='r')
+
+    results = []
+    model = None
+    trained_to = 0
+    for train_end, test_end in folds:
+        start = time.perf_counter()
+        if model is None or not incremental:
+            model = build_model(spec['look_back'], spec['units'])
+            first, epochs, mode = 0, spec['epochs'], 'full'
+        else:
+            first, epochs, mode = trained_to, fine_tune_epochs, 'fine-tune'
+        model.fit(x[first:train_end], y[first:train_end], epochs=epochs, batch_size=spec['batch_size'], verbose=0)
+        trained_to = train_end
+
+        predicted = model.predict(x[train_end:test_end], verbose=0)[:, 0]
+        close = last[train_end:test_end] * (1 + y[train_end:test_end, 0])
+        forecast = last[train_end:test_end] * (1 + predicted)
+        results.append({'train_end': train_end, 'test_end': test_end, 'new_rows': train_end - first, 'mode': mode,
+                        'rmse': float(np.sqrt(np.mean((forecast - close) ** 2))),
+                        'mape': float(np.mean(np.abs(forecast / close - 1))),
+                        'seconds': time.perf_counter() - start})
+    return results
+
+
+def walk_forward(directory, folds, spec, groups, incremental, fine_tune_epochs, threads):
+    '''Runs the folds as `groups` groups of consecutive folds on a process pool; returns the
+    per-fold results in fold order and the wall-clock seconds'''
+    start = time.perf_counter()
+    parts = [list(part) for part in np.array_split(np.arange(len(folds)), groups) if len(part)]
+    with thread_limits(threads), ProcessPoolExecutor(len(parts), mp_context=get_context('spawn'),
+                                                     initializer=configure_threads, initargs=(threads,)) as pool:
+        futures = [pool.submit(run_group, directory, [folds[i] for i in part], spec, incremental, fine_tune_epochs)
+                   for part in parts]
+        results = [result for future in futures for result in future.result()]
+    return results, time.perf_counter() - start
+
+
+def report(name, results, seconds):
+    print(f"{name}: {len(results)} folds in {seconds:.1f} s")
+    print(f"{'fold':>5} {'train rows':>10} {'new rows':>9} {'mode':>10} {'rmse':>9} {'mape':>7} {'seconds':>8}")
+    for fold, result in enumerate(results):
+        print(f"{fold:>5} {result['train_end']:>10} {result['new_rows']:>9} {result['mode']:>10} "
+              f"{result['rmse']:>9.3f} {result['mape']:>7.2%} {result['seconds']:>8.1f}")
+    print(f"mean rmse {np.mean([r['rmse'] for r in results]):.3f}, mean mape {np.mean([r['mape'] for r in results]):.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('csv', help='price CSV')
+    parser.add_argument('--initial', type=float, default=0.5, help='share of the series the first fold trains on')
+    parser.add_argument('--step', type=int, default=60, help='rows each fold tests on')
+    parser.add_argument('--groups', type=int, help='independent fold groups run in parallel, defaults to one per core')
+    parser.add_argument('--epochs', type=int, default=SPEC['epochs'])
+    parser.add_argument('--fine-tune-epochs', type=int, default=5)
+    parser.add_argument('--look-back', type=int, default=SPEC['look_back'])
+    parser.add_argument('--compare', action='store_true', help='also retrain every fold from scratch')
+    args = parser.parse_args()
+
+    spec = dict(SPEC, epochs=args.epochs, look_back=args.look_back)
+    _, close = load_series(args.csv)
+    x, y, last = normalized_windows(close, spec['look_back'])
+    folds = make_folds(len(x), args.initial, args.step)
+    cores = os.cpu_count() or 1
+    groups = max(1, min(args.groups or cores, len(folds)))
+    threads = max(1, cores // groups)
+
+    # The windows are computed once and memory-mapped by every worker
+    with tempfile.TemporaryDirectory() as directory:
+        for name, values in (('x', x), ('y', y), ('last', last)):
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+
+        results, seconds = walk_forward(directory, folds, spec, groups, True, args.fine_tune_epochs, threads)
+        report(f"incremental, {groups} groups", results, seconds)
+        if args.compare:
+            full, full_seconds = walk_forward(directory, folds, spec, groups, False, args.fine_tune_epochs, threads)
+            report(f"retrained every fold, {groups} groups", full, full_seconds)
+            print(f"speedup {full_seconds / seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import math
+
+import numpy as np
+from keras.utils import Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'offline'))
+from barstore import BarStore
+
+
+def load_series(filename, store_dir=None):
+    '''Returns the (dates, close) arrays of a price CSV, memory-mapped from its partition in
+    a bar store (by default bars/ next to the CSV). The CSV is ingested again only when it
+    is newer than the partition.'''
+    store = BarStore(store_dir or os.path.join(os.path.dirname(os.path.abspath(filename)), 'bars'))
+    ticker = os.path.splitext(os.path.basename(filename))[0]
+    index = os.path.join(store.path(ticker), 'time.npy')
+    if not os.path.exists(index) or os.path.getmtime(index) < os.path.getmtime(filename):
+        store.ingest_csv(filename, ticker, merge=False)
+    partition = store.partition(ticker)
+    return partition.time, partition.column('close')
+
+
+class WindowedDataset(Sequence):
+    '''Keras Sequence of (look_back window, next value) pairs over one or more close series.
+
+    Samples and batches come out in exactly the order TimeseriesGenerator(series, series,
+    length=look_back, batch_size=batch_size) produces them, with the series' samples
+    concatenated one after another. Windows are strided views of the (memory-mapped)
+    series, so a batch that falls inside one series is returned without copying; only
+    batches spanning two series are stitched together.
+
+    Keras fetches upcoming batches on background threads (fit's workers/max_queue_size),
+    which overlaps page-ins of the memory-mapped data with training.'''
+
+    def __init__(self, series, look_back, batch_size=20):
+        if isinstance(series, np.ndarray):
+            series = [series]
+        self.look_back = look_back
+        self.batch_size = batch_size
+        self.windows = []
+        self.targets = []
+        for values in series:
+            values = np.asarray(values).reshape(-1)
+            if len(values) <= look_back:
+                continue
+            self.windows.append(np.lib.stride_tricks.sliding_window_view(values, look_back)[:-1, :, None])
+            self.targets.append(values[look_back:, None])
+        self.offsets = np.cumsum([0] + [len(t) for t in self.targets])
+
+    @property
+    def samples(self):
+        return int(self.offsets[-1])
+
+    def __len__(self):
+        return math.ceil(self.samples / self.batch_size)
+
+    def __getitem__(self, index):
+        start = index * self.batch_size
+        stop = min(start + self.batch_size, self.samples)
+        first = int(np.searchsorted(self.offsets, start, side='right')) - 1
+        last = int(np.searchsorted(self.offsets, stop - 1, side='right')) - 1
+
+        if first == last:
+            begin = start - self.offsets[first]
+            end = stop - self.offsets[first]
+            return self.windows[first][begin:end], self.targets[first][begin:end]
+
+        x = []
+        y = []
+        for part in range(first, last + 1):
+            begin = max(start, self.offsets[part]) - self.offsets[part]
+            end = min(stop, self.offsets[part + 1]) - self.offsets[part]
+            x.append(self.windows[part][begin:end])
+            y.append(self.targets[part][begin:end])
+        return np.concatenate(x), np.concatenate(y)
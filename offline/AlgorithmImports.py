@@ -0,0 +1,619 @@
+# Lightweight local stand-ins for the subset of the LEAN API used in this repo.
+# Modules that run on QuantConnect get these names from the real AlgorithmImports;
+# putting this directory on sys.path lets the same files run (and be profiled) offline.
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+
+class Resolution:
+    Tick = 0
+    Second = 1
+    Minute = 2
+    Hour = 3
+    Daily = 4
+
+
+class InsightDirection:
+    Down = -1
+    Flat = 0
+    Up = 1
+
+
+class MorningstarSectorCode:
+    BasicMaterials = 101
+    ConsumerCyclical = 102
+    FinancialServices = 103
+    RealEstate = 104
+    ConsumerDefensive = 205
+    Healthcare = 206
+    Utilities = 207
+    CommunicationServices = 308
+    Energy = 309
+    Industrials = 310
+    Technology = 311
+
+
+class Symbol:
+    '''Ticker wrapper that hashes and compares by value like a LEAN Symbol'''
+    __slots__ = ('Value',)
+
+    def __init__(self, value):
+        self.Value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Symbol) and other.Value == self.Value
+
+    def __hash__(self):
+        return hash(self.Value)
+
+    def __lt__(self, other):
+        return self.Value < other.Value
+
+    def __str__(self):
+        return self.Value
+
+    __repr__ = __str__
+
+
+class CoarseFundamental:
+    __slots__ = ('Symbol', 'Price', 'AdjustedPrice', 'Volume', 'DollarVolume', 'HasFundamentalData')
+
+    def __init__(self, symbol, price, volume, hasFundamentalData=True, adjustedPrice=None):
+        self.Symbol = symbol
+        self.Price = price
+        self.AdjustedPrice = price if adjustedPrice is None else adjustedPrice
+        self.Volume = volume
+        self.DollarVolume = price * volume
+        self.HasFundamentalData = hasFundamentalData
+
+
+class _Value:
+    __slots__ = ('Value',)
+
+    def __init__(self, value):
+        self.Value = value
+
+
+class _Fields:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FineFundamental:
+    '''Flat point-in-time fundamentals exposed through LEAN's nested attribute layout'''
+
+    def __init__(self, symbol, marketCap, sector, ipoDate, roe, netMargin, peRatio):
+        self.Symbol = symbol
+        self.MarketCap = marketCap
+        self.SecurityReference = _Fields(IPODate=ipoDate)
+        self.AssetClassification = _Fields(MorningstarSectorCode=sector)
+        self.OperationRatios = _Fields(ROE=_Value(roe), NetMargin=_Value(netMargin))
+        self.ValuationRatios = _Fields(PERatio=peRatio)
+
+
+class Universe:
+    Unchanged = object()
+
+
+class UniverseSettings:
+    def __init__(self):
+        self.Resolution = Resolution.Minute
+
+
+class IndicatorDataPoint:
+    __slots__ = ('Time', 'Value')
+
+    def __init__(self, time=None, value=0.0):
+        self.Time = time
+        self.Value = value
+
+
+class ExponentialMovingAverage:
+    '''EMA seeded with the first sample, then value * k + current * (1 - k)'''
+
+    def __init__(self, name, period=None):
+        if period is None:
+            name, period = f"EMA{name}", name
+        self.Name = name
+        self.Period = period
+        self.k = 2.0 / (period + 1)
+        self.Reset()
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.Period
+
+    def Update(self, time, value):
+        self.Samples += 1
+        if self.Samples == 1:
+            self.Current.Value = value
+        else:
+            self.Current.Value = value * self.k + self.Current.Value * (1 - self.k)
+        self.Current.Time = time
+        return self.IsReady
+
+    def Reset(self):
+        self.Samples = 0
+        self.Current = IndicatorDataPoint()
+
+
+class Expiry:
+    '''Insight expiry functions: each maps the generation time to the close time'''
+
+    @staticmethod
+    def EndOfDay(time):
+        return datetime(time.year, time.month, time.day) + timedelta(days=1)
+
+    @staticmethod
+    def EndOfWeek(time):
+        start = datetime(time.year, time.month, time.day) - timedelta(days=time.weekday())
+        return start + timedelta(days=7)
+
+    @staticmethod
+    def EndOfMonth(time):
+        return datetime(time.year + time.month // 12, time.month % 12 + 1, 1)
+
+    @staticmethod
+    def EndOfQuarter(time):
+        month = 3 * ((time.month - 1) // 3) + 4
+        return datetime(time.year + (month > 12), (month - 1) % 12 + 1, 1)
+
+
+class Insight:
+    __slots__ = ('Symbol', 'Period', 'Direction', 'Type', 'GeneratedTimeUtc', 'CloseTimeUtc')
+
+    def __init__(self, symbol, period, direction, type='Price'):
+        self.Symbol = symbol
+        self.Period = period
+        self.Direction = direction
+        self.Type = type
+        self.GeneratedTimeUtc = None
+        self.CloseTimeUtc = None
+
+    @staticmethod
+    def Price(symbol, period, direction):
+        return Insight(symbol, period, direction)
+
+    def SetGeneratedTime(self, time):
+        '''Stamps the insight and resolves its close time from a timedelta or an Expiry function'''
+        self.GeneratedTimeUtc = time
+        self.CloseTimeUtc = self.Period(time) if callable(self.Period) else time + self.Period
+
+    def IsActive(self, time):
+        return self.CloseTimeUtc is None or time < self.CloseTimeUtc
+
+    def __repr__(self):
+        return f"Insight({self.Symbol}, {self.Period}, {self.Direction})"
+
+
+class AlphaModel:
+    def Update(self, algorithm, data):
+        return []
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        pass
+
+
+class PortfolioTarget:
+    __slots__ = ('Symbol', 'Quantity')
+
+    def __init__(self, symbol, quantity):
+        self.Symbol = symbol
+        self.Quantity = quantity
+
+
+class PortfolioConstructionModel:
+    def CreateTargets(self, algorithm, insights):
+        return []
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        pass
+
+
+class EqualWeightingPortfolioConstructionModel(PortfolioConstructionModel):
+    '''Gives every symbol with an active Up/Down insight an equal share of the portfolio.
+    Targets are rebuilt when insights or the universe change, or when rebalance returns a time.'''
+
+    def __init__(self, rebalance=None):
+        self.rebalance = rebalance
+        self.activeInsights = {}
+        self.removedSymbols = []
+        self.securitiesChanged = False
+
+    def CreateTargets(self, algorithm, insights):
+        time = algorithm.UtcTime
+        for insight in insights:
+            self.activeInsights[insight.Symbol] = insight
+        expired = [symbol for symbol, insight in self.activeInsights.items() if not insight.IsActive(time)]
+        for symbol in expired:
+            del self.activeInsights[symbol]
+
+        due = self.rebalance is not None and self.rebalance(time) is not None
+        if not (insights or expired or self.securitiesChanged or self.removedSymbols or due):
+            return []
+        self.securitiesChanged = False
+
+        targets = [PortfolioTarget(symbol, 0) for symbol in self.removedSymbols + expired]
+        self.removedSymbols = []
+
+        directional = [x for x in self.activeInsights.values() if x.Direction != InsightDirection.Flat]
+        if directional:
+            percent = 1.0 / len(directional)
+            value = algorithm.Portfolio.TotalPortfolioValue
+            for insight in directional:
+                price = algorithm.Securities[insight.Symbol].Price
+                quantity = int(insight.Direction * percent * value / price) if price > 0 else 0
+                targets.append(PortfolioTarget(insight.Symbol, quantity))
+        return targets
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        self.securitiesChanged = True
+        for security in changes.RemovedSecurities:
+            if self.activeInsights.pop(security.Symbol, None) is not None:
+                self.removedSymbols.append(security.Symbol)
+
+
+class ExecutionModel:
+    def Execute(self, algorithm, targets):
+        pass
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        pass
+
+
+class ImmediateExecutionModel(ExecutionModel):
+    '''Submits a market order for the full difference between target and holdings'''
+
+    def Execute(self, algorithm, targets):
+        for target in targets:
+            quantity = target.Quantity - algorithm.Portfolio[target.Symbol].Quantity
+            if quantity != 0:
+                algorithm.MarketOrder(target.Symbol, quantity)
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        pass
+
+
+class NullRiskManagementModel:
+    def ManageRisk(self, algorithm, targets):
+        return []
+
+    def OnSecuritiesChanged(self, algorithm, changes):
+        pass
+
+
+class TradeBar:
+    __slots__ = ('Time', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume', 'Period')
+
+    def __init__(self, time, symbol, open, high, low, close, volume, period=timedelta(minutes=1)):
+        self.Time = time
+        self.Symbol = symbol
+        self.Open = open
+        self.High = high
+        self.Low = low
+        self.Close = close
+        self.Volume = volume
+        self.Period = period
+
+    @property
+    def EndTime(self):
+        return self.Time + self.Period
+
+    @property
+    def Value(self):
+        return self.Close
+
+    @property
+    def Price(self):
+        return self.Close
+
+
+class Slice:
+    def __init__(self, time, bars):
+        self.Time = time
+        self.Bars = bars
+
+    def __contains__(self, symbol):
+        return symbol in self.Bars
+
+    def __getitem__(self, symbol):
+        return self.Bars[symbol]
+
+    def ContainsKey(self, symbol):
+        return symbol in self.Bars
+
+
+class SecurityHolding:
+    __slots__ = ('Quantity', 'AveragePrice')
+
+    def __init__(self):
+        self.Quantity = 0
+        self.AveragePrice = 0.0
+
+    @property
+    def Invested(self):
+        return self.Quantity != 0
+
+
+class Security:
+    def __init__(self, symbol, fundamentals=None):
+        self.Symbol = symbol
+        self.Fundamentals = fundamentals
+        self.Price = 0.0
+        self.Open = self.High = self.Low = self.Close = 0.0
+        self.Volume = 0.0
+        self.Holdings = SecurityHolding()
+
+    def SetMarketPrice(self, bar):
+        self.Open, self.High, self.Low, self.Close, self.Volume = bar.Open, bar.High, bar.Low, bar.Close, bar.Volume
+        self.Price = bar.Close
+
+    @property
+    def Invested(self):
+        return self.Holdings.Invested
+
+
+class SecurityChanges:
+    def __init__(self, added=(), removed=()):
+        self.AddedSecurities = list(added)
+        self.RemovedSecurities = list(removed)
+
+    def __str__(self):
+        added = ", ".join(str(x.Symbol) for x in self.AddedSecurities)
+        removed = ", ".join(str(x.Symbol) for x in self.RemovedSecurities)
+        return f"SecurityChanges: Added: {added} Removed: {removed}"
+
+
+class SecurityDictionary(dict):
+    '''Symbol keyed dictionary with the LEAN dictionary members the algorithms use'''
+
+    @property
+    def Keys(self):
+        return list(self.keys())
+
+    @property
+    def Values(self):
+        return list(self.values())
+
+    def ContainsKey(self, symbol):
+        return symbol in self
+
+
+class SecurityPortfolioManager:
+    def __init__(self, securities, cash=100000.0):
+        self.securities = securities
+        self.Cash = cash
+        self.invested = {}
+
+    def __getitem__(self, symbol):
+        security = self.securities.get(symbol)
+        return security.Holdings if security is not None else SecurityHolding()
+
+    @property
+    def Invested(self):
+        return bool(self.invested)
+
+    @property
+    def TotalHoldingsValue(self):
+        return sum(x.Holdings.Quantity * x.Price for x in self.invested.values())
+
+    @property
+    def TotalPortfolioValue(self):
+        return self.Cash + self.TotalHoldingsValue
+
+
+class OrderEvent:
+    __slots__ = ('OrderId', 'Symbol', 'UtcTime', 'FillPrice', 'FillQuantity', 'Status')
+
+    def __init__(self, orderId, symbol, time, fillPrice, fillQuantity):
+        self.OrderId = orderId
+        self.Symbol = symbol
+        self.UtcTime = time
+        self.FillPrice = fillPrice
+        self.FillQuantity = fillQuantity
+        self.Status = 'Filled'
+
+    def __str__(self):
+        return (f"Time: {self.UtcTime} OrderID: {self.OrderId} Symbol: {self.Symbol} Status: {self.Status} "
+                f"Quantity: {self.FillQuantity} FillPrice: {self.FillPrice}")
+
+
+class ObjectStore:
+    '''Key/value store; in memory unless a directory is given'''
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.values = {}
+
+    def _path(self, key):
+        import os
+        return os.path.join(self.directory, key.replace('/', '__'))
+
+    def ContainsKey(self, key):
+        if key in self.values:
+            return True
+        import os
+        return self.directory is not None and os.path.exists(self._path(key))
+
+    def Read(self, key):
+        return self.ReadBytes(key).decode('utf-8')
+
+    def ReadBytes(self, key):
+        if key not in self.values:
+            with open(self._path(key), 'rb') as f:
+                self.values[key] = f.read()
+        return self.values[key]
+
+    def Save(self, key, value):
+        return self.SaveBytes(key, value.encode('utf-8'))
+
+    def SaveBytes(self, key, value):
+        self.values[key] = bytes(value)
+        if self.directory is not None:
+            import os
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(key), 'wb') as f:
+                f.write(self.values[key])
+        return True
+
+
+class QCAlgorithm:
+    '''Algorithm surface used by this repo. Orders fill immediately at the security's
+    last price; offline/engine.py drives time, data and the framework models.'''
+
+    def __init__(self):
+        self.Time = datetime.min
+        self.CurrentSlice = None
+        self.StartDate = None
+        self.EndDate = None
+        self.Benchmark = None
+        self.Securities = SecurityDictionary()
+        self.ActiveSecurities = SecurityDictionary()
+        self.Portfolio = SecurityPortfolioManager(self.Securities)
+        self.UniverseSettings = UniverseSettings()
+        self.ObjectStore = ObjectStore()
+        self.universes = []
+        self.alphas = []
+        self.portfolioConstruction = None
+        self.execution = None
+        self.riskManagement = None
+        self.manualSymbols = []
+        self.registeredIndicators = {}
+        self.historyProvider = None
+        self.parameters = {}
+        self.orderId = 0
+        self.logs = []
+
+    @property
+    def UtcTime(self):
+        return self.Time
+
+    # Setup
+
+    def SetStartDate(self, year, month=None, day=None):
+        self.StartDate = year if month is None else datetime(year, month, day)
+
+    def SetEndDate(self, year, month=None, day=None):
+        self.EndDate = year if month is None else datetime(year, month, day)
+
+    def SetCash(self, cash):
+        self.Portfolio.Cash = float(cash)
+
+    def SetBenchmark(self, benchmark):
+        self.Benchmark = benchmark
+
+    def SetWarmUp(self, period):
+        pass
+
+    def AddUniverse(self, coarse, fine=None):
+        self.universes.append((coarse, fine))
+
+    def AddEquity(self, ticker, resolution=None):
+        security = self.GetSecurity(Symbol(ticker))
+        self.manualSymbols.append(security.Symbol)
+        return security
+
+    def AddAlpha(self, alpha):
+        self.alphas.append(alpha)
+
+    def SetPortfolioConstruction(self, model):
+        self.portfolioConstruction = model
+
+    def SetExecution(self, model):
+        self.execution = model
+
+    def SetRiskManagement(self, model):
+        self.riskManagement = model
+
+    def GetParameter(self, name):
+        return self.parameters.get(name)
+
+    def GetSecurity(self, symbol):
+        security = self.Securities.get(symbol)
+        if security is None:
+            security = self.Securities[symbol] = Security(symbol)
+        return security
+
+    # Logging
+
+    def Debug(self, message):
+        self.logs.append(message)
+
+    def Log(self, message):
+        self.logs.append(message)
+
+    def Error(self, message):
+        self.logs.append(message)
+
+    # Indicators and data
+
+    def CreateIndicatorName(self, symbol, name, resolution):
+        return f"{name}({symbol})"
+
+    def RegisterIndicator(self, symbol, indicator, resolution=None):
+        self.registeredIndicators.setdefault(symbol, []).append(indicator)
+
+    def UpdateRegisteredIndicators(self, slice):
+        '''Pushes each bar's close through the indicators registered for its symbol,
+        the way LEAN's consolidators do before the alpha model sees the slice'''
+        for symbol, bar in slice.Bars.items():
+            for indicator in self.registeredIndicators.get(symbol, ()):
+                indicator.Update(bar.Time, bar.Close)
+
+    def History(self, symbol, periods, resolution=None):
+        if self.historyProvider is None:
+            return pd.DataFrame()
+        return self.historyProvider(symbol, periods, resolution)
+
+    # Orders
+
+    def _Symbol(self, symbol):
+        return Symbol(symbol) if isinstance(symbol, str) else symbol
+
+    def MarketOrder(self, symbol, quantity, asynchronous=False, tag=""):
+        security = self.GetSecurity(self._Symbol(symbol))
+        quantity = int(quantity)
+        if quantity == 0 or not security.Price > 0:
+            return None
+
+        holding = security.Holdings
+        total = holding.Quantity + quantity
+        if total == 0:
+            holding.AveragePrice = 0.0
+        elif holding.Quantity == 0 or (holding.Quantity > 0) != (total > 0):
+            holding.AveragePrice = security.Price
+        elif abs(total) > abs(holding.Quantity):
+            holding.AveragePrice = (holding.AveragePrice * holding.Quantity + security.Price * quantity) / total
+        holding.Quantity = total
+        self.Portfolio.Cash -= quantity * security.Price
+        if total == 0:
+            self.Portfolio.invested.pop(security.Symbol, None)
+        else:
+            self.Portfolio.invested[security.Symbol] = security
+
+        self.orderId += 1
+        self.OnOrderEvent(OrderEvent(self.orderId, security.Symbol, self.UtcTime, security.Price, quantity))
+        return self.orderId
+
+    def SetHoldings(self, symbol, percentage, liquidateExistingHoldings=False):
+        security = self.GetSecurity(self._Symbol(symbol))
+        if liquidateExistingHoldings:
+            for other in list(self.Portfolio.invested):
+                if other != security.Symbol:
+                    self.Liquidate(other)
+        if not security.Price > 0:
+            return
+        target = int(percentage * self.Portfolio.TotalPortfolioValue / security.Price)
+        self.MarketOrder(security.Symbol, target - security.Holdings.Quantity)
+
+    def Liquidate(self, symbol=None):
+        symbols = list(self.Portfolio.invested) if symbol is None else [self._Symbol(symbol)]
+        for symbol in symbols:
+            quantity = self.Portfolio[symbol].Quantity
+            if quantity != 0:
+                self.MarketOrder(symbol, -quantity)
+
+    def OnOrderEvent(self, orderEvent):
+        pass
@@ -0,0 +1,4 @@
+# Stand-in for the .NET generic collections some algorithms import
+
+List = list
+Dictionary = dict
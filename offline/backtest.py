@@ -0,0 +1,56 @@
+# Runs a QuantConnect project file against local data and reports throughput and
+# per-callback timing.
+#
+#   python offline/backtest.py strategies/ema-cross/equal-weighted-portfolio/immediate-execution/main.py \
+#       --data data/sample [--start 2016-01-01] [--end 2017-01-01] [--object-store .object-store] [--bar-store data/bars]
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loader import load_module
+from AlgorithmImports import ObjectStore, datetime
+from barstore import BarStore
+from dataset import Dataset
+from engine import LocalBacktest, find_algorithm
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('algorithm', help='path to the project file defining the QCAlgorithm')
+    parser.add_argument('--data', required=True, help='dataset directory (see offline/dataset.py)')
+    parser.add_argument('--start', help='override the algorithm start date, YYYY-MM-DD')
+    parser.add_argument('--end', help='override the algorithm end date, YYYY-MM-DD')
+    parser.add_argument('--object-store', help='directory backing the ObjectStore between runs')
+    parser.add_argument('--bar-store', help='bar store (offline/barstore.py) serving History')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    algorithm_type = find_algorithm(load_module(args.algorithm, 'main'))
+    if args.start or args.end:
+        algorithm_type = with_dates(algorithm_type, args.start, args.end)
+
+    dataset = Dataset.load(args.data)
+    store = ObjectStore(args.object_store) if args.object_store else None
+    bar_store = BarStore(args.bar_store) if args.bar_store else None
+    result = LocalBacktest(algorithm_type, dataset, store, args.seed, bar_store=bar_store).run()
+    print(result.summary())
+
+
+def with_dates(algorithm_type, start, end):
+    '''Subclass that overrides the dates set in Initialize'''
+    class Dated(algorithm_type):
+        def Initialize(self):
+            super().Initialize()
+            if start:
+                self.StartDate = datetime.strptime(start, '%Y-%m-%d')
+            if end:
+                self.EndDate = datetime.strptime(end, '%Y-%m-%d')
+    Dated.__name__ = algorithm_type.__name__
+    return Dated
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+# On-disk columnar store of OHLCV bars, partitioned by resolution and ticker.
+#
+# Layout:
+#   <root>/<resolution>/<TICKER>/time.npy      datetime64[us] bar times, ascending (the time index)
+#   <root>/<resolution>/<TICKER>/<field>.npy   float64 open, high, low, close, volume
+#
+# Every column is a plain .npy file opened through memory mapping: opening a partition
+# reads a header, a date range is found by binary search on the time index, and a query
+# only touches the pages of the rows it returns.
+#
+#   python offline/barstore.py ingest data/bars data/sample/prices/*.csv [--resolution daily]
+#   python offline/barstore.py info data/bars
+
+import argparse
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+RESOLUTIONS = {0: 'tick', 1: 'second', 2: 'minute', 3: 'hour', 4: 'daily'}
+
+
+def resolution_name(resolution):
+    '''Partition directory of a Resolution value or name; None means daily'''
+    if resolution is None:
+        return 'daily'
+    if isinstance(resolution, str):
+        return resolution.lower()
+    return RESOLUTIONS[resolution]
+
+
+class Partition:
+    '''Memory-mapped columns of one ticker at one resolution'''
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.time = np.load(os.path.join(directory, 'time.npy'), mmap_mode='r')
+        self.columns = {}
+
+    def __len__(self):
+        return len(self.time)
+
+    def column(self, field):
+        values = self.columns.get(field)
+        if values is None:
+            values = self.columns[field] = np.load(os.path.join(self.directory, f"{field}.npy"), mmap_mode='r')
+        return values
+
+    def rows(self, start=None, end=None):
+        '''Slice of the bars with start <= time < end'''
+        first = 0 if start is None else int(np.searchsorted(self.time, np.datetime64(start, 'us'), 'left'))
+        stop = len(self.time) if end is None else int(np.searchsorted(self.time, np.datetime64(end, 'us'), 'left'))
+        return slice(first, max(first, stop))
+
+    def last(self, end, periods):
+        '''Slice of the last `periods` bars before end'''
+        stop = self.rows(end=end).stop
+        return slice(max(0, stop - periods), stop)
+
+
+class BarStore:
+    def __init__(self, root):
+        self.root = root
+        self.partitions = {}
+
+    def path(self, ticker, resolution=None):
+        return os.path.join(self.root, resolution_name(resolution), ticker)
+
+    def tickers(self, resolution=None):
+        directory = os.path.join(self.root, resolution_name(resolution))
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def partition(self, ticker, resolution=None):
+        '''The Partition of ticker, or None if the store has no bars for it'''
+        key = (resolution_name(resolution), ticker)
+        partition = self.partitions.get(key)
+        if partition is None:
+            directory = self.path(ticker, resolution)
+            if not os.path.exists(os.path.join(directory, 'time.npy')):
+                return None
+            partition = self.partitions[key] = Partition(directory)
+        return partition
+
+    # Writing
+
+    def write(self, ticker, frame, resolution=None, merge=True):
+        '''Stores the bars of frame (a DatetimeIndex and the FIELDS columns) as the partition
+        of ticker. With merge, existing bars are kept unless frame has a bar at the same time.'''
+        frame = frame[[field for field in FIELDS if field in frame]].astype(np.float64)
+        existing = self.read(ticker, resolution=resolution) if merge else None
+        if existing is not None and len(existing):
+            frame = pd.concat([existing[~existing.index.isin(frame.index)], frame])
+        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+
+        # Written next to the partition and swapped in, so readers never see half a partition
+        directory = self.path(ticker, resolution)
+        staging = directory + '.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.save(os.path.join(staging, 'time.npy'), frame.index.values.astype('datetime64[us]'))
+        for field in FIELDS:
+            values = frame[field].to_numpy() if field in frame else np.full(len(frame), np.nan)
+            np.save(os.path.join(staging, f"{field}.npy"), values)
+        self.partitions.pop((resolution_name(resolution), ticker), None)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+
+    def ingest_csv(self, path, ticker=None, resolution=None, merge=True):
+        '''Adds the bars of a price CSV named after its ticker (merge=False replaces the
+        partition). Column names are matched case-insensitively, so both date,open,...,volume
+        files and Yahoo Finance exports (Date,Open,High,Low,Close,Adj Close,Volume) are
+        accepted. Returns the bar count.'''
+        ticker = ticker or os.path.splitext(os.path.basename(path))[0]
+        frame = pd.read_csv(path)
+        frame.columns = [column.strip().lower() for column in frame.columns]
+        frame = frame.set_index(pd.DatetimeIndex(pd.to_datetime(frame.pop('date')), name='time'))
+        self.write(ticker, frame, resolution, merge)
+        return len(frame)
+
+    # Queries
+
+    def read(self, ticker, start=None, end=None, fields=FIELDS, resolution=None):
+        '''Bars of ticker with start <= time < end as a DataFrame, or None if it has no partition'''
+        partition = self.partition(ticker, resolution)
+        if partition is None:
+            return None
+        rows = partition.rows(start, end)
+        return pd.DataFrame({field: np.asarray(partition.column(field)[rows]) for field in fields},
+                            index=pd.DatetimeIndex(partition.time[rows], name='time'))
+
+    def query(self, tickers, start=None, end=None, field='close', resolution=None):
+        '''Values of field for every ticker with start <= time < end, aligned on the union of
+        their bar times. Returns (times, values) with values shaped (times x tickers) and
+        NaN where a ticker has no bar.'''
+        partitions = [self.partition(ticker, resolution) for ticker in tickers]
+        slices = [p.rows(start, end) if p is not None else None for p in partitions]
+        return self._align(partitions, slices, field)
+
+    def window(self, tickers, end, periods, field='close', resolution=None):
+        '''Last `periods` bars before end of every ticker, aligned like query'''
+        partitions = [self.partition(ticker, resolution) for ticker in tickers]
+        slices = [p.last(end, periods) if p is not None else None for p in partitions]
+        return self._align(partitions, slices, field)
+
+    def history(self, symbols, periods, end, resolution=None):
+        '''Last `periods` bars of each symbol before end as the (symbol, time) indexed
+        DataFrame QCAlgorithm.History returns; symbols are tickers or Symbol objects'''
+        if not isinstance(symbols, (list, tuple)):
+            symbols = [symbols]
+        keys, times, columns = [], [], {field: [] for field in FIELDS}
+        for symbol in symbols:
+            partition = self.partition(getattr(symbol, 'Value', symbol), resolution)
+            if partition is None:
+                continue
+            rows = partition.last(end, periods)
+            if rows.stop == rows.start:
+                continue
+            keys.append((symbol, rows.stop - rows.start))
+            times.append(partition.time[rows])
+            for field in FIELDS:
+                columns[field].append(partition.column(field)[rows])
+        if not keys:
+            return pd.DataFrame()
+        index = pd.MultiIndex.from_arrays(
+            [pd.Index([symbol for symbol, count in keys for _ in range(count)], dtype=object),
+             pd.DatetimeIndex(np.concatenate(times), name='time')], names=['symbol', 'time'])
+        return pd.DataFrame({field: np.concatenate(columns[field]) for field in FIELDS}, index=index)
+
+    def _align(self, partitions, slices, field):
+        present = [(i, p, rows) for i, (p, rows) in enumerate(zip(partitions, slices)) if p is not None]
+        if not present:
+            return np.empty(0, dtype='datetime64[us]'), np.empty((0, len(partitions)))
+        times = np.unique(np.concatenate([p.time[rows] for _, p, rows in present]))
+        values = np.full((len(times), len(partitions)), np.nan)
+        for i, p, rows in present:
+            values[np.searchsorted(times, p.time[rows]), i] = p.column(field)[rows]
+        return times, values
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help='add price CSVs, one ticker per file named after it')
+    ingest.add_argument('store')
+    ingest.add_argument('csv', nargs='+')
+    ingest.add_argument('--resolution', default='daily')
+    info = commands.add_parser('info', help='list the partitions of a store')
+    info.add_argument('store')
+    info.add_argument('--resolution', default='daily')
+    args = parser.parse_args()
+
+    store = BarStore(args.store)
+    if args.command == 'ingest':
+        bars = sum(store.ingest_csv(path, resolution=args.resolution) for path in args.csv)
+        print(f"ingested {bars} bars of {len(args.csv)} tickers into {store.root}/{resolution_name(args.resolution)}")
+    else:
+        for ticker in store.tickers(args.resolution):
+            partition = store.partition(ticker, args.resolution)
+            print(f"{ticker:<10} {len(partition):>8} bars  {partition.time[0]} .. {partition.time[-1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+# Local daily bars and point-in-time fundamentals for the offline engine.
+#
+# Directory layout:
+#   prices/<TICKER>.csv   date,open,high,low,close,volume
+#   fundamentals.csv      date,ticker,sector,ipo_date,market_cap,roe,net_margin,pe_ratio
+#
+# Everything is loaded once into (dates x symbols) arrays; missing bars are NaN and
+# fundamentals are forward-filled from the last report on or before each date.
+#
+# A loaded dataset can be published to shared memory (Dataset.share) and attached
+# read-only from other processes (Dataset.attach) without copying the arrays.
+
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from AlgorithmImports import Symbol
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+FUNDAMENTAL_FIELDS = ('market_cap', 'roe', 'net_margin', 'pe_ratio')
+
+
+class Dataset:
+    def __init__(self, dates, tickers, prices, fundamentals=None, sectors=None, ipo_dates=None, has_fundamentals=None):
+        '''Args:
+            dates: datetime64[D] array of trading days, ascending
+            tickers: column order of every (dates x symbols) array
+            prices: dict of PRICE_FIELDS -> (dates x symbols) float arrays
+            fundamentals: dict of FUNDAMENTAL_FIELDS -> (dates x symbols) float arrays
+            sectors, ipo_dates: per-symbol Morningstar sector code and IPO date
+            has_fundamentals: (dates x symbols) bool array, derived from market_cap if omitted'''
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.symbols = [Symbol(x) for x in self.tickers]
+        self.column_by_symbol = {s: i for i, s in enumerate(self.symbols)}
+        self.prices = prices
+        self.fundamentals = fundamentals or {}
+        self.sectors = sectors if sectors is not None else np.zeros(len(self.tickers), dtype=np.int64)
+        self.ipo_dates = ipo_dates if ipo_dates is not None else np.full(len(self.tickers), np.datetime64('NaT', 'D'))
+        if has_fundamentals is None:
+            has_fundamentals = (~np.isnan(self.fundamentals['market_cap']) if 'market_cap' in self.fundamentals
+                                else np.zeros(self.prices['close'].shape, dtype=bool))
+        self.has_fundamentals = has_fundamentals
+
+    def __getattr__(self, name):
+        if name in PRICE_FIELDS:
+            return self.prices[name]
+        raise AttributeError(name)
+
+    @classmethod
+    def load(cls, directory):
+        frames = {}
+        price_dir = os.path.join(directory, 'prices')
+        for name in sorted(os.listdir(price_dir)):
+            if name.endswith('.csv'):
+                frames[os.path.splitext(name)[0]] = pd.read_csv(os.path.join(price_dir, name), parse_dates=['date'])
+        tickers = sorted(frames)
+
+        dates = np.unique(np.concatenate([frame['date'].values.astype('datetime64[D]') for frame in frames.values()]))
+        prices = {field: np.full((len(dates), len(tickers)), np.nan) for field in PRICE_FIELDS}
+        for column, ticker in enumerate(tickers):
+            frame = frames[ticker]
+            rows = np.searchsorted(dates, frame['date'].values.astype('datetime64[D]'))
+            for field in PRICE_FIELDS:
+                prices[field][rows, column] = frame[field].values
+
+        fundamentals = sectors = ipo_dates = None
+        path = os.path.join(directory, 'fundamentals.csv')
+        if os.path.exists(path):
+            fundamentals, sectors, ipo_dates = cls._load_fundamentals(path, dates, tickers)
+        return cls(dates, tickers, prices, fundamentals, sectors, ipo_dates)
+
+    @staticmethod
+    def _load_fundamentals(path, dates, tickers):
+        frame = pd.read_csv(path, parse_dates=['date', 'ipo_date'])
+        frame = frame[frame['ticker'].isin(tickers)].sort_values('date', kind='stable')
+        columns = np.searchsorted(tickers, frame['ticker'].values)
+        # A report dated on a non-trading day applies from the next trading day
+        rows = np.searchsorted(dates, frame['date'].values.astype('datetime64[D]'))
+        inside = rows < len(dates)
+
+        fundamentals = {}
+        for field in FUNDAMENTAL_FIELDS:
+            values = np.full((len(dates), len(tickers)), np.nan)
+            values[rows[inside], columns[inside]] = frame[field].values[inside]
+            fundamentals[field] = pd.DataFrame(values).ffill().to_numpy()
+
+        last = frame.groupby('ticker').last()
+        sectors = np.zeros(len(tickers), dtype=np.int64)
+        ipo_dates = np.full(len(tickers), np.datetime64('NaT', 'D'))
+        positions = np.searchsorted(tickers, last.index.values)
+        sectors[positions] = last['sector'].values
+        ipo_dates[positions] = last['ipo_date'].values.astype('datetime64[D]')
+        return fundamentals, sectors, ipo_dates
+
+    # Shared memory
+
+    def arrays(self):
+        '''Every array of the dataset by a flat name'''
+        arrays = {'dates': self.dates, 'sectors': self.sectors, 'ipo_dates': self.ipo_dates,
+                  'has_fundamentals': self.has_fundamentals}
+        arrays.update({f"prices.{k}": v for k, v in self.prices.items()})
+        arrays.update({f"fundamentals.{k}": v for k, v in self.fundamentals.items()})
+        return arrays
+
+    def share(self):
+        '''Copies the arrays into one shared memory block. Returns the block, which the
+        caller must close and unlink when done, and the picklable spec for attach().'''
+        arrays = [np.ascontiguousarray(array) for array in self.arrays().values()]
+        layout = []
+        offset = 0
+        for name, array in zip(self.arrays(), arrays):
+            offset = -(-offset // 64) * 64
+            layout.append((name, array.dtype.str, array.shape, offset))
+            offset += array.nbytes
+        block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, dtype, shape, start), array in zip(layout, arrays):
+            np.ndarray(shape, dtype, block.buf, start)[...] = array
+        return block, {'block': block.name, 'tickers': self.tickers, 'layout': layout}
+
+    @classmethod
+    def attach(cls, spec):
+        '''Read-only dataset over the shared memory block described by spec, for use in
+        processes started by multiprocessing. The block stays mapped while the dataset lives.'''
+        # Processes started by multiprocessing share the creator's resource tracker,
+        # so attaching doesn't make this process an owner of the block
+        block = shared_memory.SharedMemory(spec['block'])
+        arrays = {}
+        for name, dtype, shape, start in spec['layout']:
+            array = np.ndarray(shape, dtype, block.buf, start)
+            array.flags.writeable = False
+            arrays[name] = array
+        prices = {k.split('.', 1)[1]: v for k, v in arrays.items() if k.startswith('prices.')}
+        fundamentals = {k.split('.', 1)[1]: v for k, v in arrays.items() if k.startswith('fundamentals.')}
+        dataset = cls(arrays['dates'], spec['tickers'], prices, fundamentals, arrays['sectors'],
+                      arrays['ipo_dates'], arrays['has_fundamentals'])
+        dataset.block = block
+        return dataset
+
+    def row_of(self, time):
+        '''Index of the last trading day on or before time'''
+        return int(np.searchsorted(self.dates, np.datetime64(time, 'D'), side='right')) - 1
@@ -0,0 +1,354 @@
+# Local, daily-resolution event-driven backtest engine for the algorithms in this repo.
+#
+# It covers only the LEAN features these strategies use: coarse/fine universe selection,
+# History, SetHoldings/Liquidate/MarketOrder, alpha models with Insight.Price, equal
+# weighting portfolio construction and immediate execution. Each trading day is one
+# time step: universe selection on the previous day's coarse data, security changes,
+# consolidator/indicator updates, OnData, then the alpha -> portfolio -> execution chain.
+# Orders fill immediately at the day's close.
+
+import random
+import time as clock
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from AlgorithmImports import (CoarseFundamental, FineFundamental, QCAlgorithm, Security, SecurityChanges,
+                              Slice, TradeBar, Universe)
+
+# Period of the daily bars the engine replays
+DAY = timedelta(days=1)
+
+
+class CallbackTimer:
+    '''Accumulates call counts and wall time per named callback'''
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+
+    def wrap(self, name, func):
+        def timed(*args, **kwargs):
+            start = clock.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds[name] = self.seconds.get(name, 0.0) + clock.perf_counter() - start
+                self.calls[name] = self.calls.get(name, 0) + 1
+        return timed
+
+    def report(self):
+        lines = [f"{'callback':<44} {'calls':>8} {'total s':>9} {'mean ms':>9}"]
+        for name in sorted(self.seconds, key=self.seconds.get, reverse=True):
+            calls = self.calls[name]
+            lines.append(f"{name:<44} {calls:>8} {self.seconds[name]:>9.3f} {self.seconds[name] / calls * 1e3:>9.3f}")
+        return '\n'.join(lines)
+
+
+class CoarseFeed:
+    '''One day of coarse data, built on first use: like LEAN's lazily enumerated feed, a
+    selection that returns Universe.Unchanged without looking at it costs nothing'''
+
+    def __init__(self, build):
+        self.build = build
+        self.items = None
+
+    def materialize(self):
+        if self.items is None:
+            self.items = self.build()
+        return self.items
+
+    def __iter__(self):
+        return iter(self.materialize())
+
+    def __len__(self):
+        return len(self.materialize())
+
+    def __getitem__(self, index):
+        return self.materialize()[index]
+
+
+class DatasetSecurity(Security):
+    '''Security whose Fundamentals are read from the dataset as of the algorithm's time'''
+
+    def __init__(self, symbol, engine):
+        super().__init__(symbol)
+        self.engine = engine
+
+    @property
+    def Fundamentals(self):
+        return self.engine.fine_fundamental(self.Symbol, self.engine.row)
+
+    @Fundamentals.setter
+    def Fundamentals(self, value):
+        pass
+
+
+class BacktestResult:
+    def __init__(self, algorithm, timer, days, events, seconds, orders, equity=None):
+        self.algorithm = algorithm
+        self.timer = timer
+        self.days = days
+        self.events = events
+        self.seconds = seconds
+        self.orders = orders
+        self.equity = np.asarray(equity if equity is not None else [], dtype=float)
+
+    def metrics(self):
+        '''Total return, annualised Sharpe ratio and maximum drawdown of the daily equity curve'''
+        equity = self.equity
+        if len(equity) < 2 or equity[0] <= 0:
+            return {'total_return': 0.0, 'sharpe': 0.0, 'max_drawdown': 0.0}
+        returns = np.diff(equity) / equity[:-1]
+        std = returns.std()
+        return {
+            'total_return': float(equity[-1] / equity[0] - 1),
+            'sharpe': float(returns.mean() / std * np.sqrt(252)) if std > 0 else 0.0,
+            'max_drawdown': float((1 - equity / np.maximum.accumulate(equity)).max()),
+        }
+
+    @property
+    def events_per_second(self):
+        return self.events / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        portfolio = self.algorithm.Portfolio
+        return '\n'.join([
+            f"algorithm:        {type(self.algorithm).__name__}",
+            f"trading days:     {self.days}",
+            f"events:           {self.events}  (bars, coarse and fine rows, order events)",
+            f"wall time:        {self.seconds:.3f} s",
+            f"events/second:    {self.events_per_second:,.0f}",
+            f"orders:           {self.orders}",
+            f"portfolio value:  {portfolio.TotalPortfolioValue:,.2f}",
+            "return:           {total_return:.2%}   sharpe: {sharpe:.2f}   max drawdown: {max_drawdown:.2%}".format(**self.metrics()),
+            '',
+            self.timer.report(),
+        ])
+
+
+class LocalBacktest:
+    def __init__(self, algorithm_type, dataset, object_store=None, seed=0, parameters=None, history_cache=None,
+                 bar_store=None):
+        '''Args:
+            parameters: values returned by GetParameter, as strings like on QuantConnect
+            history_cache: dict shared between backtests over the same dataset so History
+                frames (and so indicator warm-up) are only built once per (day, symbol, periods)
+            bar_store: BarStore (offline/barstore.py) that serves History instead of the dataset'''
+        self.algorithm_type = algorithm_type
+        self.dataset = dataset
+        self.object_store = object_store
+        self.seed = seed
+        self.parameters = {k: str(v) for k, v in (parameters or {}).items()}
+        self.history_cache = history_cache if history_cache is not None else {}
+        self.bar_store = bar_store
+        self.timer = CallbackTimer()
+        self.row = -1
+        self.events = 0
+        self.fine_cache = {}
+
+    # Data access
+
+    def fine_fundamental(self, symbol, row):
+        column = self.dataset.column_by_symbol.get(symbol)
+        if column is None or row < 0 or not self.dataset.has_fundamentals[row, column]:
+            return None
+        key = (row, column)
+        fine = self.fine_cache.get(key)
+        if fine is None:
+            data = self.dataset
+            ipo = data.ipo_dates[column]
+            fine = FineFundamental(
+                symbol,
+                float(data.fundamentals['market_cap'][row, column]),
+                int(data.sectors[column]),
+                datetime.min if np.isnat(ipo) else pd.Timestamp(ipo).to_pydatetime(),
+                float(data.fundamentals['roe'][row, column]),
+                float(data.fundamentals['net_margin'][row, column]),
+                float(data.fundamentals['pe_ratio'][row, column]))
+            self.fine_cache[key] = fine
+        return fine
+
+    def history(self, symbols, periods, resolution=None):
+        '''Last `periods` bars of each symbol strictly before the current day, as the
+        (symbol, time) indexed DataFrame LEAN returns'''
+        if not isinstance(symbols, (list, tuple)):
+            symbols = [symbols]
+        if self.bar_store is not None:
+            return self.bar_store.history(symbols, periods, self.dataset.dates[self.row], resolution)
+        frames = []
+        keys = []
+        for symbol in symbols:
+            key = (self.row, symbol, periods)
+            frame = self.history_cache.get(key)
+            if frame is None:
+                frame = self.history_cache[key] = self.symbol_history(symbol, periods)
+            if len(frame):
+                frames.append(frame)
+                keys.append(symbol)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, keys=keys, names=['symbol', 'time'])
+
+    def symbol_history(self, symbol, periods):
+        data = self.dataset
+        column = data.column_by_symbol.get(symbol)
+        if column is None or self.row <= 0:
+            return pd.DataFrame()
+        closes = data.close[:self.row, column]
+        rows = np.flatnonzero(~np.isnan(closes))[-periods:]
+        return pd.DataFrame({field: data.prices[field][rows, column] for field in ('open', 'high', 'low', 'close', 'volume')},
+                            index=pd.DatetimeIndex(data.dates[rows], name='time'))
+
+    # Universe selection
+
+    def coarse(self, row):
+        data = self.dataset
+        closes = data.close[row]
+        volumes = data.volume[row]
+        has_fundamentals = data.has_fundamentals[row]
+        columns = np.flatnonzero(~np.isnan(closes))
+        return [CoarseFundamental(data.symbols[c], p, v, f)
+                for c, p, v, f in zip(columns.tolist(), closes[columns].tolist(),
+                                      np.nan_to_num(volumes[columns]).tolist(), has_fundamentals[columns].tolist())]
+
+    def select_universe(self, algorithm, universes, members):
+        if self.row <= 0:
+            return None
+        selected = set()
+        unchanged = True
+        for coarse_function, fine_function in universes:
+            row = self.row - 1
+            coarse = CoarseFeed(lambda: self.coarse(row))
+            symbols = coarse_function(coarse)
+            if coarse.items is not None:
+                self.events += len(coarse.items)
+            if symbols is Universe.Unchanged:
+                selected |= members
+                continue
+            unchanged = False
+            symbols = list(symbols)
+            if fine_function is not None:
+                fine = [x for x in (self.fine_fundamental(s, self.row - 1) for s in symbols) if x is not None]
+                self.events += len(fine)
+                symbols = fine_function(fine)
+                if symbols is Universe.Unchanged:
+                    selected |= members
+                    continue
+            selected |= set(symbols)
+        if unchanged:
+            return None
+
+        added = [algorithm.GetSecurity(s) for s in sorted(selected - members)]
+        removed = [algorithm.Securities[s] for s in sorted(members - selected)]
+        if not added and not removed:
+            return None
+        for security in added:
+            algorithm.ActiveSecurities[security.Symbol] = security
+        for security in removed:
+            algorithm.ActiveSecurities.pop(security.Symbol, None)
+        members.clear()
+        members |= selected
+        return SecurityChanges(added, removed)
+
+    # Main loop
+
+    def run(self):
+        random.seed(self.seed)
+        algorithm = self.algorithm_type()
+        algorithm.parameters.update(self.parameters)
+        engine = self
+        algorithm.GetSecurity = lambda symbol: (algorithm.Securities.get(symbol)
+                                                or algorithm.Securities.setdefault(symbol, DatasetSecurity(symbol, engine)))
+        algorithm.historyProvider = self.timer.wrap('History', self.history)
+        if self.object_store is not None:
+            algorithm.ObjectStore = self.object_store
+
+        orders = [0]
+        on_order_event = self.timer.wrap('OnOrderEvent', algorithm.OnOrderEvent)
+        def count_order(order_event):
+            orders[0] += 1
+            on_order_event(order_event)
+        algorithm.OnOrderEvent = count_order
+
+        started = clock.perf_counter()
+        self.timer.wrap('Initialize', algorithm.Initialize)()
+
+        timed = self.timer.wrap
+        universes = [(timed('CoarseSelectionFunction', coarse), fine and timed('FineSelectionFunction', fine))
+                     for coarse, fine in algorithm.universes]
+        on_securities_changed = getattr(algorithm, 'OnSecuritiesChanged', None)
+        on_data = getattr(algorithm, 'OnData', None)
+        on_end = getattr(algorithm, 'OnEndOfAlgorithm', None)
+        alphas = [(type(alpha).__name__, alpha) for alpha in algorithm.alphas]
+        models = [m for m in (algorithm.portfolioConstruction, algorithm.execution, algorithm.riskManagement) if m is not None]
+
+        data = self.dataset
+        start = data.row_of(algorithm.StartDate - pd.Timedelta(days=1)) + 1 if algorithm.StartDate else 0
+        end = data.row_of(algorithm.EndDate) if algorithm.EndDate else len(data.dates) - 1
+        members = set()
+        days = 0
+        equity = []
+
+        for self.row in range(max(start, 0), end + 1):
+            days += 1
+            day = pd.Timestamp(data.dates[self.row]).to_pydatetime()
+            algorithm.Time = day
+
+            changes = self.select_universe(algorithm, universes, members)
+
+            symbols = list(algorithm.ActiveSecurities.keys()) + algorithm.manualSymbols
+            bars = {}
+            for symbol in symbols:
+                column = data.column_by_symbol.get(symbol)
+                if column is None or np.isnan(data.close[self.row, column]):
+                    continue
+                o, h, l, c, v = (float(data.prices[f][self.row, column]) for f in ('open', 'high', 'low', 'close', 'volume'))
+                bars[symbol] = TradeBar(day, symbol, o, h, l, c, v, DAY)
+                algorithm.GetSecurity(symbol).SetMarketPrice(bars[symbol])
+            self.events += len(bars)
+            slice = algorithm.CurrentSlice = Slice(day, bars)
+
+            if changes is not None:
+                if on_securities_changed is not None:
+                    timed('OnSecuritiesChanged', on_securities_changed)(changes)
+                for name, alpha in alphas:
+                    timed(f'{name}.OnSecuritiesChanged', alpha.OnSecuritiesChanged)(algorithm, changes)
+                for model in models:
+                    model.OnSecuritiesChanged(algorithm, changes)
+
+            timed('Consolidators', algorithm.UpdateRegisteredIndicators)(slice)
+            if not bars:
+                equity.append(algorithm.Portfolio.TotalPortfolioValue)
+                continue
+            if on_data is not None:
+                timed('OnData', on_data)(slice)
+
+            insights = []
+            for name, alpha in alphas:
+                insights.extend(timed(f'{name}.Update', alpha.Update)(algorithm, slice))
+            for insight in insights:
+                insight.SetGeneratedTime(algorithm.UtcTime)
+
+            if algorithm.portfolioConstruction is not None:
+                targets = timed('PortfolioConstruction', algorithm.portfolioConstruction.CreateTargets)(algorithm, insights)
+                # Like LEAN, execution runs every step so it can work targets over several bars
+                if algorithm.execution is not None:
+                    timed('Execution', algorithm.execution.Execute)(algorithm, targets)
+            equity.append(algorithm.Portfolio.TotalPortfolioValue)
+
+        if on_end is not None:
+            timed('OnEndOfAlgorithm', on_end)()
+        seconds = clock.perf_counter() - started
+        self.events += orders[0]
+        return BacktestResult(algorithm, self.timer, days, self.events, seconds, orders[0], equity)
+
+
+def find_algorithm(module):
+    '''Returns the QCAlgorithm subclass defined in module'''
+    for value in vars(module).values():
+        if isinstance(value, type) and issubclass(value, QCAlgorithm) and value is not QCAlgorithm \
+                and value.__module__ == module.__name__:
+            return value
+    raise ValueError(f"no QCAlgorithm subclass in {module.__file__}")
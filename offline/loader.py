@@ -0,0 +1,53 @@
+# Loads QuantConnect project files (main.py, AlphaModel.py, ...) outside of LEAN.
+# LEAN makes its API available to every project file without an import; we do the
+# same by publishing the local stand-ins from AlgorithmImports into builtins.
+
+import builtins
+import importlib.util
+import os
+import sys
+
+OFFLINE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(OFFLINE_DIR)
+LIBRARY_DIR = os.path.join(REPO_ROOT, 'library')
+
+# Shared project modules (library/) are importable the same way as on QuantConnect
+for path in (LIBRARY_DIR, OFFLINE_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import AlgorithmImports
+
+
+def install_algorithm_imports():
+    '''Makes the LEAN stand-ins visible to modules that rely on implicit imports'''
+    for name in dir(AlgorithmImports):
+        if not name.startswith('_'):
+            setattr(builtins, name, getattr(AlgorithmImports, name))
+
+
+def load_module(path, name=None):
+    '''Imports a project file by path. Sibling project modules imported with
+    `from AlphaModel import *` resolve against the file's own directory, so any
+    previously loaded module of the same name from another project is dropped.'''
+    install_algorithm_imports()
+    path = os.path.join(REPO_ROOT, path) if not os.path.isabs(path) else path
+    project_dir = os.path.dirname(path)
+
+    for sibling in os.listdir(project_dir):
+        module_name, ext = os.path.splitext(sibling)
+        if ext == '.py' and module_name in sys.modules:
+            existing = getattr(sys.modules[module_name], '__file__', '') or ''
+            if os.path.dirname(os.path.abspath(existing)) != project_dir:
+                del sys.modules[module_name]
+
+    sys.path.insert(0, project_dir)
+    try:
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(project_dir)
+    return module
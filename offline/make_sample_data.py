@@ -0,0 +1,70 @@
+# Writes a synthetic but realistically shaped dataset for the offline engine:
+# log-normal random-walk daily bars and quarterly fundamentals for every ticker.
+#
+#   python offline/make_sample_data.py data/sample --symbols 600 --start 2014-06-01 --end 2021-02-01
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SECTORS = (101, 102, 103, 104, 205, 206, 207, 308, 309, 310, 311)
+
+
+def generate(directory, symbols, start, end, seed=1):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, end)
+    os.makedirs(os.path.join(directory, 'prices'), exist_ok=True)
+
+    fundamentals = []
+    quarters = pd.date_range(start, end, freq='QS')
+    for i in range(symbols):
+        ticker = f"T{i:04d}"
+        # Some tickers list part-way through the period
+        first = 0 if rng.random() < 0.85 else int(rng.integers(0, len(dates) // 2))
+        days = dates[first:]
+        drift, vol = rng.normal(0.0003, 0.0004), rng.uniform(0.01, 0.04)
+        close = np.exp(np.log(rng.uniform(2, 300)) + np.cumsum(rng.normal(drift, vol, len(days))))
+        spread = close * rng.uniform(0.0, vol, len(days))
+        open_ = close * np.exp(rng.normal(0, vol / 2, len(days)))
+        volume = np.round(np.exp(rng.normal(np.log(rng.uniform(5e4, 5e6)), 0.5, len(days))))
+        pd.DataFrame({
+            'date': days.strftime('%Y-%m-%d'),
+            'open': np.round(open_, 4),
+            'high': np.round(np.maximum(open_, close) + spread, 4),
+            'low': np.round(np.minimum(open_, close) - spread, 4),
+            'close': np.round(close, 4),
+            'volume': volume.astype(np.int64),
+        }).to_csv(os.path.join(directory, 'prices', f"{ticker}.csv"), index=False)
+
+        if rng.random() < 0.2:
+            continue  # no fundamental coverage
+        sector = int(rng.choice(SECTORS))
+        ipo = days[0] - pd.Timedelta(days=int(rng.integers(0, 365 * 15)))
+        shares = rng.uniform(5e6, 5e8)
+        for quarter in quarters:
+            if quarter < days[0]:
+                continue
+            price = close[min(days.searchsorted(quarter), len(days) - 1)]
+            fundamentals.append((quarter.strftime('%Y-%m-%d'), ticker, sector, ipo.strftime('%Y-%m-%d'),
+                                 round(price * shares, 0), round(rng.normal(0.08, 0.15), 4),
+                                 round(rng.normal(0.06, 0.12), 4), round(rng.lognormal(2.8, 0.6) * rng.choice((1, 1, 1, -1)), 2)))
+
+    pd.DataFrame(fundamentals, columns=['date', 'ticker', 'sector', 'ipo_date', 'market_cap', 'roe', 'net_margin', 'pe_ratio']) \
+        .to_csv(os.path.join(directory, 'fundamentals.csv'), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directory')
+    parser.add_argument('--symbols', type=int, default=600)
+    parser.add_argument('--start', default='2014-06-01')
+    parser.add_argument('--end', default='2021-02-01')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    generate(args.directory, args.symbols, args.start, args.end, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+# Runs a parameter sweep of a QuantConnect project file on a process pool.
+#
+# The dataset is loaded once and published to shared memory; every worker attaches to
+# it read-only instead of holding its own copy. Grid points are grouped by their
+# warm-up length (the largest *-period parameter), and each group runs in one worker
+# with a shared History cache, so indicator warm-up history is built once per group.
+# Per-run metrics are printed, and appended to --out, as each run finishes.
+#
+#   python offline/sweep.py strategies/ema-cross/equal-weighted-portfolio/immediate-execution/main.py \
+#       --data data/sample --grid fast-period=3,5,8 slow-period=20,25,40 num-coarse=200,500 count=5,10 \
+#       [--samples 12] [--workers 8] [--out sweep.csv] [--start 2016-01-01] [--end 2017-01-01]
+#
+# Parameters reach the algorithm through GetParameter, as they do on QuantConnect.
+
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loader import load_module
+from backtest import with_dates
+from dataset import Dataset
+from engine import LocalBacktest, find_algorithm
+
+METRICS = ('total_return', 'sharpe', 'max_drawdown', 'orders', 'final_value', 'seconds')
+
+_dataset = None
+_algorithm_type = None
+_results = None
+_seed = 0
+
+
+def parse_grid(items):
+    '''['fast-period=3,5', 'count=5'] -> {'fast-period': ['3', '5'], 'count': ['5']}'''
+    grid = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        if not values:
+            raise ValueError(f"expected name=value[,value...], got {item!r}")
+        grid[name] = values.split(',')
+    return grid
+
+
+def grid_points(grid, samples=None, seed=0):
+    '''Every combination of the grid, or a random sample of them. Points with
+    fast-period >= slow-period are dropped.'''
+    names = list(grid)
+    points = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    points = [p for p in points
+              if not ('fast-period' in p and 'slow-period' in p and int(p['fast-period']) >= int(p['slow-period']))]
+    if samples is not None and samples < len(points):
+        points = random.Random(seed).sample(points, samples)
+    return points
+
+
+def warmup_length(parameters):
+    return max((int(v) for k, v in parameters.items() if k.endswith('-period')), default=0)
+
+
+def partition(points, workers):
+    '''Groups (index, point) pairs by warm-up length, splitting the largest groups
+    until there is at least one task per worker'''
+    groups = {}
+    for index, point in enumerate(points):
+        groups.setdefault(warmup_length(point), []).append((index, point))
+    tasks = list(groups.values())
+    while len(tasks) < workers:
+        tasks.sort(key=len)
+        largest = tasks.pop()
+        if len(largest) < 2:
+            tasks.append(largest)
+            break
+        half = len(largest) // 2
+        tasks += [largest[:half], largest[half:]]
+    # Longest first so the pool doesn't finish on one big group
+    return sorted(tasks, key=len, reverse=True)
+
+
+def _init_worker(spec, algorithm_path, start, end, results, seed):
+    global _dataset, _algorithm_type, _results, _seed
+    _dataset = Dataset.attach(spec)
+    _algorithm_type = find_algorithm(load_module(algorithm_path, 'main'))
+    if start or end:
+        _algorithm_type = with_dates(_algorithm_type, start, end)
+    _results = results
+    _seed = seed
+
+
+def _run_group(points):
+    history_cache = {}
+    for index, parameters in points:
+        try:
+            result = LocalBacktest(_algorithm_type, _dataset, seed=_seed, parameters=parameters,
+                                   history_cache=history_cache).run()
+            row = result.metrics()
+            row.update(orders=result.orders, final_value=result.algorithm.Portfolio.TotalPortfolioValue,
+                       seconds=result.seconds)
+        except Exception as e:
+            row = {'error': f"{type(e).__name__}: {e}"}
+        _results.put((index, parameters, row))
+    return len(points)
+
+
+def sweep(algorithm_path, dataset, points, workers=None, start=None, end=None, seed=0):
+    '''Yields (index, parameters, metrics) for every point as runs finish'''
+    workers = workers or os.cpu_count()
+    block, spec = dataset.share()
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    try:
+        with ProcessPoolExecutor(workers, context, _init_worker,
+                                 (spec, algorithm_path, start, end, results, seed)) as pool:
+            futures = [pool.submit(_run_group, task) for task in partition(points, workers)]
+            received = 0
+            while received < len(points):
+                try:
+                    yield results.get(timeout=1)
+                    received += 1
+                except queue.Empty:
+                    # Surface worker crashes instead of waiting forever
+                    for future in futures:
+                        if future.done() and future.exception() is not None:
+                            raise future.exception()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def format_row(names, parameters, row):
+    cells = [f"{parameters[n]:>12}" for n in names]
+    if 'error' in row:
+        return ' '.join(cells + [row['error']])
+    return ' '.join(cells + [f"{row['total_return']:>12.2%}", f"{row['sharpe']:>8.2f}", f"{row['max_drawdown']:>12.2%}",
+                             f"{row['orders']:>7}", f"{row['final_value']:>14,.2f}", f"{row['seconds']:>8.2f}"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('algorithm', help='path to the project file defining the QCAlgorithm')
+    parser.add_argument('--data', required=True, help='dataset directory (see offline/dataset.py)')
+    parser.add_argument('--grid', nargs='+', required=True, metavar='NAME=V1,V2', help='parameter values to sweep')
+    parser.add_argument('--samples', type=int, help='random search: run this many points of the grid')
+    parser.add_argument('--workers', type=int, help='worker processes, default one per core')
+    parser.add_argument('--out', help='CSV file the results are appended to as they arrive')
+    parser.add_argument('--start', help='override the algorithm start date, YYYY-MM-DD')
+    parser.add_argument('--end', help='override the algorithm end date, YYYY-MM-DD')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    grid = parse_grid(args.grid)
+    points = grid_points(grid, args.samples, args.seed)
+    names = list(grid)
+    started = time.perf_counter()
+    dataset = Dataset.load(args.data)
+    print(f"{len(points)} runs, dataset of {len(dataset.dates)} days x {len(dataset.tickers)} symbols "
+          f"loaded in {time.perf_counter() - started:.1f} s")
+
+    out = open(args.out, 'a', newline='') if args.out else None
+    writer = csv.DictWriter(out, ['run'] + names + list(METRICS) + ['error']) if out else None
+    if out and out.tell() == 0:
+        writer.writeheader()
+
+    print(' '.join([f"{n:>12}" for n in names] + [f"{'return':>12}", f"{'sharpe':>8}", f"{'max drawdown':>12}",
+                                                    f"{'orders':>7}", f"{'final value':>14}", f"{'wall s':>8}"]))
+    finished = []
+    try:
+        for index, parameters, row in sweep(args.algorithm, dataset, points, args.workers, args.start, args.end, args.seed):
+            print(format_row(names, parameters, row), flush=True)
+            finished.append((parameters, row))
+            if writer:
+                writer.writerow({'run': index, **parameters, **row})
+                out.flush()
+    finally:
+        if out:
+            out.close()
+
+    ranked = sorted((x for x in finished if 'error' not in x[1]), key=lambda x: x[1]['sharpe'], reverse=True)
+    print(f"\n{len(finished)} runs in {time.perf_counter() - started:.1f} s; best by sharpe:")
+    for parameters, row in ranked[:5]:
+        print(format_row(names, parameters, row))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
 from AlphaModel import *
+from CoarseSelection import *
+from Instrumentation import *
+from UniverseScheduler import *
 import random
 
 class SmoothMagentaOwl(QCAlgorithm):
@@ -12,37 +15,43 @@ class SmoothMagentaOwl(QCAlgorithm):
         self.SetBenchmark("SPY")
         
         # 500 securities sent to Fine Filter, 5 output from Fine
-        self.num_coarse = 500
-        self.count = 5
+        # (overridable with the num-coarse and count parameters)
+        self.num_coarse = int(self.GetParameter("num-coarse") or 500)
+        self.count = int(self.GetParameter("count") or 5)
+        self.coarseSelection = TopDollarVolumeSelection(self.num_coarse, minPrice=5)
         self.activeStocks = []
-        self._changes = None
         
         # Small-Cap stock definition defined by Investopedia (300M - 2B)
         # https://www.investopedia.com/terms/s/small-cap.asp
         self.smallCapLowerBound = 300000000.0 # 300 million
         self.smallCapUpperBound = 2000000000.0 # 2 billion
         
+        # Callback timers, counters and leveled logging (log-level parameter), summarised weekly
+        self.instrumentation = Instrumentation(self)
+        
+        # Reselect the universe every 5 trading days; on other days selection is skipped
+        # before the coarse data is read
+        self.universeScheduler = UniverseScheduler(self, Cadence.EveryTradingDays(5))
+        
         self.UniverseSettings.Resolution = Resolution.Daily
-        self.AddUniverse(self.CoarseSelectionFunction, self.FineSelectionFunction)
+        self.AddUniverse(*self.universeScheduler.Schedule(
+            self.instrumentation.Timed("CoarseSelectionFunction", self.CoarseSelectionFunction),
+            self.instrumentation.Timed("FineSelectionFunction", self.FineSelectionFunction)))
         
-        # Alpha Model
-        self.AddAlpha(EmaCrossAlphaModel())
+        # Alpha Model (EMA periods overridable with the fast-period and slow-period parameters;
+        # emit-on-cross=true emits insights only when the EMAs cross or the last one is about to expire)
+        self.AddAlpha(self.instrumentation.Instrument(EmaCrossAlphaModel(int(self.GetParameter("fast-period") or 5),
+                                                                         int(self.GetParameter("slow-period") or 25),
+                                                                         emitOnCross=self.GetParameter("emit-on-cross") == "true")))
         
         self.SetPortfolioConstruction(EqualWeightingPortfolioConstructionModel())
         self.SetExecution(ImmediateExecutionModel())
         
     def CoarseSelectionFunction(self, coarse):
         
-        # Only rebalance Universe every 5 days
-        if self.Time.day % 5 != 0:
-            return Universe.Unchanged
-        
         # Select only those with fundamental data and a sufficiently large price
         # Sort by top dollar volume: most liquid to least liquid
-        selected = sorted([x for x in coarse if x.HasFundamentalData and x.Price > 5],
-                            key = lambda x: x.DollarVolume, reverse=True)
-
-        return [x.Symbol for x in selected[:self.num_coarse]]
+        return self.coarseSelection.SelectSymbols(coarse)
 
 
     def FineSelectionFunction(self, fine):
@@ -52,19 +61,5 @@ class SmoothMagentaOwl(QCAlgorithm):
         
         return [x.Symbol for x in small_market_cap[:self.count]]
 
-    def OnData(self, data):
-        # if we have no changes, do nothing
-        if self._changes is None: return
-    
-        # liquidate removed securities
-        for security in self._changes.RemovedSecurities:
-            if security.Invested:
-                self.Liquidate(security.Symbol)
-
-        # we want 1/N allocation in each security in our universe
-        for security in self._changes.AddedSecurities:
-            self.SetHoldings(security.Symbol, 1 / self.count)
-
-        self._changes = None
-    
-    
+    def OnEndOfAlgorithm(self):
+        self.instrumentation.Flush(force=True)
@@ -0,0 +1,2 @@
+# The EMA-cross alpha model is shared by every strategies/ema-cross project, see library/EmaCrossAlpha.py
+from EmaCrossAlpha import *
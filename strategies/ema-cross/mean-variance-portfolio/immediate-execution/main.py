@@ -0,0 +1,66 @@
+from AlphaModel import *
+from CoarseSelection import *
+from Instrumentation import *
+from UniverseScheduler import *
+from MeanVariancePortfolio import *
+import random
+
+class MeanVarianceEmaCross(QCAlgorithm):
+
+    def Initialize(self):
+        self.SetStartDate(2015, 1, 1)  # Set Start Date
+        self.SetEndDate(2018, 6, 1)  # Set Start Date
+        self.SetCash(100000)  # Set Strategy Cash
+        
+        # Compare to the SPY chart
+        self.SetBenchmark("SPY")
+        
+        # 500 securities sent to Fine Filter, 5 output from Fine
+        # (overridable with the num-coarse and count parameters)
+        self.num_coarse = int(self.GetParameter("num-coarse") or 500)
+        self.count = int(self.GetParameter("count") or 5)
+        self.coarseSelection = TopDollarVolumeSelection(self.num_coarse, minPrice=5)
+        self.activeStocks = []
+        
+        # Small-Cap stock definition defined by Investopedia (300M - 2B)
+        # https://www.investopedia.com/terms/s/small-cap.asp
+        self.smallCapLowerBound = 300000000.0 # 300 million
+        self.smallCapUpperBound = 2000000000.0 # 2 billion
+        
+        # Callback timers, counters and leveled logging (log-level parameter), summarised weekly
+        self.instrumentation = Instrumentation(self)
+        
+        # Reselect the universe every 5 trading days; on other days selection is skipped
+        # before the coarse data is read
+        self.universeScheduler = UniverseScheduler(self, Cadence.EveryTradingDays(5))
+        
+        self.UniverseSettings.Resolution = Resolution.Daily
+        self.AddUniverse(*self.universeScheduler.Schedule(
+            self.instrumentation.Timed("CoarseSelectionFunction", self.CoarseSelectionFunction),
+            self.instrumentation.Timed("FineSelectionFunction", self.FineSelectionFunction)))
+        
+        # Alpha Model (EMA periods overridable with the fast-period and slow-period parameters;
+        # emit-on-cross=true emits insights only when the EMAs cross or the last one is about to expire)
+        self.AddAlpha(self.instrumentation.Instrument(EmaCrossAlphaModel(int(self.GetParameter("fast-period") or 5),
+                                                                         int(self.GetParameter("slow-period") or 25),
+                                                                         emitOnCross=self.GetParameter("emit-on-cross") == "true")))
+        
+        self.SetPortfolioConstruction(MeanVariancePortfolioConstructionModel(int(self.GetParameter("lookback") or 63)))
+        self.SetExecution(ImmediateExecutionModel())
+        
+    def CoarseSelectionFunction(self, coarse):
+        
+        # Select only those with fundamental data and a sufficiently large price
+        # Sort by top dollar volume: most liquid to least liquid
+        return self.coarseSelection.SelectSymbols(coarse)
+
+
+    def FineSelectionFunction(self, fine):
+        # Selects 5 random Small-Cap stocks
+        small_market_cap = [x for x in fine if x.MarketCap > self.smallCapLowerBound and x.MarketCap < self.smallCapUpperBound]
+        random.shuffle(small_market_cap)
+        
+        return [x.Symbol for x in small_market_cap[:self.count]]
+
+    def OnEndOfAlgorithm(self):
+        self.instrumentation.Flush(force=True)
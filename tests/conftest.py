@@ -0,0 +1,11 @@
+# Makes library/ and the offline LEAN stand-ins importable from the tests, the same way
+# offline/loader.py does for project files.
+#
+#   python -m pytest -q tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'offline'))
+
+import loader  # noqa: E402,F401
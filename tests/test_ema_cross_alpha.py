@@ -0,0 +1,52 @@
+from EmaCrossAlpha import EmaCrossAlphaModel
+from AlgorithmImports import QCAlgorithm, SecurityChanges, Slice, Symbol, TradeBar, datetime, np, timedelta
+
+MINUTES = [timedelta(hours=9, minutes=30), timedelta(hours=12), timedelta(hours=15, minutes=59)]
+
+
+def trading_days(count, start=datetime(2019, 7, 8)):
+    days = np.busday_offset(np.datetime64(start.date(), 'D'), np.arange(count), roll='forward')
+    return [datetime.combine(day.astype(datetime), datetime.min.time()) for day in days]
+
+
+def setup(symbols, model):
+    algorithm = QCAlgorithm()
+    model.OnSecuritiesChanged(algorithm, SecurityChanges([algorithm.GetSecurity(s) for s in symbols]))
+    return algorithm
+
+
+def test_intraday_feed_emits_once_per_session():
+    symbols = [Symbol("UP"), Symbol("DOWN")]
+    model = EmaCrossAlphaModel(2, 3, vectorized=True)
+    algorithm = setup(symbols, model)
+
+    emitted = []
+    for day, session in enumerate(trading_days(5)):
+        for minute, offset in enumerate(MINUTES):
+            now = session + offset
+            price = 10.0 + day + minute / 10
+            bars = {symbols[0]: TradeBar(now, symbols[0], price, price, price, price, 100.0),
+                    symbols[1]: TradeBar(now, symbols[1], 100 / price, 100 / price, 100 / price, 100 / price, 100.0)}
+            algorithm.Time = now
+            insights = model.Update(algorithm, Slice(now, bars))
+            if insights:
+                emitted.append((now, sorted((str(x.Symbol), x.Direction) for x in insights)))
+
+    # One daily EMA step per session, so the slow EMA is ready from the third session close
+    assert model.emaState.slowSamples[:2].tolist() == [5, 5]
+    assert [now - now.replace(hour=0, minute=0) for now, _ in emitted] == [MINUTES[-1]] * 3
+    assert all(directions == [("DOWN", -1), ("UP", 1)] for _, directions in emitted)
+
+
+def test_daily_feed_emits_every_bar():
+    symbols = [Symbol("UP")]
+    model = EmaCrossAlphaModel(2, 3, vectorized=True)
+    algorithm = setup(symbols, model)
+
+    counts = []
+    for day, now in enumerate(trading_days(5)):
+        bar = TradeBar(now, symbols[0], 10.0 + day, 10.0 + day, 10.0 + day, 10.0 + day, 1e6, timedelta(days=1))
+        algorithm.Time = now
+        counts.append(len(model.Update(algorithm, Slice(now, {symbols[0]: bar}))))
+    assert model.consolidator is None
+    assert counts == [0, 0, 1, 1, 1]
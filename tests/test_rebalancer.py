@@ -0,0 +1,54 @@
+from Rebalancer import TargetWeightRebalancer
+from AlgorithmImports import QCAlgorithm, Symbol
+
+
+class Recording(QCAlgorithm):
+    '''Records (symbol, quantity, asynchronous) of every market order and every log line'''
+    def __init__(self):
+        super().__init__()
+        self.orders = []
+        self.logged = []
+
+    def MarketOrder(self, symbol, quantity, asynchronous=False, tag=""):
+        self.orders.append((symbol, quantity, asynchronous))
+        return super().MarketOrder(symbol, quantity, asynchronous, tag)
+
+    def Log(self, message):
+        self.logged.append(message)
+
+
+def setup(prices):
+    algorithm = Recording()
+    algorithm.SetCash(100000)
+    symbols = [Symbol(ticker) for ticker in prices]
+    for symbol, price in zip(symbols, prices.values()):
+        algorithm.GetSecurity(symbol).Price = price
+    return algorithm, symbols
+
+
+def test_sells_are_synchronous_and_before_buys():
+    algorithm, (a, b, c) = setup({'A': 10.0, 'B': 20.0, 'C': 50.0})
+    rebalancer = TargetWeightRebalancer(algorithm)
+    rebalancer.Rebalance({a: 0.5, b: 0.5})
+    algorithm.orders.clear()
+
+    rebalancer.Rebalance({a: 0.0, b: 0.2, c: 0.5})
+    assert [(symbol, asynchronous) for symbol, _, asynchronous in algorithm.orders] == [(a, False), (b, False), (c, True)]
+    assert algorithm.Portfolio[a].Quantity == 0 and algorithm.Portfolio[c].Quantity == 1000
+
+
+def test_unpriced_targets_are_skipped_and_reported():
+    algorithm, (a, b) = setup({'A': 10.0, 'B': 0.0})
+    rebalancer = TargetWeightRebalancer(algorithm)
+    missing = Symbol('MISSING')
+
+    rebalancer.Rebalance({a: 0.5, b: 0.5, missing: 0.0})
+    assert rebalancer.Skipped == [b]
+    assert rebalancer.TargetsSkipped == 1
+    assert algorithm.logged == ["Rebalance skipped 1 targets without a price: B"]
+    assert [symbol for symbol, _, _ in algorithm.orders] == [a]
+
+    algorithm.Securities[b].Price = 20.0
+    rebalancer.Rebalance({a: 0.5, b: 0.5})
+    assert rebalancer.Skipped == [] and len(algorithm.logged) == 1
+    assert algorithm.Portfolio[b].Quantity == 2500
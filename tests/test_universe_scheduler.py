@@ -0,0 +1,19 @@
+from UniverseScheduler import Cadence, UniverseScheduler
+from AlgorithmImports import QCAlgorithm, Universe, datetime
+
+
+def test_schedule_without_fine_selection_returns_only_coarse():
+    algorithm = QCAlgorithm()
+    scheduler = UniverseScheduler(algorithm, Cadence.EveryTradingDays(5))
+    selections = scheduler.Schedule(lambda coarse: [x for x in coarse])
+    assert len(selections) == 1
+
+    algorithm.Time = datetime(2019, 7, 8)
+    assert selections[0](["A", "B"]) == ["A", "B"]
+    algorithm.Time = datetime(2019, 7, 9)
+    assert selections[0](["C"]) is Universe.Unchanged
+
+
+def test_schedule_with_fine_selection_returns_both():
+    scheduler = UniverseScheduler(QCAlgorithm(), Cadence.Quarterly())
+    assert len(scheduler.Schedule(lambda coarse: coarse, lambda fine: fine)) == 2
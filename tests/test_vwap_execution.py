@@ -0,0 +1,137 @@
+from VwapExecution import SessionVwap, VwapExecutionModel
+from AlgorithmImports import (PortfolioTarget, QCAlgorithm, SecurityChanges, Slice, Symbol, TradeBar, datetime, np,
+                              pd, timedelta)
+
+OPEN = datetime(2019, 7, 1, 9, 30)
+
+
+def minute_bars(symbols, minutes, sessions=2, seed=17):
+    '''[(time, {symbol: TradeBar})] of `minutes` bars per session, with ~20% of bars missing'''
+    rng = np.random.default_rng(seed)
+    close = 50.0 * np.exp(np.cumsum(rng.normal(0, 0.001, (sessions * minutes, len(symbols))), axis=0))
+    spread = close * rng.uniform(0, 0.002, close.shape)
+    volume = np.round(np.exp(rng.normal(8, 1, close.shape)))
+    present = rng.random(close.shape) > 0.2
+    steps = []
+    for t in range(sessions * minutes):
+        now = OPEN + timedelta(days=t // minutes, minutes=t % minutes)
+        steps.append((now, {s: TradeBar(now, s, close[t, i], close[t, i] + spread[t, i], close[t, i] - spread[t, i],
+                                        close[t, i], volume[t, i])
+                            for i, s in enumerate(symbols) if present[t, i]}))
+    return steps
+
+
+def reference_vwap(steps, symbols):
+    '''Session VWAP of every symbol after every bar, carried forward over missing bars'''
+    frame = pd.DataFrame([(now, now.date(), s, (b.High + b.Low + b.Close) / 3 * b.Volume, b.Volume)
+                          for now, bars in steps for s, b in bars.items()],
+                         columns=['time', 'session', 'symbol', 'pv', 'volume'])
+    grouped = frame.groupby(['session', 'symbol'])
+    frame['vwap'] = grouped.pv.cumsum() / grouped.volume.cumsum()
+    vwap = frame.pivot(index='time', columns='symbol', values='vwap').reindex(columns=symbols)
+    return vwap.groupby(vwap.index.date).ffill()
+
+
+def setup(symbols, model):
+    algorithm = QCAlgorithm()
+    model.OnSecuritiesChanged(algorithm, SecurityChanges([algorithm.GetSecurity(s) for s in symbols]))
+    orders = []
+    algorithm.OnOrderEvent = orders.append
+    return algorithm, orders
+
+
+def step(algorithm, model, now, bars, targets=()):
+    algorithm.Time = now
+    algorithm.CurrentSlice = Slice(now, bars)
+    for symbol, bar in bars.items():
+        algorithm.Securities[symbol].SetMarketPrice(bar)
+    model.Execute(algorithm, list(targets))
+
+
+def test_session_vwap_matches_reference():
+    symbols = [Symbol(f"SYM{i}") for i in range(20)]
+    steps = minute_bars(symbols, 120)
+    expected = reference_vwap(steps, symbols)
+    model = VwapExecutionModel()
+    algorithm, _ = setup(symbols, model)
+    rows = np.array([model.vwap.rowBySymbol[s] for s in symbols])
+
+    for now, bars in steps:
+        step(algorithm, model, now, bars)
+        reference = expected.loc[now].to_numpy() if now in expected.index else np.full(len(symbols), np.nan)
+        np.testing.assert_allclose(model.vwap.Vwap(rows), reference, rtol=1e-12)
+
+
+def test_session_vwap_resets_each_session():
+    vwap = SessionVwap()
+    rows = np.array([vwap.Add(Symbol("A"))])
+    vwap.Update(OPEN.date(), rows, np.array([10.0]), np.array([100.0]), np.array([10.0]))
+    vwap.Update(OPEN.date(), rows, np.array([20.0]), np.array([300.0]), np.array([20.0]))
+    assert vwap.Vwap(rows)[0] == 17.5
+
+    vwap.Update((OPEN + timedelta(days=1)).date(), rows, np.array([30.0]), np.array([50.0]), np.array([30.0]))
+    assert vwap.Vwap(rows)[0] == 30.0
+
+
+def test_child_orders_are_favourable_and_within_volume_limit():
+    symbols = [Symbol(f"SYM{i}") for i in range(20)]
+    model = VwapExecutionModel(maximumOrderQuantityPercentVolume=0.01)
+    algorithm, orders = setup(symbols, model)
+    targets = [PortfolioTarget(s, 500 if i % 2 == 0 else -500) for i, s in enumerate(symbols)]
+
+    for t, (now, bars) in enumerate(minute_bars(symbols, 390, sessions=1)):
+        before = len(orders)
+        step(algorithm, model, now, bars, targets if t == 0 else ())
+        for event in orders[before:]:
+            row = np.array([model.vwap.rowBySymbol[event.Symbol]])
+            vwap = model.vwap.Vwap(row)[0]
+            assert event.FillPrice <= vwap if event.FillQuantity > 0 else event.FillPrice >= vwap
+            assert abs(event.FillQuantity) <= 0.01 * model.vwap.lastVolume[row][0]
+
+    assert orders
+    assert all(abs(algorithm.Portfolio[s].Quantity) <= 500 for s in symbols)
+    assert any(algorithm.Portfolio[s].Quantity == target.Quantity for s, target in zip(symbols, targets))
+
+
+def test_removed_symbol_target_executes_immediately():
+    symbols = [Symbol("A"), Symbol("B")]
+    model = VwapExecutionModel()
+    algorithm, orders = setup(symbols, model)
+    now, bars = minute_bars(symbols, 1, sessions=1)[0]
+    step(algorithm, model, now, bars)
+    algorithm.MarketOrder(symbols[0], 100)
+
+    model.OnSecuritiesChanged(algorithm, SecurityChanges([], [algorithm.Securities[symbols[0]]]))
+    step(algorithm, model, now + timedelta(minutes=1), bars, [PortfolioTarget(symbols[0], 0)])
+    assert algorithm.Portfolio[symbols[0]].Quantity == 0
+    assert orders[-1].FillQuantity == -100
+
+
+def test_daily_bars_execute_targets_immediately():
+    symbols = [Symbol("A"), Symbol("B")]
+    model = VwapExecutionModel()
+    algorithm, orders = setup(symbols, model)
+    logged = []
+    algorithm.Log = logged.append
+    day = datetime(2019, 7, 1)
+    bars = {s: TradeBar(day, s, 10.0, 11.0, 9.0, 10.0, 1e6, timedelta(days=1)) for s in symbols}
+
+    step(algorithm, model, day, bars, [PortfolioTarget(symbols[0], 300), PortfolioTarget(symbols[1], -200)])
+    assert model.sessionBars and len(logged) == 1
+    assert [(e.Symbol, e.FillQuantity) for e in orders] == [(symbols[0], 300), (symbols[1], -200)]
+    assert not model.targetsBySymbol
+
+
+def test_flat_target_for_untracked_symbol_sends_no_order():
+    symbols = [Symbol("A"), Symbol("B")]
+    model = VwapExecutionModel()
+    algorithm, _ = setup(symbols, model)
+    sent = []
+    market_order = algorithm.MarketOrder
+    algorithm.MarketOrder = lambda symbol, quantity, *args, **kwargs: sent.append(quantity) or market_order(symbol, quantity)
+    now, bars = minute_bars(symbols, 1, sessions=1)[0]
+    step(algorithm, model, now, bars)
+
+    model.OnSecuritiesChanged(algorithm, SecurityChanges([], [algorithm.Securities[symbols[0]]]))
+    step(algorithm, model, now + timedelta(minutes=1), bars, [PortfolioTarget(symbols[0], 0)])
+    assert sent == [] and not model.targetsBySymbol